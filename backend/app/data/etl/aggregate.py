@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+from identifiers import MISSING, registry
+
+KEY_COLS = ['season', 'week', 'game_id', 'posteam', 'defteam', 'player_id']
+
+# Each role credits a set of pbp columns to the player in its id column.
+# Values are the source column, or a constant counted once per play.
+ROLES = {
+    'passer': {
+        'id': 'passer_player_id',
+        'play_type': 'pass',
+        'stats': {
+            'pass_attempt': 'pass_attempt', 'complete_pass': 'complete_pass',
+            'passing_yards': 'passing_yards', 'pass_touchdown': 'pass_touchdown',
+            'interception': 'interception', 'fumble_lost': 'fumble_lost',
+            'target_inside_10': 'target_inside_10', 'target_inside_20': 'target_inside_20',
+        },
+    },
+    'rusher': {
+        'id': 'rusher_player_id',
+        'play_type': 'run',
+        'stats': {
+            'rush_plays': 1, 'rushing_yards': 'rushing_yards', 'rush_touchdown': 'rush_touchdown',
+            'fumble_lost': 'fumble_lost',
+            'rush_inside_10': 'rush_inside_10', 'rush_inside_20': 'rush_inside_20',
+        },
+    },
+    'receiver': {
+        'id': 'receiver_player_id',
+        'play_type': 'pass',
+        'stats': {
+            'reception': 'reception', 'receiving_yards': 'receiving_yards',
+            'receiving_touchdown': 'receiving_touchdown', 'fumble_lost': 'fumble_lost',
+            'target_inside_10': 'target_inside_10', 'target_inside_20': 'target_inside_20',
+        },
+    },
+}
+
+
+def _codes(values, kind, fill='0'):
+    """Sorted factorization of an id column with missing values filled like the old fillna(0).
+
+    Interned columns (int codes from identifiers.encode_frame) are factorized
+    as integers, ordered by label through the registry, and stay coded.
+    """
+    if np.issubdtype(values.dtype, np.integer):
+        ids = registry(kind)
+        values = np.where(values == MISSING, ids.encode([fill])[0], values)
+        uniques, inverse = np.unique(values, return_inverse=True)
+        order = np.argsort(ids.sort_rank()[uniques], kind='stable')
+        position = np.empty(len(order), dtype=np.int64)
+        position[order] = np.arange(len(order))
+        return position[inverse], uniques[order]
+    return pd.factorize(pd.Series(values, dtype=object).fillna(fill).astype(str), sort=True)
+
+
+def aggregate_player_week(pbp: pd.DataFrame, agg_cols, filter_play_type: bool = False) -> pd.DataFrame:
+    """Sum each role's stats per (season, week, game_id, posteam, defteam, player_id).
+
+    Equivalent to building one padded frame per role, concatenating them and
+    running a groupby().sum(), but the pbp frame is never copied: every role
+    scatter-adds its columns straight into one preallocated output array.
+    Missing ids and teams become '0', as they did with fillna(0). If the id
+    columns were interned with identifiers.encode_frame, so are the output's.
+
+    filter_play_type restricts passers/receivers to pass plays and rushers
+    to run plays (the 2025 pipeline); otherwise every play feeds every role.
+    """
+    n = len(pbp)
+
+    # --- Integer keys for (game, posteam, defteam, player), built once ---
+    game_codes, games = _codes(pbp['game_id'].to_numpy(), 'game')
+    game_season = np.zeros(len(games), dtype=np.int64)
+    game_week = np.zeros(len(games), dtype=np.int64)
+    game_season[game_codes] = pbp['season'].to_numpy()
+    game_week[game_codes] = pbp['week'].to_numpy()
+    game_rank = np.empty(len(games), dtype=np.int64)
+    game_rank[np.lexsort((np.arange(len(games)), game_week, game_season))] = np.arange(len(games))
+
+    team_codes, teams = _codes(np.concatenate([pbp['posteam'].to_numpy(), pbp['defteam'].to_numpy()]), 'team')
+    pos_codes, def_codes = team_codes[:n], team_codes[n:]
+
+    player_codes, players = _codes(np.concatenate([pbp[role['id']].to_numpy() for role in ROLES.values()]), 'player')
+
+    n_teams, n_players = len(teams), len(players)
+    team_key = ((game_rank[game_codes] * n_teams + pos_codes) * n_teams + def_codes) * n_players
+
+    # --- Per-role rows and keys ---
+    role_rows, role_keys = [], []
+    play_type = pbp['play_type'].to_numpy() if filter_play_type else None
+    for i, role in enumerate(ROLES.values()):
+        rows = np.flatnonzero(play_type == role['play_type']) if filter_play_type else np.arange(n)
+        role_rows.append(rows)
+        role_keys.append(team_key[rows] + player_codes[i * n:(i + 1) * n][rows])
+
+    keys, inverse = np.unique(np.concatenate(role_keys), return_inverse=True)
+    n_groups = len(keys)
+
+    # --- Scatter-add every role's stats into the output ---
+    out = np.zeros((n_groups, len(agg_cols)))
+    is_int = {col: True for col in agg_cols}
+    start = 0
+    for role, rows in zip(ROLES.values(), role_rows):
+        group = inverse[start:start + len(rows)]
+        start += len(rows)
+        for j, col in enumerate(agg_cols):
+            src = role['stats'].get(col)
+            if src is None:
+                continue
+            if isinstance(src, str):
+                values = pbp[src].to_numpy()
+                is_int[col] &= np.issubdtype(values.dtype, np.integer)
+                values = np.nan_to_num(values[rows].astype(float))
+                out[:, j] += np.bincount(group, weights=values, minlength=n_groups)
+            else:
+                out[:, j] += src * np.bincount(group, minlength=n_groups)
+
+    # --- Decode keys back to labels ---
+    keys, player = np.divmod(keys, n_players)
+    keys, defteam = np.divmod(keys, n_teams)
+    game, posteam = np.divmod(keys, n_teams)
+    game = np.argsort(game_rank)[game]
+
+    player_week = pd.DataFrame({
+        'season': game_season[game],
+        'week': game_week[game],
+        'game_id': games[game],
+        'posteam': teams[posteam],
+        'defteam': teams[defteam],
+        'player_id': players[player],
+    })
+    for j, col in enumerate(agg_cols):
+        player_week[col] = out[:, j].astype(np.int64) if is_int[col] else out[:, j]
+    return player_week
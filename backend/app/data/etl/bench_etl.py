@@ -0,0 +1,143 @@
+"""Scale benchmark for the ETL stages on synthetic data, against stored baselines.
+
+For each size, synthetic pbp/roster/context/tendency stages are written to
+a scratch tree (see synthetic.py). The real stage scripts then run against
+that tree, each under instrument.py in its own process, so a script's
+process peak RSS is its own. Wall time, CPU time, process peak RSS and
+plays/sec per stage (and their instrumented hot paths, for which the peak
+growth inside the block is kept too) are compared with bench_baselines.json:
+
+    python bench_etl.py --plays 1e4 1e5 1e6
+    python bench_etl.py --plays 1e4 1e5 1e6 --save-baseline
+    python bench_etl.py --plays 1e6 --check    # exit 1 on a regression
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from instrument import load_metrics
+from synthetic import default_seasons, write_synthetic
+
+ETL_DIR = Path(__file__).resolve().parent
+BASELINE_FILE = ETL_DIR / "bench_baselines.json"
+MIN_DELTA_S = 0.5
+
+# (stage, script) in dependency order; all read the *_2021_2024 stage names the generator writes
+BENCH_STAGES = [
+    ("player_week", "player_week_data.py"),
+    ("matchup_tendencies", "matchup_tendencies.py"),
+    ("rolling", "final_with_rolling.py"),
+]
+# Scripts that take --processes (see partitioned.py)
+PARTITIONED_SCRIPTS = {"player_week_data.py"}
+
+
+def run_scale(plays: int, seasons: int = None, seed: int = 0, keep: bool = False, processes: int = 1) -> dict:
+    """{'<stage>' or '<stage>/<block>': metrics} for one synthetic size."""
+    root = Path(tempfile.mkdtemp(prefix="etl_bench_"))
+    data_dir, cache_dir = root / "data", root / "data" / "cache"
+    for sub in ("play_by_play", "2025"):
+        (data_dir / sub).mkdir(parents=True)
+    env = dict(os.environ, ETL_DATA_DIR=str(data_dir), ETL_CACHE_DIR=str(cache_dir),
+               ETL_METRICS=str(root / "metrics.jsonl"), ETL_PROFILE="0", ETL_TRACEMALLOC="0")
+
+    start = time.perf_counter()
+    write_synthetic(cache_dir, plays, seasons, seed)
+    results = {"generate": {"wall_s": time.perf_counter() - start}}
+    try:
+        for name, script in BENCH_STAGES:
+            command = [sys.executable, str(ETL_DIR / "instrument.py"), str(ETL_DIR / script)]
+            if script in PARTITIONED_SCRIPTS and processes > 1:
+                command += ["--processes", str(processes)]
+            proc = subprocess.run(command, cwd=ETL_DIR, env=env, capture_output=True, text=True)
+            if proc.returncode != 0:
+                raise RuntimeError(f"{script} failed at {plays:,} plays:\n{proc.stdout[-2000:]}{proc.stderr[-2000:]}")
+            records = load_metrics(root / "metrics.jsonl")
+            stem = Path(script).stem
+            for record in records:
+                if record["stage"] == stem and record["parent"] is None:
+                    results[name] = record
+                elif record["parent"] == stem:
+                    results[f"{name}/{record['stage']}"] = record
+            (root / "metrics.jsonl").unlink()
+    finally:
+        if not keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+    return {key: {
+        "wall_s": round(r["wall_s"], 4),
+        "cpu_s": round(r.get("cpu_s", r["wall_s"]), 4),
+        "process_peak_rss_mb": r.get("process_peak_rss_mb"),
+        "peak_rss_growth_mb": r.get("peak_rss_growth_mb"),
+        "rows_in": r.get("rows_in"),
+        "rows_out": r.get("rows_out"),
+        "plays_per_s": round(plays / r["wall_s"]) if r["wall_s"] else None,
+    } for key, r in results.items()}
+
+
+def load_baselines(path=BASELINE_FILE) -> dict:
+    return json.loads(Path(path).read_text()) if Path(path).exists() else {"machine": {}, "results": {}}
+
+
+def compare(key: str, result: dict, baseline: dict, threshold: float) -> str:
+    """'' or a short description of how `result` regressed against `baseline`."""
+    if not baseline:
+        return "new"
+    flags = []
+    # Sub-second stages are mostly interpreter start-up; ignore jitter under MIN_DELTA_S
+    if result["wall_s"] > baseline["wall_s"] * (1 + threshold) and result["wall_s"] - baseline["wall_s"] > MIN_DELTA_S:
+        flags.append(f"wall {result['wall_s'] / baseline['wall_s'] - 1:+.0%}")
+    if result["process_peak_rss_mb"] and baseline.get("process_peak_rss_mb") and \
+            result["process_peak_rss_mb"] > baseline["process_peak_rss_mb"] * (1 + threshold):
+        flags.append(f"peak {result['process_peak_rss_mb'] / baseline['process_peak_rss_mb'] - 1:+.0%}")
+    return ("⚠ " + ", ".join(flags)) if flags else "ok"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ETL stages on synthetic data at several scales")
+    parser.add_argument("--plays", type=float, nargs="+", default=[1e4, 1e5, 1e6],
+                        help="synthetic sizes in plays (10k to 50M)")
+    parser.add_argument("--seasons", type=int, default=None, help="default: one per ~46k plays, at most 25")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown / memory growth")
+    parser.add_argument("--baseline", default=str(BASELINE_FILE))
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--check", action="store_true", help="exit 1 if any stage regressed")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch data directories")
+    parser.add_argument("--processes", type=int, default=1, help="processes for the partitioned stages")
+    args = parser.parse_args()
+
+    baselines = load_baselines(args.baseline)
+    current = {}
+    regressed = False
+    print(f"{'stage':<40} {'plays':>11} {'seasons':>7} {'wall_s':>8} {'base_s':>8} {'peak_mb':>8} "
+          f"{'plays/s':>12}  vs baseline")
+    for plays in map(int, args.plays):
+        seasons = args.seasons or default_seasons(plays)
+        for stage, result in run_scale(plays, args.seasons, args.seed, args.keep, args.processes).items():
+            key = f"{stage}@{plays}" + (f"x{args.seasons}" if args.seasons else "")
+            key += f"p{args.processes}" if args.processes > 1 else ""
+            current[key] = result
+            base = baselines["results"].get(key)
+            verdict = compare(key, result, base, args.threshold) if stage != "generate" else ""
+            regressed |= verdict.startswith("⚠")
+            base_s = f"{base['wall_s']:>8.2f}" if base else f"{'-':>8}"
+            peak = f"{result['process_peak_rss_mb']:>8.0f}" if result.get("process_peak_rss_mb") else f"{'-':>8}"
+            rate = f"{result['plays_per_s']:>12,}" if result.get("plays_per_s") else f"{'-':>12}"
+            print(f"{stage:<40} {plays:>11,} {seasons:>7} {result['wall_s']:>8.2f} {base_s} {peak} {rate}  {verdict}")
+
+    if args.save_baseline:
+        baselines["machine"] = {"python": platform.python_version(), "platform": platform.platform(),
+                                "cpus": os.cpu_count()}
+        baselines["results"].update(current)
+        Path(args.baseline).write_text(json.dumps(baselines, indent=1, sort_keys=True) + "\n")
+        print(f"Saved {len(current)} baselines to {args.baseline}")
+    if args.check and regressed:
+        raise SystemExit(1)
@@ -0,0 +1,128 @@
+"""Benchmark the scatter-add player-week aggregator against the old concat + groupby.
+
+Each approach runs in its own process so peak RSS is not shared:
+
+    python bench_player_week.py --pbp ../2025/pbp_2025_2025.csv --scale 10
+"""
+import argparse
+import multiprocessing as mp
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+import identifiers
+from aggregate import KEY_COLS, ROLES, aggregate_player_week
+from identifiers import decode_frame, encode_frame
+
+AGG_COLS = [
+    'pass_attempt', 'complete_pass', 'passing_yards', 'pass_touchdown', 'interception',
+    'rush_plays', 'rushing_yards', 'rush_touchdown',
+    'reception', 'receiving_yards', 'receiving_touchdown', 'fumble_lost',
+    'rush_inside_10', 'rush_inside_20', 'target_inside_10', 'target_inside_20'
+]
+
+
+def concat_groupby(pbp, agg_cols, filter_play_type=False):
+    """The previous approach: one padded copy of pbp per role, concat, six-key groupby."""
+    frames = []
+    for role in ROLES.values():
+        rows = pbp[pbp['play_type'] == role['play_type']] if filter_play_type else pbp
+        sources = [src for col, src in role['stats'].items() if isinstance(src, str) and col in agg_cols]
+        role_df = rows[KEY_COLS[:-1] + [role['id']] + sources].copy()
+        role_df = role_df.rename(columns={role['id']: 'player_id'})
+        role_df.fillna(0, inplace=True)
+        for col in agg_cols:
+            src = role['stats'].get(col)
+            if src is None:
+                role_df[col] = 0
+            elif not isinstance(src, str):
+                role_df[col] = src
+        frames.append(role_df)
+
+    all_players = pd.concat(frames, ignore_index=True)
+    all_players = all_players.dropna(subset=['player_id'])
+    return all_players.groupby(KEY_COLS, as_index=False)[agg_cols].sum()
+
+
+def load_pbp(path, scale):
+    pbp = pd.read_csv(path)
+    pbp['passing_yards'] = pbp['receiving_yards'].fillna(0)
+    pbp['receiving_touchdown'] = pbp['pass_touchdown'].fillna(0)
+    pbp['rush_inside_10'] = ((pbp['play_type'] == 'run') & (pbp['yardline_100'] <= 10)).astype(int)
+    pbp['rush_inside_20'] = ((pbp['play_type'] == 'run') & (pbp['yardline_100'] <= 20)).astype(int)
+    pbp['target_inside_10'] = ((pbp['play_type'] == 'pass') & (pbp['yardline_100'] <= 10)).astype(int)
+    pbp['target_inside_20'] = ((pbp['play_type'] == 'pass') & (pbp['yardline_100'] <= 20)).astype(int)
+
+    # Tile the file into extra "seasons" to get closer to a multi-season backfill
+    copies = []
+    for i in range(scale):
+        copy = pbp.copy()
+        copy['season'] = copy['season'] - i
+        copy['game_id'] = copy['season'].astype(str) + copy['game_id'].str[4:]
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def current_rss_kb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize() // 1024
+
+
+def run(name, path, scale, filter_play_type, queue):
+    pbp = load_pbp(path, scale)
+    if name == 'scatter_add_interned':
+        # Tiled fake game ids must not leak into the pipeline's registry
+        identifiers.IDENTIFIER_DIR = Path(tempfile.mkdtemp())
+        pbp = encode_frame(pbp)
+    id_cols = [c for c in pbp.columns if identifiers.kind_of(c)]
+    id_mb = pbp[id_cols].memory_usage(deep=True, index=False).sum() / 2 ** 20
+    before = current_rss_kb()
+    start = time.perf_counter()
+    if name == 'scatter_add':
+        result = aggregate_player_week(pbp, AGG_COLS, filter_play_type)
+    elif name == 'scatter_add_interned':
+        result = decode_frame(aggregate_player_week(pbp, AGG_COLS, filter_play_type))
+    else:
+        result = concat_groupby(pbp, AGG_COLS, filter_play_type)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((name, len(pbp), elapsed, peak, peak - before, id_mb, result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pbp', default='../2025/pbp_2025_2025.csv')
+    parser.add_argument('--scale', type=int, default=1, help='number of tiled seasons')
+    parser.add_argument('--all-plays', action='store_true',
+                        help='feed every play to every role (2021-2024 pipeline) instead of filtering on play_type')
+    args = parser.parse_args()
+
+    ctx = mp.get_context('spawn')
+    results = {}
+    for name in ['concat_groupby', 'scatter_add', 'scatter_add_interned']:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=run, args=(name, args.pbp, args.scale, not args.all_plays, queue))
+        proc.start()
+        results[name] = queue.get()
+        proc.join()
+
+    print(f"{'approach':<22}{'plays':>12}{'wall s':>10}{'peak RSS MB':>14}{'delta MB':>11}{'id cols MB':>12}")
+    for name, plays, elapsed, peak, delta, id_mb, _ in results.values():
+        print(f"{name:<22}{plays:>12,}{elapsed:>10.3f}{peak / 1024:>14.1f}{delta / 1024:>11.1f}{id_mb:>12.1f}")
+
+    expected = results['concat_groupby'][-1]
+    expected['player_id'] = expected['player_id'].astype(str)
+    expected['posteam'] = expected['posteam'].astype(str)
+    expected['defteam'] = expected['defteam'].astype(str)
+    for name in ['scatter_add', 'scatter_add_interned']:
+        actual = results[name][-1]
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+        assert (actual[AGG_COLS].dtypes == expected[AGG_COLS].dtypes).all()
+    print('outputs match')
+
+
+if __name__ == '__main__':
+    main()
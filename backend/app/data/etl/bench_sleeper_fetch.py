@@ -0,0 +1,140 @@
+"""Benchmark and check the Sleeper fetcher against a local stand-in server.
+
+Serves synthetic weekly stats with configurable latency, injects transient
+503s, 429s with Retry-After and one permanently failing week, then compares
+the old sequential loop with SleeperClient:
+
+    python bench_sleeper_fetch.py --latency 0.15 --calls-per-minute 1000
+"""
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from sleeper_client import SleeperClient, failure_report, weekly_stats_paths
+
+SEASONS = range(2021, 2025)
+
+
+def payload(season, week):
+    return {str(1000 + p): {"off_snp": (season * 7 + week * 13 + p * 31) % 70, "pts_ppr": p / 4}
+            for p in range(200)}
+
+
+class StandIn(BaseHTTPRequestHandler):
+    latency = 0.0
+    permanent = "/v1/stats/nfl/regular/2023/9"
+    hits = Counter()
+    stamps = []
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, status, body=None, headers=()):
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in headers:
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        with self.lock:
+            self.hits[self.path] += 1
+            hit = self.hits[self.path]
+            self.stamps.append(time.monotonic())
+        time.sleep(self.latency)
+
+        parts = self.path.strip("/").split("/")
+        if self.path == self.permanent:
+            return self.send_json(500)
+        if parts[-5:-2] != ["stats", "nfl", "regular"]:
+            return self.send_json(404)
+        season, week = int(parts[-2]), int(parts[-1])
+        if hit == 1 and week % 7 == 0:
+            return self.send_json(503)
+        if hit == 1 and week % 11 == 0:
+            return self.send_json(429, headers=[("Retry-After", "0.2")])
+        self.send_json(200, payload(season, week))
+
+
+def sequential(base_url, paths):
+    """The previous approach: one request at a time, 0.1s apart, failures printed and skipped."""
+    results = {}
+    for partition, path in paths.items():
+        try:
+            res = requests.get(f"{base_url}/{path}")
+            res.raise_for_status()
+            results[partition] = res.json()
+            time.sleep(0.1)
+        except Exception as e:
+            print(f"Failed {partition}: {e}")
+    return results
+
+
+def peak_rate(stamps, window=5.0):
+    """Most requests seen in any `window` seconds, scaled to calls/min."""
+    stamps = sorted(stamps)
+    start = best = 0
+    for end, t in enumerate(stamps):
+        while t - stamps[start] > window:
+            start += 1
+        best = max(best, end - start + 1)
+    return best * 60 / window
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.15, help="server response time in seconds")
+    parser.add_argument("--calls-per-minute", type=float, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--skip-sequential", action="store_true")
+    args = parser.parse_args()
+
+    StandIn.latency = args.latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    paths = weekly_stats_paths(SEASONS)
+    expected = {partition: payload(*partition) for partition in paths}
+    broken = (2023, 9)
+
+    timings = {}
+    if not args.skip_sequential:
+        StandIn.hits.clear()
+        start = time.perf_counter()
+        results = sequential(base_url, paths)
+        timings["sequential"] = (time.perf_counter() - start, len(results))
+
+    StandIn.hits.clear()
+    StandIn.stamps.clear()
+    client = SleeperClient(base_url, calls_per_minute=args.calls_per_minute,
+                           concurrency=args.concurrency, retries=3, backoff=0.05)
+    start = time.perf_counter()
+    results, failures = client.fetch_all(paths)
+    timings["sleeper_client"] = (time.perf_counter() - start, len(results))
+    server.shutdown()
+
+    print(f"{'approach':<16}{'weeks ok':>10}{'wall s':>10}")
+    for name, (seconds, ok) in timings.items():
+        print(f"{name:<16}{ok:>10}{seconds:>10.2f}")
+    print(f"requests sent: {sum(StandIn.hits.values())}, "
+          f"peak rate {peak_rate(StandIn.stamps):.0f}/min (limit {args.calls_per_minute:.0f}, 5s window)")
+    print(failure_report(failures))
+
+    assert peak_rate(StandIn.stamps) <= args.calls_per_minute * 1.05
+    assert [f.partition for f in failures] == [broken]
+    assert failures[0].status == 500 and failures[0].attempts == 4
+    assert results == {p: v for p, v in expected.items() if p != broken}
+    print("results match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import io
+import re
+import time
+
+import pandas as pd
+from sqlalchemy import inspect, text
+
+from instrument import record_write
+
+
+def _copy_chunk(conn, chunk: pd.DataFrame, table: str) -> None:
+    """Stream one chunk into `table` with Postgres COPY ... FROM STDIN (CSV)."""
+    quote = conn.dialect.identifier_preparer.quote
+    columns = ", ".join(quote(str(col)) for col in chunk.columns)
+    sql = f"COPY {quote(table)} ({columns}) FROM STDIN WITH (FORMAT csv)"
+
+    buffer = io.StringIO()
+    chunk.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+
+    cursor = conn.connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):  # psycopg2
+            cursor.copy_expert(sql, buffer)
+        else:  # psycopg 3
+            with cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+    finally:
+        cursor.close()
+
+
+# Views over `table`, views over those, and so on, with their definitions
+_PG_VIEWS = """
+WITH RECURSIVE deps(oid, depth) AS (
+    SELECT r.ev_class, 1 FROM pg_depend d JOIN pg_rewrite r ON r.oid = d.objid
+    WHERE d.refobjid = to_regclass(:table) AND r.ev_class <> d.refobjid
+    UNION
+    SELECT r.ev_class, deps.depth + 1 FROM deps JOIN pg_depend d ON d.refobjid = deps.oid
+    JOIN pg_rewrite r ON r.oid = d.objid WHERE r.ev_class <> d.refobjid
+)
+SELECT c.oid::regclass::text AS name, c.relkind, pg_get_viewdef(c.oid) AS definition
+FROM deps JOIN pg_class c ON c.oid = deps.oid
+GROUP BY c.oid, c.relkind ORDER BY max(deps.depth)
+"""
+
+
+def _dependent_views(conn, table: str) -> list:
+    """(kind, name, CREATE statement) of the views that depend on `table`, in an order that can recreate them."""
+    quote = conn.dialect.identifier_preparer.quote
+    if conn.dialect.name == "postgresql":
+        rows = conn.execute(text(_PG_VIEWS), {"table": quote(table)}).all()
+        views = []
+        for name, relkind, definition in rows:
+            kind = "MATERIALIZED VIEW" if relkind == "m" else "VIEW"
+            views.append((kind, name, f"CREATE {kind} {name} AS {definition}"))
+        return views
+    if conn.dialect.name == "sqlite":
+        views = conn.execute(text("SELECT name, sql FROM sqlite_master WHERE type = 'view' ORDER BY rowid")).all()
+        names, found = {table}, []
+        for name, sql in views:  # in creation order, so a view's dependencies come before it
+            if any(re.search(rf'(?<![\w$]){re.escape(n)}(?![\w$])', sql, re.IGNORECASE) for n in names):
+                names.add(name)
+                found.append(("VIEW", quote(name), sql))
+        return found
+    return []
+
+
+def swap_table(conn, staging: str, table: str) -> None:
+    """Rename `staging` over `table` inside the caller's transaction.
+
+    Views that depend on `table` (on Postgres and SQLite) are dropped with it
+    and recreated from their definitions on the new table; grants, comments
+    and indexes on those views are not kept.
+    """
+    quote = conn.dialect.identifier_preparer.quote
+    views = _dependent_views(conn, table)
+    for kind, name, _ in reversed(views):
+        conn.exec_driver_sql(f"DROP {kind} {name}")
+    conn.execute(text(f"DROP TABLE IF EXISTS {quote(table)}"))
+    conn.execute(text(f"ALTER TABLE {quote(staging)} RENAME TO {quote(table)}"))
+    for _, _, create in views:
+        conn.exec_driver_sql(create)
+
+
+def load_chunks(chunks, table: str, engine, schema_query: str = None) -> dict:
+    """Replace `table` with the concatenation of `chunks`, atomically.
+
+    Everything happens in one transaction: the first chunk creates a staging
+    table, every chunk is streamed into it (COPY on Postgres, batched
+    executemany elsewhere, e.g. SQLite), and the staging table is then
+    swapped in with swap_table, so readers never see a half-loaded table.
+
+    `chunks` may also be a callable taking the open connection, for producers
+    that read their input inside the same transaction (required on SQLite,
+    where a second connection cannot read while the load holds the write lock).
+
+    With `schema_query`, the staging table gets the columns and types of that
+    SELECT's result (created empty in the database) instead of those pandas
+    infers from the first chunk, which are wrong for a column that happens
+    to be all null in it.
+    """
+    staging = f"{table}__staging"
+    start = time.perf_counter()
+    rows = 0
+    nbytes = 0
+    created = False
+
+    with engine.begin() as conn:
+        quote = conn.dialect.identifier_preparer.quote
+        use_copy = conn.dialect.name == "postgresql"
+        if schema_query is not None:
+            conn.execute(text(f"DROP TABLE IF EXISTS {quote(staging)}"))
+            conn.execute(text(f"CREATE TABLE {quote(staging)} AS SELECT * FROM ({schema_query}) q WHERE 1 = 0"))
+            created = True
+        if callable(chunks):
+            chunks = chunks(conn)
+
+        for chunk in chunks:
+            if not created:
+                chunk.head(0).to_sql(staging, conn, if_exists="replace", index=False)
+                created = True
+            if use_copy:
+                _copy_chunk(conn, chunk, staging)
+            else:
+                chunk.to_sql(staging, conn, if_exists="append", index=False)
+            rows += len(chunk)
+            nbytes += int(chunk.memory_usage(index=False).sum())
+
+        if not created:
+            raise ValueError(f"No chunks to load into {table}")
+
+        swap_table(conn, staging, table)
+
+    seconds = time.perf_counter() - start
+    record_write(f"table:{table}", rows, nbytes)
+    rate = rows / seconds if seconds else float("inf")
+    print(f"Loaded {rows:,} rows into {table} in {seconds:.1f}s ({rate:,.0f} rows/sec)")
+    return {"table": table, "rows": rows, "seconds": seconds, "rows_per_sec": rate}
+
+
+def load_frame(df: pd.DataFrame, table: str, engine, chunksize: int = 50_000) -> dict:
+    """Bulk replacement for df.to_sql(table, engine, if_exists="replace", index=False)."""
+    chunks = (df.iloc[i:i + chunksize] for i in range(0, max(len(df), 1), chunksize))
+    return load_chunks(chunks, table, engine)
+
+
+def upsert_frame(df: pd.DataFrame, table: str, engine, keys, partitions=(),
+                 partition_keys=("season", "week"), chunksize: int = 50_000) -> dict:
+    """Replace the rows of `table` whose `keys` match a row of df with df's rows, atomically.
+
+    `partitions` (e.g. [(season, week), ...] on `partition_keys`) are replaced
+    whole: every existing row in them is deleted, so rows that are no longer
+    in a recomputed partition go too. df is streamed into a staging table
+    like load_chunks does, then the DELETEs and one INSERT ... SELECT move it
+    into `table` in the same transaction; other rows are left alone. A
+    missing `table` is created from df.
+    """
+    if not inspect(engine).has_table(table):
+        return load_frame(df, table, engine, chunksize)
+    staging = f"{table}__upsert"
+    start = time.perf_counter()
+
+    with engine.begin() as conn:
+        quote = conn.dialect.identifier_preparer.quote
+        df.head(0).to_sql(staging, conn, if_exists="replace", index=False)
+        for i in range(0, len(df), chunksize):
+            chunk = df.iloc[i:i + chunksize]
+            if conn.dialect.name == "postgresql":
+                _copy_chunk(conn, chunk, staging)
+            else:
+                chunk.to_sql(staging, conn, if_exists="append", index=False)
+
+        target, source = quote(table), quote(staging)
+        match = " AND ".join(f"{source}.{quote(k)} = {target}.{quote(k)}" for k in keys)
+        columns = ", ".join(quote(str(col)) for col in df.columns)
+        in_partition = " AND ".join(f"{quote(k)} = :{k}" for k in partition_keys)
+        replaced = 0
+        for partition in partitions:
+            params = {k: v.item() if hasattr(v, "item") else v for k, v in zip(partition_keys, partition)}
+            replaced += conn.execute(text(f"DELETE FROM {target} WHERE {in_partition}"), params).rowcount
+        replaced += conn.execute(
+            text(f"DELETE FROM {target} WHERE EXISTS (SELECT 1 FROM {source} WHERE {match})")).rowcount
+        conn.execute(text(f"INSERT INTO {target} ({columns}) SELECT {columns} FROM {source}"))
+        conn.execute(text(f"DROP TABLE {source}"))
+
+    seconds = time.perf_counter() - start
+    record_write(f"table:{table}", len(df), int(df.memory_usage(index=False).sum()))
+    print(f"Upserted {len(df):,} rows into {table} ({replaced:,} replaced) in {seconds:.1f}s")
+    return {"table": table, "rows": len(df), "replaced": replaced, "seconds": seconds}
@@ -2,25 +2,26 @@ import pandas as pd
 from sqlalchemy import create_engine
 from dotenv import load_dotenv
 import os
+from storage import read_stage
+from bulk_load import load_frame
 
 load_dotenv()
 DB_URI = os.getenv("DATABASE_URL")
 engine = create_engine(DB_URI)
 
-roster_files = [
-    "../play_by_play/defense_tendencies_2021_2024.csv"
+roster_stages = [
+    "defense_tendencies_2021_2024"
 ]
 
 dfs = []
 
-for file in roster_files:
-    print(f"Reading {file}...")
-    df = pd.read_csv(file)
+for stage in roster_stages:
+    print(f"Reading {stage}...")
 
     # Select relevant columns
-    df_small = df[[
+    df_small = read_stage(stage, columns=[
         "season", "week", "defteam", "total_pass_plays", "blitz_rate","pressure_rate","man_coverage_pct","zone_coverage_pct"
-    ]].copy()
+    ])
 
     dfs.append(df_small)
 
@@ -28,5 +29,5 @@ roster_all = pd.concat(dfs, ignore_index=True)
 
 
 print("Saving def tendency to Postgres...")
-roster_all.to_sql("defensive_tendecies", engine, if_exists="replace", index=False)
+load_frame(roster_all, "defensive_tendencies", engine)
 print("Done!")
\ No newline at end of file
@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+
+class ContextTensor:
+    """Team-week context as a dense (season, week, team, feature) array.
+
+    Built once from a table with one row per (season, week, team), e.g.
+    offensive or defensive tendencies, or games seen from each side. Looking
+    up context for any number of rows is then integer arithmetic on
+    (season, week, team code) plus one fancy-index gather, rather than a
+    hash join on string keys.
+
+    Numeric features live in `values` (float64, NaN where a team has no row
+    that week); string/categorical features are kept as category codes in
+    `codes`. gather() casts back to the source dtypes the way a left merge
+    would (ints stay ints unless a row is unmatched).
+    """
+
+    def __init__(self, df: pd.DataFrame, team_col: str, features=None):
+        features = [c for c in (features or df.columns) if c not in ('season', 'week', team_col)]
+        self.team_col = team_col
+        self.features = features
+        self.seasons = np.sort(df['season'].unique())
+        self.n_weeks = int(df['week'].max()) + 1
+        self.teams = pd.Index(sorted(df[team_col].dropna().astype(str).unique()))
+
+        flat, found = self._flat(df['season'], df['week'], df[team_col])
+        if not found.all():
+            raise ValueError(f"Rows without a team in {team_col}")
+        if len(np.unique(flat)) != len(flat):
+            raise ValueError(f"More than one row per (season, week, {team_col})")
+        size = len(self.seasons) * self.n_weeks * len(self.teams)
+
+        self.present = np.zeros(size, dtype=bool)
+        self.present[flat] = True
+
+        self.numeric = [c for c in features if pd.api.types.is_numeric_dtype(df[c])
+                        and not isinstance(df[c].dtype, pd.CategoricalDtype)]
+        self.labels = [c for c in features if c not in self.numeric]
+        self.dtypes = {c: df[c].dtype for c in features}
+
+        self.values = np.full((size, len(self.numeric)), np.nan)
+        self.values[flat] = df[self.numeric].to_numpy(dtype=np.float64, na_value=np.nan)
+        self.categories = {}
+        self.codes = np.full((size, len(self.labels)), -1, dtype=np.int32)
+        for i, col in enumerate(self.labels):
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                codes, categories = df[col].cat.codes.to_numpy(), df[col].cat.categories
+            else:
+                codes, categories = pd.factorize(df[col])
+            self.codes[flat, i] = codes
+            self.categories[col] = categories
+
+        shape = (len(self.seasons), self.n_weeks, len(self.teams))
+        self.values = self.values.reshape(shape + (len(self.numeric),))
+        self.codes = self.codes.reshape(shape + (len(self.labels),))
+
+    def _flat(self, season, week, team):
+        """Flat (season, week, team) cell of each row, and whether that cell exists."""
+        season = np.asarray(season, dtype=np.int64)
+        week = np.asarray(week, dtype=np.int64)
+        s = np.searchsorted(self.seasons, season)
+        s_ok = s < len(self.seasons)
+        s_ok[s_ok] = self.seasons[s[s_ok]] == season[s_ok]
+        w_ok = (week >= 0) & (week < self.n_weeks)
+        # Map the few distinct team labels, not every row's string
+        codes, uniques = pd.factorize(pd.Series(team))
+        lookup = self.teams.get_indexer(pd.Index(uniques, dtype=object).astype(str))
+        t = np.where(codes >= 0, lookup[np.maximum(codes, 0)] if len(lookup) else -1, -1)
+        found = s_ok & w_ok & (t >= 0)
+        flat = (np.where(found, s, 0) * self.n_weeks + np.where(found, week, 0)) * len(self.teams) + np.maximum(t, 0)
+        return flat, found
+
+    def gather(self, season, week, team, features=None) -> dict:
+        """{feature: values} for each (season, week, team) row, NaN where the team has no row."""
+        features = features or self.features
+        flat, found = self._flat(season, week, team)
+        found &= self.present[flat]
+        matched = found.all()
+
+        out = {}
+        num = [self.numeric.index(c) for c in features if c in self.numeric]
+        values = self.values.reshape(-1, len(self.numeric))[np.ix_(flat, num)] if num else None
+        lab = [self.labels.index(c) for c in features if c in self.labels]
+        codes = self.codes.reshape(-1, len(self.labels))[np.ix_(flat, lab)] if lab else None
+        for col in features:
+            dtype = self.dtypes[col]
+            if col in self.numeric:
+                column = values[:, num.index(self.numeric.index(col))]
+                if matched:
+                    column = column.astype(dtype)
+                else:
+                    column[~found] = np.nan
+                    if dtype == np.float32:
+                        column = column.astype(np.float32)
+            else:
+                c = codes[:, lab.index(self.labels.index(col))].copy()
+                c[~found] = -1
+                categories = self.categories[col]
+                if isinstance(dtype, pd.CategoricalDtype):
+                    column = pd.Categorical.from_codes(c, categories=categories)
+                else:
+                    column = np.where(c >= 0, np.asarray(categories, dtype=object)[np.maximum(c, 0)], np.nan)
+            out[col] = column
+        return out
+
+
+def attach(df: pd.DataFrame, tensor: ContextTensor, team_col: str, features=None,
+           suffixes=('_x', '_y')) -> pd.DataFrame:
+    """df.merge(context, on=['season', 'week', team_col], how='left') via a tensor gather.
+
+    Feature columns that clash with df get pandas' merge suffixes.
+    """
+    features = features or tensor.features
+    gathered = tensor.gather(df['season'], df['week'], df[team_col], features)
+    clash = set(features) & set(df.columns)
+    left = df.rename(columns={c: c + suffixes[0] for c in clash})
+    right = pd.DataFrame({c + suffixes[1] if c in clash else c: v for c, v in gathered.items()}, index=df.index)
+    return pd.concat([left, right], axis=1)
+
+
+def attach_rows(df: pd.DataFrame, table: pd.DataFrame, on, suffixes=('_x', '_y')) -> pd.DataFrame:
+    """df.merge(table, on=on, how='left') for a table with unique keys, as a positional take.
+
+    For tables keyed by something other than team-week (e.g. games by game_id).
+    """
+    on = list(on)
+    positions = pd.MultiIndex.from_frame(table[on]).get_indexer(pd.MultiIndex.from_frame(df[on]))
+    right = table.drop(columns=on).reset_index(drop=True).reindex(positions)
+    right.index = df.index
+    clash = set(right.columns) & set(df.columns)
+    left = df.rename(columns={c: c + suffixes[0] for c in clash})
+    right = right.rename(columns={c: c + suffixes[1] for c in clash})
+    return pd.concat([left, right], axis=1)
@@ -0,0 +1,203 @@
+import numpy as np
+import pandas as pd
+
+from storage import read_stage, write_stage
+
+ROSTER_STAGES = ["roster_2021_2024", "roster_2025"]
+ROSTER_COLS = ['season', 'team', 'position', 'full_name', 'first_name', 'last_name',
+               'birth_date', 'gsis_id', 'sleeper_id']
+
+PLAYERS_STAGE = "player_crosswalk"
+TEAMS_STAGE = "player_crosswalk_teams"
+
+_SUFFIX = r"\b(?:jr|sr|ii|iii|iv|v)\b"
+
+
+def normalize_name(names) -> pd.Series:
+    """Comparable name keys: 'D.J. Moore Jr.' and 'DJ Moore' both become 'dj moore'."""
+    names = pd.Series(names, dtype=object).str.lower()
+    names = names.str.replace(r"[.'’`]", "", regex=True).str.replace(_SUFFIX, " ", regex=True)
+    names = names.str.replace(r"[^a-z]+", " ", regex=True).str.strip()
+    return names.where(names.str.len() > 0)
+
+
+def sleeper_ids(values) -> pd.Series:
+    """Sleeper ids as strings ('167'), whether they arrive as floats, ints or text."""
+    values = pd.Series(values, copy=False)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype("Int64").astype(str).where(values.notna()).astype(object)
+    values = values.astype(object).where(values.notna()).str.strip()
+    return values.where(values.str.len() > 0)
+
+
+def _dates(values) -> pd.Series:
+    return pd.to_datetime(pd.Series(values, copy=False), errors='coerce').dt.strftime('%Y-%m-%d').astype(object)
+
+
+def _unique_keys(frame: pd.DataFrame, on) -> pd.DataFrame:
+    """Rows whose key appears once (ambiguous keys resolve to nothing rather than a guess)."""
+    frame = frame.dropna(subset=on)
+    return frame[~frame.duplicated(on, keep=False)]
+
+
+def _probe(table: pd.DataFrame, on, probe: dict) -> np.ndarray:
+    """Positions in `table` of each probe row by its key columns, -1 where absent."""
+    index = pd.MultiIndex.from_frame(table[on].astype(object))
+    keys = pd.MultiIndex.from_arrays([pd.Series(probe[c], copy=False).astype(object) for c in on])
+    return index.get_indexer(keys)
+
+
+def build_crosswalk(rosters: pd.DataFrame, sleeper_players: pd.DataFrame = None) -> tuple:
+    """(players, team_seasons) tables from roster rows and optionally the Sleeper players dump.
+
+    players has one row per gsis_id with its sleeper_id, latest name, name
+    key and birth date; team_seasons has one row per (gsis_id, season, team).
+    Rosters carry a sleeper_id for most players; the rest are linked from the
+    dump, first by its own gsis_id field and then by a unique (name, birth
+    date) match.
+    """
+    roster = rosters.dropna(subset=['gsis_id']).copy()
+    roster['gsis_id'] = roster['gsis_id'].astype(str).str.strip()
+    roster['sleeper_id'] = sleeper_ids(roster['sleeper_id'])
+    roster['birth_date'] = _dates(roster['birth_date'])
+    roster['name'] = roster['first_name'] + " " + roster['last_name']
+    roster['name_key'] = normalize_name(roster['full_name'].fillna(roster['name']))
+    roster = roster.sort_values('season', kind='stable')
+
+    players = roster.drop_duplicates('gsis_id', keep='last').set_index('gsis_id')
+    players = players[['sleeper_id', 'name', 'full_name', 'name_key', 'birth_date', 'position']].copy()
+    # Latest sleeper id any roster row gave the player, not just the latest row's
+    linked = roster.dropna(subset=['sleeper_id']).drop_duplicates('gsis_id', keep='last')
+    players['sleeper_id'] = linked.set_index('gsis_id')['sleeper_id'].reindex(players.index)
+    players['birth_date'] = players['birth_date'].fillna(
+        roster.dropna(subset=['birth_date']).drop_duplicates('gsis_id', keep='last')
+        .set_index('gsis_id')['birth_date'])
+    players = players.reset_index()
+
+    if sleeper_players is not None:
+        dump = pd.DataFrame({
+            'sleeper_id': sleeper_ids(sleeper_players['sleeper_id']),
+            'gsis_id': sleeper_players['gsis_id'].astype(object).where(sleeper_players['gsis_id'].notna()).str.strip(),
+            'name_key': normalize_name(sleeper_players['full_name']),
+            'birth_date': _dates(sleeper_players['birth_date']),
+        })
+        dump = dump[~dump['sleeper_id'].isin(players['sleeper_id'].dropna())]
+
+        by_gsis = _unique_keys(dump, ['gsis_id'])
+        pos = pd.Index(by_gsis['gsis_id']).get_indexer(players['gsis_id'])
+        fill = players['sleeper_id'].isna().to_numpy() & (pos >= 0)
+        players.loc[fill, 'sleeper_id'] = by_gsis['sleeper_id'].to_numpy()[pos[fill]]
+
+        dump = dump[~dump['sleeper_id'].isin(players['sleeper_id'].dropna())]
+        on = ['name_key', 'birth_date']
+        candidates = _unique_keys(dump, on)
+        pos = _probe(candidates, on, players)
+        unique_here = ~players.duplicated(on, keep=False).to_numpy()
+        fill = players['sleeper_id'].isna().to_numpy() & (pos >= 0) & unique_here
+        players.loc[fill, 'sleeper_id'] = candidates['sleeper_id'].to_numpy()[pos[fill]]
+
+    # A sleeper id names one player; if rosters disagree, the most recent player keeps it
+    shared = players['sleeper_id'].notna() & players.iloc[::-1].duplicated('sleeper_id').iloc[::-1]
+    players.loc[shared, 'sleeper_id'] = np.nan
+
+    team_seasons = roster[['gsis_id', 'season', 'team', 'name_key']].drop_duplicates(['gsis_id', 'season', 'team'])
+    return players, team_seasons.reset_index(drop=True)
+
+
+class Crosswalk:
+    """Player identity crosswalk: sleeper_id <-> gsis_id <-> name, birth date and team-season.
+
+    Every lookup is a hash probe (pd.Index / MultiIndex get_indexer) built
+    once, so resolving a whole column of ids costs one vectorized call.
+    """
+
+    def __init__(self, players: pd.DataFrame, team_seasons: pd.DataFrame):
+        self.players = players.reset_index(drop=True)
+        self.team_seasons = team_seasons.reset_index(drop=True)
+        self._gsis = pd.Index(self.players['gsis_id'].astype(object))
+        self._gsis_values = self.players['gsis_id'].to_numpy(dtype=object)
+
+        linked = self.players.dropna(subset=['sleeper_id'])
+        self._sleeper = pd.Index(linked['sleeper_id'].astype(object))
+        self._sleeper_rows = linked.index.to_numpy()
+        self._name_birth = _unique_keys(self.players, ['name_key', 'birth_date'])
+        self._name_team = _unique_keys(self.team_seasons, ['name_key', 'team', 'season'])
+
+    @classmethod
+    def build(cls, sleeper_players: pd.DataFrame = None, stages=ROSTER_STAGES) -> "Crosswalk":
+        """Crosswalk over every roster stage; read_stage rebuilds a stage's Parquet from its CSV if needed."""
+        rosters, missing = [], []
+        for name in stages:
+            try:
+                rosters.append(read_stage(name, columns=ROSTER_COLS).astype({'team': object}))
+            except FileNotFoundError:
+                missing.append(name)
+        # A crosswalk from only some seasons' rosters silently drops most older ids, so refuse to build one
+        if missing:
+            raise FileNotFoundError(f"No Parquet or CSV copy of roster stage(s) {missing}; "
+                                    f"run the fetch step for them before building the crosswalk")
+        rosters = pd.concat(rosters, ignore_index=True)
+        return cls(*build_crosswalk(rosters, sleeper_players))
+
+    @classmethod
+    def load(cls) -> "Crosswalk":
+        return cls(read_stage(PLAYERS_STAGE), read_stage(TEAMS_STAGE))
+
+    def save(self) -> "Crosswalk":
+        write_stage(self.players, PLAYERS_STAGE)
+        write_stage(self.team_seasons, TEAMS_STAGE)
+        return self
+
+    def __len__(self):
+        return len(self.players)
+
+    def _rows_for_sleeper(self, ids) -> np.ndarray:
+        pos = self._sleeper.get_indexer(sleeper_ids(ids))
+        return np.where(pos >= 0, self._sleeper_rows[np.maximum(pos, 0)], -1) if len(self._sleeper) else pos
+
+    def _take(self, rows: np.ndarray, col: str) -> np.ndarray:
+        values = np.append(self.players[col].to_numpy(dtype=object), np.nan)
+        return values[np.where(rows >= 0, rows, len(self.players))]
+
+    def to_gsis(self, sleeper_id):
+        """gsis_id for one sleeper id (None if unknown)."""
+        row = self._rows_for_sleeper([sleeper_id])[0]
+        return self._gsis_values[row] if row >= 0 else None
+
+    def to_sleeper(self, gsis_ids) -> np.ndarray:
+        """sleeper_id for each gsis id (NaN where the player has none)."""
+        return self._take(self._gsis.get_indexer(pd.Series(gsis_ids, dtype=object)), 'sleeper_id')
+
+    def names(self, gsis_ids) -> np.ndarray:
+        """'First Last' for each gsis id, as the rosters spell it."""
+        return self._take(self._gsis.get_indexer(pd.Series(gsis_ids, dtype=object)), 'name')
+
+    def resolve(self, sleeper_id=None, name=None, birth_date=None, team=None, season=None) -> np.ndarray:
+        """gsis_id for each row, NaN where nothing matches unambiguously.
+
+        Tries the sleeper id first, then (name, birth date), then (name,
+        team, season); each step only fills rows the earlier ones left
+        unresolved. Pass whichever columns the caller has.
+        """
+        given = [v for v in (sleeper_id, name, birth_date, team, season) if v is not None]
+        n = len(given[0]) if given else 0
+        rows = np.full(n, -1, dtype=np.int64)
+        if sleeper_id is not None:
+            rows = self._rows_for_sleeper(sleeper_id)
+        gsis = self._take(rows, 'gsis_id')
+
+        key = normalize_name(name).to_numpy() if name is not None else None
+        if key is not None and birth_date is not None:
+            open_rows = pd.isna(gsis)
+            pos = _probe(self._name_birth, ['name_key', 'birth_date'],
+                         {'name_key': key, 'birth_date': _dates(birth_date).to_numpy()})
+            fill = open_rows & (pos >= 0)
+            gsis[fill] = self._name_birth['gsis_id'].to_numpy(dtype=object)[pos[fill]]
+        if key is not None and team is not None and season is not None:
+            open_rows = pd.isna(gsis)
+            pos = _probe(self._name_team, ['name_key', 'team', 'season'],
+                         {'name_key': key, 'team': np.asarray(team, dtype=object),
+                          'season': np.asarray(season, dtype=np.int64)})
+            fill = open_rows & (pos >= 0)
+            gsis[fill] = self._name_team['gsis_id'].to_numpy(dtype=object)[pos[fill]]
+        return gsis
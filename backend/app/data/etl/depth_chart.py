@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+from incremental import changed_partitions, in_partitions, save_manifest
+from storage import read_stage, stage_path, write_stage
+
+RANK_KEYS = ['team', 'position', 'season', 'week']
+RANKED_POSITIONS = ['QB', 'RB', 'WR', 'TE']
+STARTER_RANK = 2
+TEAM_WEEK = ['season', 'week', 'team']
+
+
+def position_rank(df: pd.DataFrame, snaps: str = 'off_snp', keys=RANK_KEYS) -> np.ndarray:
+    """groupby(keys)[snaps].rank(method='first', ascending=False), as one lexsort.
+
+    Rows with a missing key or snap count get NaN; ties go to the earlier row.
+    """
+    codes = [pd.factorize(df[key])[0] for key in keys]
+    values = pd.to_numeric(df[snaps], errors='coerce').to_numpy(dtype=np.float64)
+    valid = ~np.isnan(values)
+    for c in codes:
+        valid &= c >= 0
+
+    rows = np.flatnonzero(valid)
+    # np.lexsort sorts by the last key first: group codes, then snaps descending, then row order
+    order = rows[np.lexsort([rows, -values[rows]] + [c[rows] for c in codes[::-1]])]
+    new_group = np.zeros(len(order), dtype=bool)
+    new_group[:1] = True
+    for c in codes:
+        new_group[1:] |= c[order][1:] != c[order][:-1]
+    pos = np.arange(len(order))
+    within = pos - np.maximum.accumulate(np.where(new_group, pos, 0))
+
+    rank = np.full(len(df), np.nan)
+    rank[order] = within + 1
+    return rank
+
+
+def roles(position: pd.Series, rank: np.ndarray) -> np.ndarray:
+    """'WR1', 'RB2', ... for ranked skill positions, otherwise the position itself."""
+    role = position.to_numpy(dtype=object).copy()
+    position = pd.Categorical(position)
+    codes = position.codes
+    categories = position.categories.to_numpy(dtype=object)
+
+    labeled = (codes >= 0) & ~np.isnan(rank)
+    labeled[labeled] = np.isin(categories, RANKED_POSITIONS)[codes[labeled]]
+    role[labeled] = categories[codes[labeled]] + rank[labeled].astype(np.int64).astype(str).astype(object)
+    return role
+
+
+def build_depth_chart(weekly_stats: pd.DataFrame) -> pd.DataFrame:
+    """Depth chart rows (rank by snaps within team/position/week, role, starter_flag)."""
+    rank = position_rank(weekly_stats)
+    depth_chart = weekly_stats[['sleeper_id', 'full_name', 'team', 'position',
+                                'season', 'week', 'off_snp']].copy()
+    depth_chart['role'] = roles(weekly_stats['position'], rank)
+    depth_chart['starter_flag'] = (rank <= STARTER_RANK).astype(np.int64)
+    return depth_chart.rename(columns={'sleeper_id': 'player_id'})
+
+
+def refresh_depth_chart(weekly_stats: pd.DataFrame, name: str = 'depth_chart',
+                        incremental: bool = False, crosswalk=None) -> pd.DataFrame:
+    """Build (or, incrementally, patch) the depth chart stage.
+
+    Ranks only depend on the rows of one team-week, so in incremental mode
+    only team-weeks whose rows changed since the last run are re-ranked;
+    the rest are taken from the saved stage. Rows without a team have no
+    rank and are always rebuilt.
+
+    With a crosswalk, every row also gets the player's gsis_id (re-resolved
+    on each run, so newly linked players fill in on kept rows too).
+    """
+    changed, hashes = changed_partitions(weekly_stats, f"{name}.weekly_stats", keys=TEAM_WEEK)
+
+    if incremental and stage_path(name).exists():
+        no_team = weekly_stats['team'].isna().to_numpy()
+        rebuild = no_team | in_partitions(weekly_stats.fillna({'team': ''}), changed, TEAM_WEEK).to_numpy()
+        previous = read_stage(name)
+        current = pd.MultiIndex.from_frame(weekly_stats.loc[~rebuild, TEAM_WEEK].astype(str)).unique()
+        keep = pd.MultiIndex.from_frame(previous[TEAM_WEEK].astype(str)).isin(current)
+        depth_chart = pd.concat([previous[keep], build_depth_chart(weekly_stats[rebuild])], ignore_index=True)
+        depth_chart = depth_chart.sort_values(['season', 'week'], kind='stable').reset_index(drop=True)
+        print(f"Re-ranked {len(changed)} changed team-weeks ({rebuild.sum():,} rows)")
+    else:
+        depth_chart = build_depth_chart(weekly_stats)
+
+    if crosswalk is not None:
+        depth_chart['gsis_id'] = crosswalk.resolve(
+            sleeper_id=depth_chart['player_id'], name=depth_chart['full_name'],
+            team=depth_chart['team'], season=depth_chart['season'])
+
+    write_stage(depth_chart, name)
+    save_manifest(f"{name}.weekly_stats", hashes)
+    return depth_chart
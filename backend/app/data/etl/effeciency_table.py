@@ -2,11 +2,13 @@ import pandas as pd
 from sqlalchemy import create_engine
 from dotenv import load_dotenv
 import os
+from storage import read_stage
+from bulk_load import load_frame
 load_dotenv()
 DB_URI = os.getenv("DATABASE_URL")
 engine = create_engine(DB_URI)
 # === Step 1: Load the final player-week table with rolling averages ===
-player_week = pd.read_csv("../play_by_play/player_week_modeling_features.csv")
+player_week = read_stage("player_week_modeling_features")
 
 # === Step 2: Player efficiency ratios (avoid divide by zero) ===
 #player_week['pass_td_per_attempt'] = player_week['pass_touchdown_rolling3'] / player_week['pass_attempt'].replace(0, 1)
@@ -22,4 +24,4 @@ player_week = pd.read_csv("../play_by_play/player_week_modeling_features.csv")
 #player_week.to_csv("../play_by_play/player_week_modeling_features.csv", index=False)
 #print("✅ Player-week table with efficiency ratios and next-week target saved")
 #print(player_week.head(10))
-player_week.to_sql("final_dataset_all_stats", engine, if_exists="replace", index=False)
+load_frame(player_week, "final_dataset_all_stats", engine)
@@ -1,9 +1,23 @@
-import requests
+import argparse
+import json
 import pandas as pd
-import time
 from sqlalchemy import create_engine
 from dotenv import load_dotenv
 import os
+from bulk_load import load_frame
+from http_cache import HttpCache, season_complete
+from sleeper_client import SleeperClient, failure_report, weekly_stats_paths
+from depth_chart import refresh_depth_chart
+from crosswalk import Crosswalk
+from sleeper_stats import lookup_players, parse_weekly_stats, player_lookup
+
+parser = argparse.ArgumentParser(description="Build the weekly depth chart table from Sleeper stats")
+parser.add_argument("--concurrency", type=int, default=8, help="max requests in flight")
+parser.add_argument("--allow-partial", action="store_true",
+                    help="load the weeks that were fetched even if some failed")
+parser.add_argument("--incremental", action="store_true",
+                    help="only re-rank team-weeks whose snap counts changed since the last run")
+args = parser.parse_args()
 
 
 load_dotenv()
@@ -11,85 +25,57 @@ DB_URI = os.getenv("DATABASE_URL")
 engine = create_engine(DB_URI)
 
 
-players_url = "https://api.sleeper.app/v1/players/nfl"
-res = requests.get(players_url)
-res.raise_for_status()
-players_data = res.json()
-players_df = pd.DataFrame.from_dict(players_data, orient='index').reset_index()
-players_df.rename(columns={'index': 'master_player_id'}, inplace=True)
-players_df = players_df[['master_player_id', 'full_name', 'team', 'position']]
+# Responses and their parsed frames are cached on disk; completed seasons are never re-requested
+client = SleeperClient(concurrency=args.concurrency, cache=HttpCache())
 
 
-def fetch_weekly_stats(year: int, week: int):
-    url = f"https://api.sleeper.app/v1/stats/nfl/regular/{year}/{week}"
-    res = requests.get(url)
-    res.raise_for_status()
-    data = res.json()
+def players_frame(body, _):
+    players_data = json.loads(body)
+    players_df = pd.DataFrame.from_dict(players_data, orient='index').reset_index()
+    players_df.rename(columns={'index': 'master_player_id'}, inplace=True)
+    return players_df.reindex(columns=['master_player_id', 'full_name', 'team', 'position',
+                                       'gsis_id', 'birth_date'])
 
-    df = pd.DataFrame(data).T 
-    df.reset_index(inplace=True)
-    df.rename(columns={'index': 'sleeper_id'}, inplace=True)
 
+players_df = client.get("players/nfl", parser=players_frame, name="players_frame_ids")
 
-    df = df.drop(columns=[col for col in ['player_id', 'master_player_id'] if col in df.columns])
+# Link Sleeper ids to gsis ids (rosters first, then the players dump) and persist the crosswalk
+crosswalk = Crosswalk.build(players_df.rename(columns={'master_player_id': 'sleeper_id'})).save()
 
-    df['season'] = year
-    df['week'] = week
-    return df
-
-all_weeks = []
 
+# Fetch every week concurrently, rate limited to Sleeper's 1000 calls/min
+print("Fetching 2021-2024 weekly stats")
+weekly_frames, failures = client.fetch_all(
+    weekly_stats_paths(range(2021, 2025)),
+    parser=lambda body, partition: parse_weekly_stats(body, season=partition[0], week=partition[1]),
+    name="weekly_stats_columns",
+    immutable=lambda partition: season_complete(partition[0]),
+)
+if failures:
+    print(failure_report(failures))
+    if not args.allow_partial:
+        raise SystemExit(1)
 
-for year in range(2021, 2025):
-    for week in range(1, 19):
-        try:
-            print(f"Fetching {year} Week {week}")
-            week_df = fetch_weekly_stats(year, week)
+# Attach name/team/position through an index on the players dump instead of a merge per week
+players = player_lookup(players_df)
+all_weeks = []
 
-           
-            week_df = week_df.merge(
-                players_df,
-                left_on='sleeper_id',
-                right_on='master_player_id',
-                how='left'
-            )
+for (year, week), week_df in sorted(weekly_frames.items()):
+    week_df = pd.concat([week_df, lookup_players(week_df['sleeper_id'], players)], axis=1)
 
-            all_weeks.append(week_df)
-            time.sleep(0.1)  # stay under 1000 calls/min
-        except Exception as e:
-            print(f"Failed {year} Week {week}: {e}")
+    all_weeks.append(week_df)
 
 # Combine all weeks
 weekly_stats_df = pd.concat(all_weeks, ignore_index=True)
 weekly_stats_df = weekly_stats_df.copy()
 
 
-weekly_stats_df['rank'] = weekly_stats_df.groupby(
-    ['team', 'position', 'season', 'week']
-)['off_snp'].rank(method='first', ascending=False)
-
-
-def assign_role(row):
-    pos = row['position']
-    rank = row['rank']
-    if pd.isna(rank):
-        return pos
-    rank = int(rank)
-    if pos in ['WR', 'RB', 'TE', 'QB']:
-        return f"{pos}{rank}"
-    return pos
-
-weekly_stats_df['role'] = weekly_stats_df.apply(assign_role, axis=1)
-weekly_stats_df['starter_flag'] = weekly_stats_df['rank'].apply(lambda x: 1 if pd.notna(x) and x <= 2 else 0)
-
-
-depth_chart_df = weekly_stats_df[['sleeper_id', 'full_name', 'team', 'position',
-                                  'season', 'week', 'off_snp', 'role', 'starter_flag']].copy()
-
-depth_chart_df.rename(columns={'sleeper_id': 'player_id'}, inplace=True)
+# Rank by snaps, label roles and starters (only changed team-weeks with --incremental),
+# keyed by gsis_id as well so snaps and starter flags join onto the play-by-play features
+depth_chart_df = refresh_depth_chart(weekly_stats_df, incremental=args.incremental, crosswalk=crosswalk)
 
 
 # push to neon
-depth_chart_df.to_sql('depth_chart', engine, if_exists='replace', index=False)
+load_frame(depth_chart_df, 'depth_chart', engine)
 
 print("Depth chart ETL complete!")
@@ -1,19 +1,31 @@
-#import requests
+import io
 import pandas as pd
 from sqlalchemy import create_engine
 from dotenv import load_dotenv
 import os
+from bulk_load import load_frame
+from http_cache import HttpCache, season_complete
 
 load_dotenv()
 DB_URI = os.getenv("DATABASE_URL")
 engine = create_engine(DB_URI)
+
+
+def fantasy_table(body):
+    tables = pd.read_html(io.StringIO(body.decode("utf-8")), header=1)
+    return tables[0]
+
+
+# Pages (and their parsed tables) are cached on disk; completed seasons are never re-scraped
+cache = HttpCache()
+
 #store all datasets in heere per year
 dfs = []
 
 for i in range(2021, 2025):
     url = f"https://www.pro-football-reference.com/years/{i}/fantasy.htm"
-    tables = pd.read_html(url, header=1)
-    usage_df = tables[0]
+    usage_df = cache.fetch(url, parser=fantasy_table, name="fantasy_table",
+                           immutable=season_complete(i), timeout=60)
     
     usage_df.columns = usage_df.columns.get_level_values(0)
     
@@ -28,4 +40,4 @@ for i in range(2021, 2025):
 #merge them all into one dataset
 usage_all = pd.concat(dfs, ignore_index=True)
 
-usage_all.to_sql("player_usage", engine, if_exists = "replace", index = False)
+load_frame(usage_all, "player_usage", engine)
@@ -1,12 +1,11 @@
 import pandas as pd
+from storage import read_stage, write_stage, fill_na
+from context_tensor import ContextTensor, attach
 
 # Load player-week table
-player_week = pd.read_csv("../play_by_play/aggregated_player_week_redzone.csv")
+player_week = read_stage("aggregated_player_week_redzone")
 
-# Load matchup / games context table
-games_context = pd.read_csv("../play_by_play/matchup_tendencies_2021_2024_clean.csv")
-
-# Select the features we want from games_context
+# Select the features we want from the matchup / games context table
 context_cols = [
     'season','week','posteam','defteam',
     # Team offensive tendencies
@@ -16,19 +15,15 @@ context_cols = [
     'total_pass_plays','blitz_rate_def','pressure_rate_def','man_coverage_pct_def','zone_coverage_pct_def'
 ]
 
-games_context = games_context[context_cols]
+games_context = read_stage("matchup_tendencies_2021_2024_clean", columns=context_cols)
 
-# Merge by season, week, and posteam (player's team)
-player_week = player_week.merge(
-    games_context,
-    on=['season','week','posteam'],
-    how='left'
-)
+# Attach by season, week, and posteam (player's team) with a dense team-week gather
+player_week = attach(player_week, ContextTensor(games_context, 'posteam'), 'posteam')
 
 # Fill missing values if needed
-player_week.fillna(0, inplace=True)
+player_week = fill_na(player_week)
 
 # Save the merged table
-player_week.to_csv("../play_by_play/player_week_with_context.csv", index=False)
+write_stage(player_week, "player_week_with_context")
 print("✅ Player-week table merged with team/opponent context")
 print(player_week.head())
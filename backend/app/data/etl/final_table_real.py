@@ -2,6 +2,10 @@ import pandas as pd
 from sqlalchemy import create_engine
 from dotenv import load_dotenv
 import os
+from scoring import score, DEFAULT_CONFIG
+from storage import read_stage, write_stage
+from rolling import add_rolling
+import instrument
 
 # === Load environment and database ===
 load_dotenv()
@@ -9,7 +13,7 @@ DB_URI = os.getenv("DATABASE_URL")
 engine = create_engine(DB_URI)
 
 # === Step 1: Load the player-week table ===
-player_week = pd.read_csv("../play_by_play/final_table_modeling.csv")
+player_week = read_stage("final_table_modeling")
 
 # === Step 2: Load play-by-play table ===
 pbp = pd.read_sql_table("pbp_full_context", engine)
@@ -52,15 +56,8 @@ player_week = player_week.merge(
 player_week["receiving_touchdown"] = player_week["receiving_touchdown"].fillna(0)
 
 # === Step 5: Recalculate fantasy points for everyone ===
-player_week["fantasy_points"] = (
-    (player_week["passing_yards"] * 0.04) +
-    (player_week["pass_touchdown"] * 4) -
-    (player_week["interception"] * 2) +
-    ((player_week["rushing_yards"] + player_week["receiving_yards"]) * 0.1) +
-    ((player_week["rush_touchdown"] + player_week["receiving_touchdown"]) * 6) +
-    (player_week["reception"] * 1) -
-    (player_week["fumble_lost"] * 2)
-)
+score(player_week)
+player_week["fantasy_points"] = player_week[f"fantasy_points_{DEFAULT_CONFIG}"]
 
 # === Step 6: Recalculate rolling 3-game averages ===
 player_week = player_week.sort_values(["player_id", "season", "week"])
@@ -70,14 +67,10 @@ rolling_cols = [
     "rushing_yards", "receiving_yards", "passing_yards", "fantasy_points"
 ]
 
-for col in rolling_cols:
-    player_week[f"{col}_rolling3"] = (
-        player_week.groupby("player_id")[col]
-        .rolling(3, min_periods=1)
-        .mean()
-        .reset_index(level=0, drop=True)
-    )
+with instrument.stage("rolling", rows_in=len(player_week)) as metrics:
+    player_week = add_rolling(player_week, rolling_cols, windows=(3,))
+    metrics.rows_out = len(player_week)
 
 # === Step 7: Save updated table ===
-player_week.to_csv("../play_by_play/player_week_fixed_fantasy.csv", index=False)
+write_stage(player_week, "player_week_fixed_fantasy")
 print("✅ Updated player-week table with correct passing/receiving stats and rolling averages!")
@@ -1,12 +1,14 @@
 import pandas as pd
+from storage import read_stage, write_stage, fill_na
+from context_tensor import ContextTensor, attach
+from rolling import add_rolling
+import instrument
 
 # === Step 1: Load tables ===
-player_week = pd.read_csv("../play_by_play/aggregated_player_week_redzone.csv")
-games_context = pd.read_csv("../play_by_play/matchup_tendencies_2021_2024_clean.csv")
+player_week = read_stage("aggregated_player_week_redzone")
 
 # === Step 2: Clean column names ===
 player_week.columns = player_week.columns.str.strip()
-games_context.columns = games_context.columns.str.strip()
 
 # === Step 3: Merge matchup/game context for each player's team only ===
 context_cols = [
@@ -17,16 +19,12 @@ context_cols = [
     'spread_line','total_line','over_odds','under_odds','home_moneyline','away_moneyline'
 ]
 
-games_context = games_context[context_cols]
+games_context = read_stage("matchup_tendencies_2021_2024_clean", columns=context_cols)
 
-player_week = player_week.merge(
-    games_context,
-    on=['season','week','posteam'],
-    how='left'
-)
+player_week = attach(player_week, ContextTensor(games_context, 'posteam'), 'posteam')
 
 # Fill any missing values
-player_week.fillna(0, inplace=True)
+player_week = fill_na(player_week)
 
 # === Step 4: Sort for rolling calculations ===
 player_week = player_week.sort_values(['player_id','season','week'])
@@ -37,17 +35,12 @@ rolling_cols = [
     'rushing_yards','receiving_yards','passing_yards','fantasy_points'
 ]
 
-# === Step 5: Calculate rolling averages per player (previous 3 weeks) ===
-for col in rolling_cols:
-    player_week[f'{col}_rolling3'] = (
-        player_week
-        .groupby(['player_id','season'])[col]
-        .rolling(window=3, min_periods=1)
-        .mean()
-        .reset_index(level=[0,1], drop=True)
-    )
+# === Step 5: Calculate rolling averages per player (last 3 games, reset each season) ===
+with instrument.stage("rolling", rows_in=len(player_week)) as metrics:
+    player_week = add_rolling(player_week, rolling_cols, windows=(3,), reset_per_season=True)
+    metrics.rows_out = len(player_week)
 
 # === Step 6: Save final table ===
-player_week.to_csv("../play_by_play/player_week_with_context_rolling.csv", index=False)
+write_stage(player_week, "player_week_with_context_rolling")
 print("✅ Saved player-week table with context and rolling averages")
 print(player_week.head())
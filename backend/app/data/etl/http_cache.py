@@ -0,0 +1,121 @@
+import datetime as dt
+import hashlib
+import json
+import os
+import pickle
+import time
+
+import requests
+
+from storage import CACHE_DIR
+
+HTTP_CACHE_DIR = CACHE_DIR / "http"
+
+
+def season_complete(season: int, today: dt.date | None = None) -> bool:
+    """True once an NFL season is over (from March of the following year).
+
+    Responses for completed seasons are pinned as immutable and never
+    re-requested.
+    """
+    today = today or dt.date.today()
+    return today >= dt.date(season + 1, 3, 1)
+
+
+def _atomic_write(path, data: bytes) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class HttpCache:
+    """On-disk response cache with conditional revalidation and parsed-result caching.
+
+    Each URL gets three kinds of file, named by the URL's sha256:
+
+        <key>.json         validators (ETag, Last-Modified), content hash, immutable flag
+        <key>.body         the raw response bytes
+        <key>.<name>.pkl   a parsed result (e.g. a DataFrame), tagged with the content
+                           hash it was parsed from
+
+    Pinned (immutable) entries are served without any request. Others are
+    revalidated with If-None-Match / If-Modified-Since; a 304, or a 200
+    whose body hashes the same, keeps the cached body and parsed results.
+    """
+
+    def __init__(self, root=HTTP_CACHE_DIR):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, url: str, suffix: str):
+        return self.root / f"{hashlib.sha256(url.encode()).hexdigest()}.{suffix}"
+
+    def entry(self, url: str) -> dict | None:
+        path = self._path(url, "json")
+        if not path.exists() or not self._path(url, "body").exists():
+            return None
+        return json.loads(path.read_text())
+
+    def pinned(self, url: str, immutable: bool = False) -> bool:
+        """True if the cached copy can be used without asking the server."""
+        entry = self.entry(url)
+        return entry is not None and (entry["immutable"] or immutable)
+
+    def validators(self, url: str) -> dict:
+        """Conditional request headers for the cached copy, if any."""
+        entry = self.entry(url) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url: str, response, immutable: bool = False) -> dict:
+        """Record a 200 (new body) or 304 (cached body still valid) response."""
+        entry = self.entry(url)
+        if response.status_code == 304:
+            if entry is None:
+                raise ValueError(f"304 for {url} with nothing cached")
+        else:
+            body = response.content
+            content_hash = hashlib.sha256(body).hexdigest()
+            if entry is None or entry["content_hash"] != content_hash:
+                _atomic_write(self._path(url, "body"), body)
+            entry = {"url": url, "content_hash": content_hash}
+        entry.update(
+            etag=response.headers.get("ETag", entry.get("etag")),
+            last_modified=response.headers.get("Last-Modified", entry.get("last_modified")),
+            immutable=bool(immutable or entry.get("immutable")),
+            checked_at=time.time(),
+        )
+        _atomic_write(self._path(url, "json"), json.dumps(entry, indent=1).encode())
+        return entry
+
+    def body(self, url: str) -> bytes:
+        return self._path(url, "body").read_bytes()
+
+    def parsed(self, url: str, parser, name: str):
+        """parser(body) for the cached body, reusing the pickled result while the content is unchanged."""
+        content_hash = self.entry(url)["content_hash"]
+        path = self._path(url, f"{name}.pkl")
+        if path.exists():
+            with open(path, "rb") as f:
+                cached_hash, result = pickle.load(f)
+            if cached_hash == content_hash:
+                return result
+        result = parser(self.body(url))
+        _atomic_write(path, pickle.dumps((content_hash, result), protocol=pickle.HIGHEST_PROTOCOL))
+        return result
+
+    def fetch(self, url: str, parser=None, name: str = "parsed", immutable: bool = False,
+              session=None, **kwargs):
+        """GET `url` through the cache; return the body, or parser(body) when a parser is given."""
+        if not self.pinned(url, immutable):
+            response = (session or requests).get(url, headers=self.validators(url), **kwargs)
+            if response.status_code != 304:
+                response.raise_for_status()
+            self.store(url, response, immutable)
+        if parser is None:
+            return self.body(url)
+        return self.parsed(url, parser, name)
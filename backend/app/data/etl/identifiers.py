@@ -0,0 +1,141 @@
+import contextlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from storage import CACHE_DIR
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; registries are then single-writer
+    fcntl = None
+
+IDENTIFIER_DIR = CACHE_DIR / "identifiers"
+
+# Identifier kind -> the columns that hold identifiers of that kind
+ID_COLUMNS = {
+    "player": ["player_id", "passer_player_id", "rusher_player_id", "receiver_player_id", "gsis_id"],
+    "team": ["posteam", "defteam", "home_team", "away_team", "team"],
+    "game": ["game_id"],
+}
+
+MISSING = -1
+
+
+def kind_of(col: str) -> str | None:
+    for kind, columns in ID_COLUMNS.items():
+        if col in columns:
+            return kind
+    return None
+
+
+@contextlib.contextmanager
+def _locked(path):
+    """Exclusive lock on `path`.lock, so concurrent stages append codes one at a time."""
+    IDENTIFIER_DIR.mkdir(parents=True, exist_ok=True)
+    with open(path.with_suffix(".lock"), "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class IdRegistry:
+    """Append-only label <-> int32 code dictionary for one identifier kind.
+
+    Codes are assigned in first-seen order and never change once saved, so
+    codes written by one stage mean the same thing in every later stage.
+    New labels are appended under a file lock after re-reading the saved
+    dictionary, so parallel stages cannot hand out the same code twice.
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.path = IDENTIFIER_DIR / f"{kind}.json"
+        self.labels = []
+        self._codes = {}
+        self._rank = None
+        self._reload()
+
+    def __len__(self):
+        return len(self.labels)
+
+    def _reload(self):
+        if self.path.exists():
+            labels = json.loads(self.path.read_text())
+            if len(labels) > len(self.labels):
+                self._codes.update({label: i for i, label in enumerate(labels) if i >= len(self.labels)})
+                self.labels = labels
+                self._rank = None
+
+    def _append(self, new):
+        with _locked(self.path):
+            self._reload()
+            new = [label for label in dict.fromkeys(new) if label not in self._codes]
+            if not new:
+                return
+            self._codes.update({label: len(self.labels) + i for i, label in enumerate(new)})
+            self.labels = self.labels + new
+            self._rank = None
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.labels))
+            os.replace(tmp, self.path)
+
+    def encode(self, values) -> np.ndarray:
+        """int32 codes for `values` (MISSING for NaN), registering unseen labels."""
+        codes, uniques = pd.factorize(pd.Series(values, copy=False))
+        uniques = [str(u) for u in uniques]
+        unseen = [u for u in uniques if u not in self._codes]
+        if unseen:
+            self._append(unseen)
+        lookup = np.array([self._codes[u] for u in uniques], dtype=np.int32)
+        if not len(lookup):
+            return np.full(len(codes), MISSING, dtype=np.int32)
+        return np.where(codes >= 0, lookup[np.maximum(codes, 0)], MISSING).astype(np.int32)
+
+    def decode(self, codes, categorical: bool = False):
+        """Labels for `codes` (NaN for MISSING), as an object array or a Categorical."""
+        codes = np.asarray(codes)
+        if len(codes) and codes.max() >= len(self.labels):
+            self._reload()  # codes handed out by another process (e.g. a partition worker)
+        if categorical:
+            return pd.Categorical.from_codes(codes, categories=pd.Index(self.labels, dtype=object))
+        labels = np.array(self.labels + [np.nan], dtype=object)
+        return labels[np.where(codes >= 0, codes, len(self.labels))]
+
+    def sort_rank(self) -> np.ndarray:
+        """Position of each code's label in sorted label order (for ordering by label without decoding)."""
+        if self._rank is None or len(self._rank) != len(self.labels):
+            rank = np.empty(len(self.labels), dtype=np.int64)
+            rank[np.argsort(np.array(self.labels, dtype=object), kind="stable")] = np.arange(len(self.labels))
+            self._rank = rank
+        return self._rank
+
+
+_registries = {}
+
+
+def registry(kind: str) -> IdRegistry:
+    """The process-wide registry for `kind`, loaded on first use."""
+    if kind not in _registries:
+        _registries[kind] = IdRegistry(kind)
+    return _registries[kind]
+
+
+def encode_frame(df: pd.DataFrame, columns=None) -> pd.DataFrame:
+    """df with its identifier columns (or just `columns`) replaced by int32 codes."""
+    columns = [c for c in (columns or df.columns) if kind_of(c)]
+    return df.assign(**{col: registry(kind_of(col)).encode(df[col]) for col in columns})
+
+
+def decode_frame(df: pd.DataFrame, columns=None, categorical: bool = False) -> pd.DataFrame:
+    """df with coded identifier columns turned back into labels (for writing out)."""
+    columns = [c for c in (columns or df.columns)
+               if kind_of(c) and pd.api.types.is_integer_dtype(df[c])]
+    return df.assign(**{col: registry(kind_of(col)).decode(df[col].to_numpy(), categorical)
+                        for col in columns})
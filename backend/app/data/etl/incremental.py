@@ -0,0 +1,85 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from sqlalchemy import inspect
+
+from bulk_load import load_frame, upsert_frame
+from storage import CACHE_DIR, read_stage, stage_path, write_stage
+
+MANIFEST_DIR = CACHE_DIR / "manifests"
+
+PARTITION_KEYS = ["season", "week"]
+PLAYER_WEEK_KEY = ["player_id", "season", "week"]
+
+
+def partition_hashes(df: pd.DataFrame, keys=PARTITION_KEYS) -> dict:
+    """Content hash per partition (e.g. (season, week)), independent of row order."""
+    row_hash = pd.util.hash_pandas_object(df, index=False)
+    grouped = row_hash.groupby([df[k].to_numpy() for k in keys])
+    sums = grouped.sum()
+    counts = grouped.size()
+    hashes = {}
+    for part, total in sums.items():
+        part = part if isinstance(part, tuple) else (part,)
+        key = [v.item() if isinstance(v, np.generic) else v for v in part]
+        hashes[json.dumps(key)] = f"{counts[part]}:{int(total):016x}"
+    return hashes
+
+
+def load_manifest(name: str) -> dict:
+    path = MANIFEST_DIR / f"{name}.json"
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_manifest(name: str, hashes: dict) -> None:
+    MANIFEST_DIR.mkdir(parents=True, exist_ok=True)
+    (MANIFEST_DIR / f"{name}.json").write_text(json.dumps(hashes, indent=1, sort_keys=True))
+
+
+def changed_partitions(df: pd.DataFrame, name: str, keys=PARTITION_KEYS):
+    """Return ([(season, week), ...] that are new or changed since the last save, current hashes)."""
+    hashes = partition_hashes(df, keys)
+    previous = load_manifest(name)
+    changed = sorted(tuple(json.loads(part)) for part, h in hashes.items() if previous.get(part) != h)
+    return changed, hashes
+
+
+def in_partitions(df: pd.DataFrame, partitions, keys=PARTITION_KEYS) -> pd.Series:
+    """Boolean mask of the rows of `df` that fall in `partitions`."""
+    wanted = pd.MultiIndex.from_tuples(partitions, names=keys)
+    return pd.Series(pd.MultiIndex.from_frame(df[keys]).isin(wanted), index=df.index)
+
+
+def upsert_stage(df: pd.DataFrame, name: str, keys=PLAYER_WEEK_KEY, sort_by=None, export_csv: bool = False,
+                 partitions=(), engine=None, table: str = None) -> pd.DataFrame:
+    """Insert-or-replace the rows of `df` into a stage on `keys` and rewrite it.
+
+    `partitions` ((season, week) pairs, e.g. from changed_partitions) are
+    replaced whole, so a row that is no longer in a recomputed week is
+    dropped rather than kept from the last run. With an engine, the same
+    rows and partitions are upserted into the database `table` (see
+    bulk_load.upsert_frame); a table that does not exist yet is loaded with
+    the whole upserted stage.
+    """
+    if stage_path(name).exists():
+        existing = read_stage(name)
+        new_keys = pd.MultiIndex.from_frame(df[keys].astype(str))
+        stale = pd.MultiIndex.from_frame(existing[keys].astype(str)).isin(new_keys)
+        if len(partitions):
+            stale |= in_partitions(existing, partitions).to_numpy()
+        combined = pd.concat([existing[~stale], df], ignore_index=True)
+    else:
+        combined = df
+    combined = combined.sort_values(sort_by or keys, kind="stable").reset_index(drop=True)
+    write_stage(combined, name, export_csv=export_csv)
+    print(f"Upserted {len(df):,} rows into {name} ({len(combined):,} total)")
+    if engine is not None:
+        if inspect(engine).has_table(table):
+            upsert_frame(df, table, engine, keys, partitions=partitions)
+        else:
+            load_frame(combined, table, engine)
+    return combined
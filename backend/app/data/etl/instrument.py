@@ -0,0 +1,230 @@
+import argparse
+import contextlib
+import cProfile
+import json
+import os
+import resource
+import runpy
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Kept free of storage imports: storage and bulk_load report their reads and writes here
+METRICS_DIR = Path(os.getenv("ETL_CACHE_DIR", Path(__file__).resolve().parent.parent / "cache")) / "metrics"
+METRICS_FILE = Path(os.getenv("ETL_METRICS", METRICS_DIR / "stages.jsonl"))
+PROFILE_DIR = METRICS_DIR / "profiles"
+
+# Opt-in costs: tracemalloc slows allocation-heavy code down, cProfile slows everything down
+TRACE_MEMORY = os.getenv("ETL_TRACEMALLOC") == "1"
+PROFILE = os.getenv("ETL_PROFILE") == "1"
+
+_active = []
+
+
+def _rss_mb():
+    """Current resident set size in MB (Linux /proc; None elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return None
+
+
+def _max_rss_mb(who=resource.RUSAGE_SELF):
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+class StageMetrics:
+    """Counters for one running stage; storage and bulk_load add to every enclosing stage."""
+
+    def __init__(self, name, parent=None, tags=None):
+        self.name = name
+        self.parent = parent
+        self.tags = tags or {}
+        self.rows_in = self.rows_out = 0
+        self.bytes_in = self.bytes_out = 0
+        self.reads = []
+        self.writes = []
+        self.trace_peak = 0
+        self.profiled = False
+
+    def read(self, what, rows, nbytes):
+        self.rows_in += rows
+        self.bytes_in += nbytes
+        self.reads.append(what)
+
+    def wrote(self, what, rows, nbytes):
+        self.rows_out += rows
+        self.bytes_out += nbytes
+        self.writes.append(what)
+
+
+def record_read(what: str, rows: int, nbytes: int) -> None:
+    for metrics in _active:
+        metrics.read(what, rows, nbytes)
+
+
+def record_write(what: str, rows: int, nbytes: int) -> None:
+    for metrics in _active:
+        metrics.wrote(what, rows, nbytes)
+
+
+def _emit(record: dict) -> None:
+    METRICS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(METRICS_FILE, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+@contextlib.contextmanager
+def stage(name: str, profile: bool = None, trace_memory: bool = None, rows_in: int = None,
+          rows_out: int = None, **tags):
+    """Measure a block of ETL work and append one JSON line to METRICS_FILE.
+
+    Records wall and CPU seconds, RSS before/after, the process peak RSS
+    and how far the block raised it, the tracemalloc peak inside the block
+    (if tracing), and the rows and bytes that went through
+    read_stage/write_stage/load_chunks. Blocks that work on frames already
+    in memory pass rows_in (and rows_out, or set metrics.rows_out on the
+    yielded object) themselves. Stages nest; inner ones are recorded with
+    their parent's name. With profiling
+    on, the outermost profiled block writes a cProfile dump to
+    PROFILE_DIR/<name>.prof (view it with snakeviz or flameprof).
+    """
+    profile = PROFILE if profile is None else profile
+    trace_memory = TRACE_MEMORY if trace_memory is None else trace_memory
+    parent = _active[-1] if _active else None
+    metrics = StageMetrics(name, parent.name if parent else None, tags)
+    metrics.rows_in, metrics.rows_out = rows_in or 0, rows_out or 0
+
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if tracemalloc.is_tracing():
+        if parent is not None:  # fold the peak so far into the parent before measuring ours
+            parent.trace_peak = max(parent.trace_peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+
+    profiler = None
+    if profile and not any(m.profiled for m in _active):
+        profiler = cProfile.Profile()
+        metrics.profiled = True
+
+    started = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    rss_start = _rss_mb()
+    peak_start = _max_rss_mb()
+    wall, cpu = time.perf_counter(), time.process_time()
+    status = "ok"
+    _active.append(metrics)
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield metrics
+    except SystemExit as exc:
+        status = "ok" if exc.code in (None, 0) else f"exit {exc.code}"
+        raise
+    except BaseException as exc:
+        status = type(exc).__name__
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        _active.pop()
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+        trace_peak = None
+        if tracemalloc.is_tracing():
+            trace_peak = max(metrics.trace_peak, tracemalloc.get_traced_memory()[1])
+            if parent is not None:
+                parent.trace_peak = max(parent.trace_peak, trace_peak)
+        if started_tracing:
+            tracemalloc.stop()
+
+        profile_path = None
+        if profiler is not None:
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            profile_path = PROFILE_DIR / f"{name}.prof"
+            profiler.dump_stats(profile_path)
+
+        rss_end = _rss_mb()
+        # ru_maxrss is the high-water mark of the whole process, not of this block; the growth
+        # is what the block added to it (0 when an earlier step already peaked higher)
+        peak_end = _max_rss_mb()
+        record = {
+            "stage": name,
+            "parent": metrics.parent,
+            "status": status,
+            "started": started,
+            "wall_s": round(wall, 4),
+            "cpu_s": round(cpu, 4),
+            "rss_start_mb": rss_start and round(rss_start, 1),
+            "rss_end_mb": rss_end and round(rss_end, 1),
+            "process_peak_rss_mb": round(peak_end, 1),
+            "peak_rss_growth_mb": round(peak_end - peak_start, 1),
+            "children_peak_rss_mb": round(_max_rss_mb(resource.RUSAGE_CHILDREN), 1),
+            "tracemalloc_peak_mb": trace_peak and round(trace_peak / 2**20, 1),
+            "rows_in": metrics.rows_in,
+            "rows_out": metrics.rows_out,
+            "bytes_in": metrics.bytes_in,
+            "bytes_out": metrics.bytes_out,
+            "reads": metrics.reads,
+            "writes": metrics.writes,
+            "profile": profile_path and str(profile_path),
+            **metrics.tags,
+        }
+        _emit(record)
+        if parent is None:
+            print(f"⏱ {name}: {wall:.2f}s wall, {cpu:.2f}s cpu, process peak RSS {peak_end:.0f} MB "
+                  f"(+{peak_end - peak_start:.0f} MB), {metrics.rows_in:,} rows in, {metrics.rows_out:,} rows out")
+
+
+def load_metrics(path=METRICS_FILE) -> list:
+    if not Path(path).exists():
+        return []
+    return [json.loads(line) for line in Path(path).read_text().splitlines() if line.strip()]
+
+
+def report(records, threshold: float = 0.2) -> str:
+    """Latest run of each stage next to the run before it, flagging regressions over `threshold`."""
+    runs = {}
+    for record in records:
+        if record["status"] == "ok":
+            runs.setdefault(record["stage"], []).append(record)
+    width = max([len(s) for s in runs] + [5])
+    lines = [f"{'stage':<{width}}  {'wall_s':>8}  {'prev':>8}  {'cpu_s':>8}  {'proc_peak_mb':>12}  {'rows_out':>10}"]
+    for name, history in runs.items():
+        last = history[-1]
+        prev = history[-2]["wall_s"] if len(history) > 1 else None
+        flag = ""
+        if prev and last["wall_s"] > prev * (1 + threshold) and last["wall_s"] - prev > 0.05:
+            flag = f"  ⚠ {last['wall_s'] / prev - 1:+.0%} wall"
+        prev_s = f"{prev:>8.2f}" if prev is not None else f"{'-':>8}"
+        lines.append(f"{name:<{width}}  {last['wall_s']:>8.2f}  {prev_s}  "
+                     f"{last['cpu_s']:>8.2f}  {last.get('process_peak_rss_mb', last.get('peak_rss_mb')):>12.0f}  "
+                     f"{last['rows_out']:>10,}{flag}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run an ETL script under stage instrumentation, or report recorded metrics")
+    parser.add_argument("script", nargs="?", help="script to run (its own args follow it)")
+    parser.add_argument("--profile", action="store_true", help="write a cProfile dump for the script")
+    parser.add_argument("--trace-memory", action="store_true", help="record the tracemalloc peak")
+    parser.add_argument("--report", action="store_true", help="print the latest metrics per stage")
+    args, script_args = parser.parse_known_args()
+
+    if args.report or not args.script:
+        print(report(load_metrics()))
+        raise SystemExit(0)
+
+    # The script's own `import instrument` (via storage) must see this module's active stages
+    sys.modules.setdefault("instrument", sys.modules[__name__])
+    script = Path(args.script).resolve()
+    sys.argv = [str(script), *script_args]
+    sys.path.insert(0, str(script.parent))
+    with stage(script.stem, profile=args.profile or None, trace_memory=args.trace_memory or None,
+               script=script.name):
+        runpy.run_path(str(script), run_name="__main__")
@@ -1,34 +1,119 @@
+import argparse
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from dotenv import load_dotenv
 import os
+from bulk_load import load_chunks, swap_table
+from identifiers import decode_frame, encode_frame
 
-load_dotenv()
-DB_URI = os.getenv("DATABASE_URL")
-engine = create_engine(DB_URI)
+TARGET = "pbp_full_context"
+
+# (table, join keys, suffix for clashing columns) in merge order, same as the
+# original pandas merges: games on game_id, then defense, then offense
+JOINS = [
+    ("game_context", ["game_id"], "_games"),
+    ("defensive_tendencies", ["season", "week", "defteam"], "_def"),
+    ("offensive_tendencies", ["season", "week", "posteam"], "_off"),
+]
+
+INDEXES = [
+    ["season", "week"],
+    ["game_id", "passer_player_id"],
+    ["game_id", "receiver_player_id"],
+    ["game_id", "rusher_player_id"],
+]
+
+
+def build_select(engine) -> str:
+    """SELECT joining plays to its context with the same column names pandas merge produces."""
+    quote = engine.dialect.identifier_preparer.quote
+    inspector = inspect(engine)
 
-pbp = pd.read_sql_table("plays", engine)
-games = pd.read_sql_table("game_context", engine)
-off_tend = pd.read_sql_table("offensive_tendencies", engine)
-def_tend = pd.read_sql_table("defensive_tendencies", engine)
+    names = [col["name"] for col in inspector.get_columns("plays")]
+    select = [f"p.{quote(name)}" for name in names]
+    joins = []
+    for i, (table, keys, suffix) in enumerate(JOINS):
+        alias = f"t{i}"
+        for col in inspector.get_columns(table):
+            col = col["name"]
+            if col in keys:
+                continue
+            name = col + suffix if col in names else col
+            select.append(f"{alias}.{quote(col)} AS {quote(name)}")
+            names.append(name)
+        condition = " AND ".join(f"p.{quote(key)} = {alias}.{quote(key)}" for key in keys)
+        joins.append(f"LEFT JOIN {quote(table)} {alias} ON {condition}")
 
+    return "SELECT " + ",\n       ".join(select) + "\nFROM plays p\n" + "\n".join(joins)
 
 
-pbp_full = pbp.merge(games, on="game_id", how="left", suffixes=('', '_games'))
-pbp_full = pbp_full.merge(
-    def_tend,
-    on=['season','week','defteam'],
-    how='left',
-    suffixes=('', '_def') 
-)
+def build_server_side(engine) -> None:
+    """CREATE TABLE AS inside the database, then swap it in (keeping dependent views) and index it atomically."""
+    quote = engine.dialect.identifier_preparer.quote
+    staging = f"{TARGET}__staging"
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {quote(staging)}"))
+        conn.execute(text(f"CREATE TABLE {quote(staging)} AS\n{build_select(engine)}"))
+        swap_table(conn, staging, TARGET)
+        for cols in INDEXES:
+            index = quote(f"ix_{TARGET}_{'_'.join(cols)}")
+            conn.execute(text(f"CREATE INDEX {index} ON {quote(TARGET)} ({', '.join(quote(c) for c in cols)})"))
+        rows = conn.execute(text(f"SELECT COUNT(*) FROM {quote(TARGET)}")).scalar()
+    print(f"Built {TARGET} server-side ({rows:,} rows)")
 
 
-pbp_full = pbp_full.merge(
-    off_tend,
-    on=['season','week','posteam'],
-    how='left',
-    suffixes=('', '_off')
-)
+def stream_chunks(conn):
+    """Yield plays merged with context one (season, week) at a time.
 
-pbp_full.to_sql("pbp_full_context", engine, if_exists="replace", index=False)
+    Only the small context tables and a single week of plays are ever held
+    in client memory. Reads go through the loader's own connection and each
+    week's query is fully read before the chunk is written.
+    """
+    # plays is recreated on every load without indexes; without this each week's query is a full scan
+    quote = conn.dialect.identifier_preparer.quote
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {quote('ix_plays_season_week')} "
+                      f"ON plays ({quote('season')}, {quote('week')})"))
+    # Join keys are interned to int32 codes for the merges and decoded on the way out
+    keys = ["game_id", "posteam", "defteam"]
+    games = encode_frame(pd.read_sql_table("game_context", conn), ["game_id"])
+    def_tend = encode_frame(pd.read_sql_table("defensive_tendencies", conn), ["defteam"])
+    off_tend = encode_frame(pd.read_sql_table("offensive_tendencies", conn), ["posteam"])
+    weeks = pd.read_sql_query(text("SELECT DISTINCT season, week FROM plays ORDER BY season, week"), conn)
+
+    for season, week in weeks.itertuples(index=False):
+        pbp = pd.read_sql_query(
+            text("SELECT * FROM plays WHERE season = :season AND week = :week"),
+            conn,
+            params={"season": int(season), "week": int(week)},
+        )
+        pbp = encode_frame(pbp, keys)
+        pbp_full = pbp.merge(games, on="game_id", how="left", suffixes=('', '_games'))
+        pbp_full = pbp_full.merge(
+            def_tend,
+            on=['season','week','defteam'],
+            how='left',
+            suffixes=('', '_def')
+        )
+        pbp_full = pbp_full.merge(
+            off_tend,
+            on=['season','week','posteam'],
+            how='left',
+            suffixes=('', '_off')
+        )
+        yield decode_frame(pbp_full, keys)
+
+
+parser = argparse.ArgumentParser(description=f"Build {TARGET} from plays and its game/team context")
+parser.add_argument("--mode", choices=["sql", "stream"], default="sql",
+                    help="sql: CREATE TABLE AS in the database; stream: week-by-week client-side merge")
+args = parser.parse_args()
+
+load_dotenv()
+DB_URI = os.getenv("DATABASE_URL")
+engine = create_engine(DB_URI)
 
+if args.mode == "sql":
+    build_server_side(engine)
+else:
+    # Column types come from the joined tables, not from whatever the first week's values look like
+    load_chunks(stream_chunks, TARGET, engine, schema_query=build_select(engine))
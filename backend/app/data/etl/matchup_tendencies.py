@@ -1,30 +1,24 @@
 import pandas as pd
+from storage import read_stage, write_stage, fill_na
+from context_tensor import ContextTensor, attach
 
 # --- Load data ---
-games = pd.read_csv("../play_by_play/games_context_2021_2024.csv")
-off = pd.read_csv("../play_by_play/offense_tendencies_2021_2024.csv")
-defn = pd.read_csv("../play_by_play/defense_tendencies_2021_2024.csv")
+games = read_stage("games_context_2021_2024")
+off = read_stage("offense_tendencies_2021_2024")
+defn = read_stage("defense_tendencies_2021_2024")
 
-# --- Standardize column names for merging ---
-off = off.rename(columns={"posteam": "team"})
-defn = defn.rename(columns={"defteam": "team"})
+# --- Dense (season, week, team) context, looked up by array gather instead of merges ---
+off_ctx = ContextTensor(off, "posteam")
+def_ctx = ContextTensor(defn, "defteam")
 
 # --- Home Offense vs Away Defense ---
-home_vs_away = games.merge(
-    off, left_on=["season", "week", "home_team"], right_on=["season", "week", "team"], how="left"
-).merge(
-    defn, left_on=["season", "week", "away_team"], right_on=["season", "week", "team"], how="left", suffixes=("_off", "_def")
-)
+home_vs_away = attach(attach(games, off_ctx, "home_team"), def_ctx, "away_team")
 
 home_vs_away["posteam"] = home_vs_away["home_team"]
 home_vs_away["defteam"] = home_vs_away["away_team"]
 
 # --- Away Offense vs Home Defense ---
-away_vs_home = games.merge(
-    off, left_on=["season", "week", "away_team"], right_on=["season", "week", "team"], how="left"
-).merge(
-    defn, left_on=["season", "week", "home_team"], right_on=["season", "week", "team"], how="left", suffixes=("_off", "_def")
-)
+away_vs_home = attach(attach(games, off_ctx, "away_team"), def_ctx, "home_team")
 
 away_vs_home["posteam"] = away_vs_home["away_team"]
 away_vs_home["defteam"] = away_vs_home["home_team"]
@@ -32,11 +26,8 @@ away_vs_home["defteam"] = away_vs_home["home_team"]
 # --- Combine both perspectives ---
 matchup_tendencies = pd.concat([home_vs_away, away_vs_home], ignore_index=True)
 
-# --- Drop redundant team columns ---
-matchup_tendencies = matchup_tendencies.drop(columns=["team_off", "team_def"], errors="ignore")
-
 # --- Fill missing values ---
-matchup_tendencies = matchup_tendencies.fillna(0)
+matchup_tendencies = fill_na(matchup_tendencies)
 
 print("✅ Matchup tendencies table created:", matchup_tendencies.shape)
 #matchup_tendencies.to_csv("../play_by_play/matchup_tendencies_2021_2024.csv", index=False)
@@ -73,10 +64,10 @@ matchup_tendencies["posteam"] = matchup_tendencies["posteam"].str.strip()
 matchup_tendencies["defteam"] = matchup_tendencies["defteam"].str.strip()
 
 # --- Fill any remaining missing values ---
-matchup_tendencies = matchup_tendencies.fillna(0)
+matchup_tendencies = fill_na(matchup_tendencies)
 
 # --- Save cleaned table ---
-matchup_tendencies.to_csv("../play_by_play/matchup_tendencies_2021_2024_clean.csv", index=False)
+write_stage(matchup_tendencies, "matchup_tendencies_2021_2024_clean")
 
 print("✅ Cleaned matchup tendencies table saved:", matchup_tendencies.shape)
 
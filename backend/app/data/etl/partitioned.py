@@ -0,0 +1,76 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from storage import CACHE_DIR
+
+# Shared inputs go to RAM-backed /dev/shm where there is one, so workers map pages, not disk
+SHARED_DIR = Path("/dev/shm") if Path("/dev/shm").is_dir() else CACHE_DIR / "shared"
+
+_table = None
+
+
+def partition_bounds(df: pd.DataFrame, keys) -> tuple:
+    """(row order grouping df by keys, [(key, start, length), ...] in sorted key order)."""
+    codes = [pd.factorize(df[key], sort=True)[0] for key in keys]
+    order = np.lexsort([np.arange(len(df))] + codes[::-1])
+    sorted_codes = np.stack([c[order] for c in codes])
+    starts = np.flatnonzero(np.r_[True, (sorted_codes[:, 1:] != sorted_codes[:, :-1]).any(axis=0)])
+    lengths = np.diff(np.r_[starts, len(df)])
+    first_rows = order[starts]
+    labels = [tuple(df[key].to_numpy()[first_rows[i]] for key in keys) for i in range(len(starts))]
+    return order, list(zip(labels, starts.tolist(), lengths.tolist()))
+
+
+def _open_shared(path):
+    global _table
+    with pa.memory_map(str(path)) as source:
+        _table = ipc.open_file(source).read_all()
+
+
+def _run_partition(fn, start, length, kwargs):
+    return fn(_table.slice(start, length).to_pandas(), **kwargs)
+
+
+def map_partitions(fn, df: pd.DataFrame, keys=("season",), processes: int = None, **kwargs) -> pd.DataFrame:
+    """concat(fn(part, **kwargs) for each (keys) partition of df), run across a process pool.
+
+    df is written once, grouped by partition, to an uncompressed Arrow IPC
+    file that every worker memory-maps, so partitions are zero-copy slices
+    of shared pages rather than pickled copies. Results come back in
+    partition key order. fn must be a module-level function whose result
+    for a partition does not depend on rows outside it (e.g. per-season
+    aggregation). With processes=1, fn runs on the whole frame in-process.
+    """
+    keys = list(keys)
+    processes = processes or os.cpu_count()
+    if processes <= 1:
+        return fn(df, **kwargs)
+    order, parts = partition_bounds(df, keys)
+    if len(parts) <= 1:
+        return fn(df, **kwargs)
+
+    SHARED_DIR.mkdir(parents=True, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="partitions_", suffix=".arrow", dir=SHARED_DIR)
+    os.close(fd)
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False).take(order)
+        with pa.OSFile(path, "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        del table
+
+        # Largest partitions first so one big season does not finish last on its own
+        by_size = sorted(range(len(parts)), key=lambda i: -parts[i][2])
+        with ProcessPoolExecutor(max_workers=min(processes, len(parts)),
+                                 initializer=_open_shared, initargs=(path,)) as pool:
+            futures = {i: pool.submit(_run_partition, fn, parts[i][1], parts[i][2], kwargs) for i in by_size}
+            results = [futures[i].result() for i in range(len(parts))]
+    finally:
+        os.unlink(path)
+    return pd.concat(results, ignore_index=True)
@@ -0,0 +1,368 @@
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from storage import CACHE_DIR, DATA_DIR, STAGES, refresh_stage, stage_path
+
+ETL_DIR = Path(__file__).resolve().parent
+REPO_ROOT = ETL_DIR.parents[3]
+PIPELINE_DIR = CACHE_DIR / "pipeline"
+
+
+class Stage:
+    """One ETL script, with the artifacts it reads and writes.
+
+    Artifacts are "stage:<name>" (a Parquet stage, see storage.py) or
+    "table:<name>" (a database table). Edges of the DAG come from matching
+    one stage's outputs to another's inputs; an input nobody produces must
+    be listed in SOURCES.
+    """
+
+    def __init__(self, name, script, inputs=(), outputs=(), args=(), cwd=ETL_DIR):
+        self.name = name
+        self.script = script
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.args = list(args)
+        self.cwd = cwd
+
+    def command(self):
+        if self.script.endswith(".R"):
+            return ["Rscript", str(ETL_DIR / self.script), *self.args]
+        # Python stages run under instrument.py, which appends their metrics to cache/metrics
+        return [sys.executable, str(ETL_DIR / "instrument.py"), str(ETL_DIR / self.script), *self.args]
+
+
+# fetch_context.R is left out: fetch_2025.R writes the same games_context_2025 file.
+# offensive.R and fetch_def.R are superseded by tendencies.py.
+# Inputs with no producing script, read as they are. Any other unproduced input is an error
+# (a misspelt artifact would otherwise silently become a source and never trigger a rerun).
+SOURCES = [
+    "stage:games_context_2021_2024",
+    "stage:final_table_modeling",
+    "stage:player_week_modeling_features",
+]
+
+PIPELINE = [
+    # --- nflfastR fetches (R) ---
+    Stage("fetch_2021_2024", "fetch.R", cwd=REPO_ROOT,
+          outputs=["stage:pbp_2021_2024", "stage:roster_2021_2024"]),
+    Stage("fetch_2025", "fetch_2025.R",
+          outputs=["stage:pbp_2025", "stage:roster_2025", "stage:games_context_2025"]),
+
+    # --- team tendencies from the fetched pbp (replaces offensive.R / fetch_def.R) ---
+    Stage("tendencies_2021_2024", "tendencies.py", args=["--suffix", "2021_2024"],
+          inputs=["stage:pbp_2021_2024"],
+          outputs=["stage:offense_tendencies_2021_2024", "stage:defense_tendencies_2021_2024"]),
+    Stage("tendencies_2025", "tendencies.py", args=["--suffix", "2025", "--incremental"],
+          inputs=["stage:pbp_2025"],
+          outputs=["stage:offense_tendencies_2025", "stage:defense_tendencies_2025"]),
+
+    # --- 2021-2024 database tables ---
+    Stage("load_plays", "fetch_data.py",
+          inputs=["stage:pbp_2021_2024", "stage:roster_2021_2024"],
+          outputs=["table:plays", "table:players"]),
+    Stage("load_offense", "push_offensive.py",
+          inputs=["stage:offense_tendencies_2021_2024"], outputs=["table:offensive_tendencies"]),
+    Stage("load_defense", "calculate_defense_tendencies.py",
+          inputs=["stage:defense_tendencies_2021_2024"], outputs=["table:defensive_tendencies"]),
+    Stage("load_game_context", "fetch_game_context.py",
+          inputs=["stage:games_context_2021_2024"], outputs=["table:game_context"]),
+    Stage("join_weeks", "join_weeks.py",
+          inputs=["table:plays", "table:game_context", "table:defensive_tendencies",
+                  "table:offensive_tendencies"],
+          outputs=["table:pbp_full_context"]),
+    Stage("player_usage", "fetch_player_usage.py", outputs=["table:player_usage"]),
+
+    # --- 2021-2024 modeling table ---
+    Stage("player_week", "player_week_data.py",
+          inputs=["stage:pbp_2021_2024"], outputs=["stage:aggregated_player_week_redzone"]),
+    Stage("matchup_tendencies", "matchup_tendencies.py",
+          inputs=["stage:games_context_2021_2024", "stage:offense_tendencies_2021_2024",
+                  "stage:defense_tendencies_2021_2024"],
+          outputs=["stage:matchup_tendencies_2021_2024_clean"]),
+    Stage("player_week_context", "final_table.py",
+          inputs=["stage:aggregated_player_week_redzone", "stage:matchup_tendencies_2021_2024_clean"],
+          outputs=["stage:player_week_with_context"]),
+    Stage("player_week_context_rolling", "final_with_rolling.py",
+          inputs=["stage:aggregated_player_week_redzone", "stage:matchup_tendencies_2021_2024_clean"],
+          outputs=["stage:player_week_with_context_rolling"]),
+    Stage("fixed_fantasy", "final_table_real.py",
+          inputs=["stage:final_table_modeling", "table:pbp_full_context"],
+          outputs=["stage:player_week_fixed_fantasy"]),
+    Stage("depth_chart", "fetch_depth_charts.py",
+          inputs=["stage:roster_2021_2024", "stage:roster_2025"],
+          outputs=["stage:depth_chart", "stage:player_crosswalk", "stage:player_crosswalk_teams",
+                   "table:depth_chart"]),
+    Stage("push", "push.py",
+          inputs=["stage:player_week_fixed_fantasy", "stage:depth_chart"],
+          outputs=["table:final_modeling_data"]),
+    Stage("efficiency", "effeciency_table.py",
+          inputs=["stage:player_week_modeling_features"], outputs=["table:final_dataset_all_stats"]),
+
+    # --- 2025 season ---
+    Stage("combine_2025", "combine_2025_data.py", args=["--incremental"],
+          inputs=["stage:defense_tendencies_2025", "stage:offense_tendencies_2025",
+                  "stage:pbp_2025", "stage:games_context_2025"],
+          outputs=["stage:player_week_data_2025"]),
+    Stage("rolling_2025", "rolling_2025_data.py", args=["--incremental"],
+          inputs=["stage:defense_tendencies_2025", "stage:offense_tendencies_2025",
+                  "stage:player_week_data_2025", "stage:games_context_2025", "stage:roster_2025"],
+          outputs=["stage:2025_final_data", "table:final_data_2025"]),
+]
+
+
+# === Fingerprints ===
+
+class FileHashes:
+    """sha256 of files, remembered by (size, mtime) so unchanged files are read once."""
+
+    def __init__(self, path=PIPELINE_DIR / "file_hashes.json"):
+        self.path = path
+        self.known = json.loads(path.read_text()) if path.exists() else {}
+
+    def __call__(self, file: Path):
+        if not file.exists():
+            return None
+        stat = file.stat()
+        key = str(file)
+        entry = self.known.get(key)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+        digest = hashlib.sha256()
+        with open(file, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        self.known[key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.known, indent=1, sort_keys=True))
+
+
+def local_modules(script: str) -> list:
+    """The script plus every sibling module it imports, transitively."""
+    seen, todo = [], [script]
+    while todo:
+        name = todo.pop()
+        if name in seen:
+            continue
+        seen.append(name)
+        if not name.endswith(".py"):
+            continue
+        for node in ast.walk(ast.parse((ETL_DIR / name).read_text())):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                modules = [node.module]
+            else:
+                continue
+            todo += [f"{m}.py" for m in modules if (ETL_DIR / f"{m}.py").exists()]
+    return sorted(seen)
+
+
+def code_hash(stage: Stage, hashes: FileHashes) -> str:
+    files = {name: hashes(ETL_DIR / name) for name in local_modules(stage.script)}
+    return hashlib.sha256(json.dumps([files, stage.args]).encode()).hexdigest()
+
+
+def exists(artifact: str) -> bool:
+    """Whether a stage has a Parquet or CSV copy (tables are assumed to exist)."""
+    kind, name = artifact.split(":", 1)
+    return kind != "stage" or stage_path(name).exists() or (name in STAGES and (DATA_DIR / STAGES[name]).exists())
+
+
+def artifact_hash(artifact: str, hashes: FileHashes, state: dict, producers: dict):
+    """Content hash of a stage file; for a table, the run key of the stage that last wrote it."""
+    kind, name = artifact.split(":", 1)
+    if kind == "stage":
+        return hashes(refresh_stage(name)) if exists(artifact) else None
+    producer = producers.get(artifact)
+    if producer is None:
+        return "external"
+    return state.get(producer, {}).get("outputs", {}).get(artifact)
+
+
+# === Graph ===
+
+def build_graph(stages, sources=SOURCES):
+    """({output artifact: producing stage}, {stage: [upstream stages]})."""
+    producers = {}
+    for stage in stages:
+        for artifact in stage.outputs:
+            if artifact in producers:
+                raise ValueError(f"{artifact} is written by both {producers[artifact]} and {stage.name}")
+            producers[artifact] = stage.name
+    orphans = [f"{a} (read by {stage.name})" for stage in stages for a in stage.inputs
+               if a not in producers and a not in sources]
+    if orphans:
+        raise ValueError(f"No stage produces {', '.join(orphans)}; fix the name or add it to SOURCES")
+    upstream = {stage.name: sorted({producers[a] for a in stage.inputs if a in producers} - {stage.name})
+                for stage in stages}
+    return producers, upstream
+
+
+def select(stages, upstream, targets):
+    """Target stages plus everything they depend on (all stages if no targets)."""
+    names = [s.name for s in stages]
+    if not targets:
+        return names
+    unknown = set(targets) - set(names)
+    if unknown:
+        raise SystemExit(f"Unknown stages: {', '.join(sorted(unknown))}")
+    wanted, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in wanted:
+            wanted.add(name)
+            todo += upstream[name]
+    return [n for n in names if n in wanted]
+
+
+def levels(names, upstream):
+    """Stages grouped so each group only depends on earlier groups."""
+    remaining, done, out = list(names), set(), []
+    while remaining:
+        ready = [n for n in remaining if all(u in done or u not in names for u in upstream[n])]
+        if not ready:
+            raise ValueError(f"Cycle between stages: {', '.join(remaining)}")
+        out.append(ready)
+        done.update(ready)
+        remaining = [n for n in remaining if n not in done]
+    return out
+
+
+# === Runner ===
+
+def run_stage(stage: Stage):
+    """Run one script in its own process, logging its output; returns (returncode, seconds, log)."""
+    log = PIPELINE_DIR / "logs" / f"{stage.name}.log"
+    log.parent.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    with open(log, "w") as out:
+        proc = subprocess.run(stage.command(), cwd=stage.cwd, stdout=out, stderr=subprocess.STDOUT)
+    return proc.returncode, time.perf_counter() - start, log
+
+
+def run_pipeline(stages=PIPELINE, targets=(), force=(), jobs=None, dry_run=False, adopt=False,
+                 sources=SOURCES) -> dict:
+    """Run the stages whose code or inputs changed, as many at once as their dependencies allow.
+
+    A stage is skipped when its run key (hash of its code, args and input
+    fingerprints) matches the last successful run and its stage outputs
+    still exist. Stages in `force` always run. A failed stage blocks
+    everything downstream of it; unrelated stages carry on.
+
+    With `adopt`, out-of-date stages whose outputs already exist are
+    recorded as up to date instead of run (to start tracking a tree built
+    by hand without re-fetching everything).
+    """
+    by_name = {s.name: s for s in stages}
+    producers, upstream = build_graph(stages, sources)
+    names = select(stages, upstream, targets)
+    levels(names, upstream)  # raises on cycles
+    state_path = PIPELINE_DIR / "state.json"
+    state = json.loads(state_path.read_text()) if state_path.exists() else {}
+    hashes = FileHashes()
+    results = {}
+
+    def run_key(stage):
+        inputs = {a: artifact_hash(a, hashes, state, producers) for a in stage.inputs}
+        return hashlib.sha256(json.dumps([code_hash(stage, hashes), inputs], sort_keys=True).encode()).hexdigest()
+
+    def up_to_date(stage, key):
+        return (stage.name not in force and state.get(stage.name, {}).get("key") == key
+                and all(exists(a) for a in stage.outputs))
+
+    def finish(stage, key, seconds):
+        outputs = {a: (key if a.startswith("table:") else artifact_hash(a, hashes, state, producers))
+                   for a in stage.outputs}
+        state[stage.name] = {"key": key, "outputs": outputs, "seconds": round(seconds, 3)}
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        state_path.write_text(json.dumps(state, indent=1, sort_keys=True))
+
+    pending = list(names)
+    running = {}
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        while pending or running:
+            for name in list(pending):
+                deps = [u for u in upstream[name] if u in names]
+                if any(results.get(u, {}).get("status") in ("failed", "blocked") for u in deps):
+                    results[name] = {"status": "blocked", "seconds": 0.0}
+                    pending.remove(name)
+                elif all(u in results for u in deps):
+                    stage = by_name[name]
+                    pending.remove(name)
+                    key = run_key(stage)
+                    if up_to_date(stage, key) and not any(results[u]["status"] == "would run" for u in deps):
+                        results[name] = {"status": "cached", "seconds": 0.0}
+                    elif adopt and stage.name not in force and all(exists(a) for a in stage.outputs):
+                        finish(stage, key, 0.0)
+                        results[name] = {"status": "adopted", "seconds": 0.0}
+                    elif dry_run:
+                        results[name] = {"status": "would run", "seconds": 0.0}
+                    else:
+                        print(f"▶ {name}: {' '.join([stage.script, *stage.args])}")
+                        running[pool.submit(run_stage, stage)] = (stage, key)
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, key = running.pop(future)
+                code, seconds, log = future.result()
+                if code == 0:
+                    finish(stage, key, seconds)
+                    results[stage.name] = {"status": "ran", "seconds": seconds}
+                    print(f"✅ {stage.name} ({seconds:.1f}s)")
+                else:
+                    results[stage.name] = {"status": "failed", "seconds": seconds, "log": str(log)}
+                    tail = log.read_text().splitlines()[-15:]
+                    print(f"❌ {stage.name} exited {code} ({seconds:.1f}s), log: {log}")
+                    print("\n".join("   " + line for line in tail))
+    hashes.save()
+    return results
+
+
+def summary(results: dict) -> str:
+    width = max([len(n) for n in results] + [5])
+    lines = [f"{'stage':<{width}}  {'status':<9}  {'seconds':>8}"]
+    for name, result in results.items():
+        lines.append(f"{name:<{width}}  {result['status']:<9}  {result['seconds']:>8.1f}")
+    total = sum(r["seconds"] for r in results.values())
+    lines.append(f"{'total stage time':<{width}}  {'':<9}  {total:>8.1f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the ETL stages whose code or inputs changed")
+    parser.add_argument("targets", nargs="*", help="stages to bring up to date (default: all)")
+    parser.add_argument("--force", nargs="+", default=[], metavar="STAGE",
+                        help="re-run these stages even if nothing changed (e.g. the network fetches)")
+    parser.add_argument("--jobs", type=int, default=None, help="stages run at once (default: CPU count)")
+    parser.add_argument("--dry-run", action="store_true", help="only report which stages would run")
+    parser.add_argument("--adopt", action="store_true",
+                        help="record stages whose outputs already exist as up to date without running them")
+    parser.add_argument("--list", action="store_true", help="print the stages by dependency level")
+    args = parser.parse_args()
+
+    if args.list:
+        producers, upstream = build_graph(PIPELINE)
+        for i, level in enumerate(levels([s.name for s in PIPELINE], upstream)):
+            print(f"level {i}: {', '.join(level)}")
+        raise SystemExit(0)
+
+    wall = time.perf_counter()
+    results = run_pipeline(targets=args.targets, force=set(args.force), jobs=args.jobs,
+                           dry_run=args.dry_run, adopt=args.adopt)
+    print(summary(results))
+    print(f"wall time {time.perf_counter() - wall:.1f}s")
+    if any(r["status"] in ("failed", "blocked") for r in results.values()):
+        raise SystemExit(1)
@@ -1,7 +1,27 @@
+import argparse
 import pandas as pd
+from aggregate import aggregate_player_week
+from scoring import score, DEFAULT_CONFIG
+from storage import read_stage, write_stage
+from identifiers import decode_frame, encode_frame
+import instrument
+from partitioned import map_partitions
+
+parser = argparse.ArgumentParser(description="Aggregate 2021-2024 pbp into player-week stats with red zone flags")
+parser.add_argument("--processes", type=int, default=1,
+                    help="aggregate seasons in parallel across this many processes")
+args = parser.parse_args()
 
 # === Step 1: Load play-by-play data ===
-pbp = pd.read_csv("../play_by_play/pbp_2021_2024.csv")
+pbp = read_stage("pbp_2021_2024", columns=[
+    'game_id','season','week','posteam','defteam','play_type','yardline_100',
+    'passer_player_id','rusher_player_id','receiver_player_id','air_yards','yards_after_catch',
+    'rushing_yards','pass_touchdown','rush_touchdown','interception','fumble_lost',
+    'pass_attempt','complete_pass','reception','receiving_yards'
+])
+
+# --- Intern game, team and player ids as int32 codes (decoded again before saving) ---
+pbp = encode_frame(pbp)
 
 # --- Derive passing_yards first ---
 pbp['passing_yards'] = pbp['air_yards'].fillna(0) + pbp['yards_after_catch'].fillna(0)
@@ -12,61 +32,7 @@ pbp['rush_inside_20'] = ((pbp['play_type'] == 'run') & (pbp['yardline_100'] <= 2
 pbp['target_inside_10'] = ((pbp['play_type'] == 'pass') & (pbp['yardline_100'] <= 10)).astype(int)
 pbp['target_inside_20'] = ((pbp['play_type'] == 'pass') & (pbp['yardline_100'] <= 20)).astype(int)
 
-# === Step 3: Prepare DataFrames by role ===
-
-# --- Passers ---
-passer_df = pbp[['season','week','game_id','posteam','defteam','passer_player_id',
-                 'pass_attempt','complete_pass','passing_yards','pass_touchdown',
-                 'interception','fumble_lost','target_inside_10','target_inside_20']].copy()
-passer_df = passer_df.rename(columns={'passer_player_id': 'player_id'})
-passer_df.fillna(0, inplace=True)
-passer_df['rush_plays'] = 0
-passer_df['rushing_yards'] = 0
-passer_df['rush_touchdown'] = 0
-passer_df['reception'] = 0
-passer_df['receiving_yards'] = 0
-passer_df['rush_inside_10'] = 0
-passer_df['rush_inside_20'] = 0
-
-# --- Rushers ---
-rusher_df = pbp[['season','week','game_id','posteam','defteam','rusher_player_id',
-                 'rushing_yards','rush_touchdown','fumble_lost',
-                 'rush_inside_10','rush_inside_20']].copy()
-rusher_df = rusher_df.rename(columns={'rusher_player_id': 'player_id'})
-rusher_df.fillna(0, inplace=True)
-rusher_df['rush_plays'] = 1
-rusher_df['pass_attempt'] = 0
-rusher_df['complete_pass'] = 0
-rusher_df['passing_yards'] = 0
-rusher_df['pass_touchdown'] = 0
-rusher_df['interception'] = 0
-rusher_df['reception'] = 0
-rusher_df['receiving_yards'] = 0
-rusher_df['target_inside_10'] = 0
-rusher_df['target_inside_20'] = 0
-
-# --- Receivers ---
-receiver_df = pbp[['season','week','game_id','posteam','defteam','receiver_player_id',
-                   'reception','receiving_yards','fumble_lost',
-                   'target_inside_10','target_inside_20']].copy()
-receiver_df = receiver_df.rename(columns={'receiver_player_id': 'player_id'})
-receiver_df.fillna(0, inplace=True)
-receiver_df['pass_attempt'] = 0
-receiver_df['complete_pass'] = 0
-receiver_df['passing_yards'] = 0
-receiver_df['pass_touchdown'] = 0
-receiver_df['interception'] = 0
-receiver_df['rush_plays'] = 0
-receiver_df['rushing_yards'] = 0
-receiver_df['rush_touchdown'] = 0
-receiver_df['rush_inside_10'] = 0
-receiver_df['rush_inside_20'] = 0
-
-# === Step 4: Combine all players ===
-all_players = pd.concat([passer_df, rusher_df, receiver_df], ignore_index=True)
-all_players = all_players.dropna(subset=['player_id'])
-
-# === Step 5: Aggregate per player-week ===
+# === Step 3: Aggregate per player-week (scatter-add by role, no role copies; one season per process) ===
 agg_cols = [
     'pass_attempt','complete_pass','passing_yards','pass_touchdown','interception',
     'rush_plays','rushing_yards','rush_touchdown',
@@ -74,30 +40,22 @@ agg_cols = [
     'rush_inside_10','rush_inside_20','target_inside_10','target_inside_20'
 ]
 
-player_week = (
-    all_players
-    .groupby(['season','week','game_id','posteam','defteam','player_id'], as_index=False)[agg_cols]
-    .sum()
-)
+with instrument.stage("aggregate_player_week", rows_in=len(pbp)) as metrics:
+    player_week = map_partitions(aggregate_player_week, pbp, keys=['season'], processes=args.processes,
+                                 agg_cols=agg_cols)
+    metrics.rows_out = len(player_week)
 
-# === Step 6: Total touches ===
+# === Step 4: Total touches ===
 player_week['total_touches'] = (
     player_week['pass_attempt'] + player_week['rush_plays'] + player_week['reception']
 )
 
-# === Step 7: Fantasy points (PPR) ===
-player_week['fantasy_points'] = (
-    0.04 * player_week['passing_yards'] +     
-    4 * player_week['pass_touchdown'] -
-    2 * player_week['interception'] +
-    0.1 * player_week['rushing_yards'] +      
-    6 * player_week['rush_touchdown'] +
-    0.1 * player_week['receiving_yards'] +    
-    1.0 * player_week['reception'] -
-    2.0 * player_week['fumble_lost']
-)
+# === Step 5: Fantasy points (PPR) ===
+score(player_week)
+player_week['fantasy_points'] = player_week[f'fantasy_points_{DEFAULT_CONFIG}']
 
-# === Step 8: Save ===
-player_week.to_csv("../play_by_play/aggregated_player_week_redzone.csv", index=False)
+# === Step 6: Save ===
+player_week = decode_frame(player_week)
+write_stage(player_week, "aggregated_player_week_redzone")
 print("✅ Saved player-week table with red zone metrics and defteam")
 print(player_week.head(10))
@@ -1,7 +1,12 @@
+import numpy as np
 import pandas as pd
 from sqlalchemy import create_engine
 from dotenv import load_dotenv
 import os
+from storage import read_stage, stage_path
+from bulk_load import load_frame
+from rolling import add_rolling
+from context_tensor import attach_rows
 
 # Load environment variables
 load_dotenv()
@@ -9,18 +14,26 @@ DB_URI = os.getenv("DATABASE_URL")
 engine = create_engine(DB_URI)
 
 # Load dataset
-finals = pd.read_csv("../play_by_play/player_week_fixed_fantasy.csv")
+finals = read_stage("player_week_fixed_fantasy")
 
 # Sort by player and week to ensure correct rolling calculation
 finals = finals.sort_values(by=["player_id", "season", "week"])
 
 # Add 3-week rolling average of receiving touchdowns
-finals["receiving_touchdown_rolling3"] = (
-    finals.groupby("player_id")["receiving_touchdown"]
-    .rolling(window=3, min_periods=1)
-    .mean()
-    .reset_index(level=0, drop=True)
-)
+finals = add_rolling(finals, ["receiving_touchdown"], windows=(3,))
+
+# Sleeper snap counts and depth chart role, matched to gsis player ids through the crosswalk.
+# The columns are always written (empty without a depth chart) so the table schema never changes.
+DEPTH_COLS = ["off_snp", "role", "starter_flag"]
+if stage_path("depth_chart").exists():
+    depth = read_stage("depth_chart", columns=["gsis_id", "season", "week"] + DEPTH_COLS)
+    depth = depth.dropna(subset=["gsis_id"]).drop_duplicates(["gsis_id", "season", "week"])
+    finals = attach_rows(finals, depth.rename(columns={"gsis_id": "player_id"}), ["player_id", "season", "week"])
+else:
+    print("⚠ No depth_chart stage yet; writing empty snap count / role / starter columns. "
+          "Run fetch_depth_charts.py to fill them")
+    finals = finals.assign(off_snp=np.nan, role=pd.Series(None, index=finals.index, dtype=object),
+                           starter_flag=np.nan)
 
 # Save to database
-finals.to_sql("final_modeling_data", engine, if_exists="replace", index=False)
+load_frame(finals, "final_modeling_data", engine)
@@ -2,25 +2,26 @@ import pandas as pd
 from sqlalchemy import create_engine
 from dotenv import load_dotenv
 import os
+from storage import read_stage
+from bulk_load import load_frame
 
 load_dotenv()
 DB_URI = os.getenv("DATABASE_URL")
 engine = create_engine(DB_URI)
 
-roster_files = [
-    "../play_by_play/offense_tendencies_2021_2024.csv"
+roster_stages = [
+    "offense_tendencies_2021_2024"
 ]
 
 dfs = []
 
-for file in roster_files:
-    print(f"Reading {file}...")
-    df = pd.read_csv(file)
+for stage in roster_stages:
+    print(f"Reading {stage}...")
 
     # Select relevant columns
-    df_small = df[[
+    df_small = read_stage(stage, columns=[
         "season","week","posteam","total_plays","pass_plays","rush_plays","pass_pct","rush_pct","red_zone_pass_pct","deep_pass_pct","avg_air_yards","avg_yards_after_catch"
-    ]].copy()
+    ])
 
     dfs.append(df_small)
 
@@ -28,5 +29,5 @@ roster_all = pd.concat(dfs, ignore_index=True)
 
 
 print("Saving off tendency to Postgres...")
-roster_all.to_sql("offensive_tendencies", engine, if_exists="replace", index=False)
+load_frame(roster_all, "offensive_tendencies", engine)
 print("Done!")
\ No newline at end of file
@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+
+ORDER_COLS = ['season', 'week']
+
+
+def _group_layout(df, group, order, reset_per_season):
+    """Stable sort order of df by (group, order) plus each sorted row's group/season start."""
+    group = [group] if isinstance(group, str) else list(group)
+    codes = [pd.factorize(df[col], sort=True)[0] for col in group]
+    missing = np.zeros(len(df), dtype=bool)
+    for c in codes:
+        missing |= c < 0
+    order_values = [df[col].to_numpy() for col in order]
+
+    # np.lexsort sorts by the last key first
+    sort = np.lexsort(order_values[::-1] + codes[::-1])
+
+    n = len(df)
+    pos = np.arange(n)
+    new_group = np.zeros(n, dtype=bool)
+    new_group[:1] = True
+    for c in codes:
+        c = c[sort]
+        new_group[1:] |= c[1:] != c[:-1]
+
+    season = df['season'].to_numpy()[sort] if 'season' in df.columns else np.zeros(n)
+    new_season = new_group.copy()
+    new_season[1:] |= season[1:] != season[:-1]
+
+    if reset_per_season:
+        new_group = new_season
+    group_start = np.maximum.accumulate(np.where(new_group, pos, 0))
+    season_start = np.maximum.accumulate(np.where(new_season, pos, 0))
+    return sort, group_start, season_start, missing[sort]
+
+
+def _cumsum(values):
+    """Cumulative sums (with a leading zero row) of values and of their non-NaN counts.
+
+    Whole-number columns are summed as int64 so window sums come out exact.
+    """
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    whole = np.all(filled == np.round(filled), axis=0) & np.all(np.abs(filled) < 2 ** 52, axis=0)
+
+    sums = np.zeros((len(values) + 1, values.shape[1]))
+    if whole.any():
+        sums[1:, whole] = np.cumsum(filled[:, whole].astype(np.int64), axis=0)
+    if (~whole).any():
+        sums[1:, ~whole] = np.cumsum(filled[:, ~whole], axis=0)
+    counts = np.zeros((len(values) + 1, values.shape[1]), dtype=np.int64)
+    counts[1:] = np.cumsum(valid, axis=0)
+    return sums, counts
+
+
+def _window_mean(sums, counts, lo, hi, min_periods):
+    """Mean of sorted rows [lo, hi) for every row, NaN where fewer than min_periods values."""
+    total = sums[hi] - sums[lo]
+    n = counts[hi] - counts[lo]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / n
+    mean[n < max(min_periods, 1)] = np.nan
+    return mean
+
+
+def _ewm_mean(values, group_start, span, shift, min_periods):
+    """pandas ewm(span, adjust=True).mean() per group, one vectorized step per within-group position."""
+    decay = 1.0 - 2.0 / (span + 1.0)
+    n, k = values.shape
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    num = np.zeros((n, k))
+    den = np.zeros((n, k))
+    seen = np.zeros((n, k), dtype=np.int64)
+
+    pos = np.arange(n) - group_start
+    by_pos = np.argsort(pos, kind='stable')
+    bounds = np.searchsorted(pos[by_pos], np.arange(pos.max() + 2) if n else [0])
+    for p in range(len(bounds) - 1):
+        rows = by_pos[bounds[p]:bounds[p + 1]]
+        num[rows] = filled[rows]
+        den[rows] = valid[rows]
+        seen[rows] = valid[rows]
+        if p:
+            num[rows] += decay * num[rows - 1]
+            den[rows] += decay * den[rows - 1]
+            seen[rows] += seen[rows - 1]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = num / den
+    mean[seen < max(min_periods, 1)] = np.nan
+    if shift:
+        first = pos == 0
+        mean[1:] = mean[:-1]
+        mean[first] = np.nan
+    return mean
+
+
+def rolling_features(df: pd.DataFrame, cols, windows=(3,), group='player_id', order=ORDER_COLS,
+                     season_to_date=False, ewm_spans=(), shift=False, min_periods=1,
+                     reset_per_season=False, name='{col}_rolling{window}',
+                     season_name='{col}_season_avg', ewm_name='{col}_ewm{span}') -> pd.DataFrame:
+    """Rolling means of many columns over many windows, computed in one sorted pass.
+
+    Rows are sorted once by (group, *order); each window mean is then two
+    lookups into column-wise cumulative sums, so every extra column or
+    window is a vectorized subtraction rather than another groupby.
+
+    windows         trailing window sizes in rows (games), like rolling(w, min_periods)
+    season_to_date  also add the mean of the player's games so far this season
+    ewm_spans       also add ewm(span=s, adjust=True).mean() for each span
+    shift           leakage-safe: each row only sees the rows strictly before it
+    reset_per_season  windows and EWMAs restart every season (group by player and season)
+
+    Returns a frame of the new columns aligned to df.index. Rows with a
+    missing group key get NaN, as groupby would drop them.
+    """
+    cols = list(cols)
+    sort, group_start, season_start, missing = _group_layout(df, group, order, reset_per_season)
+    values = df[cols].to_numpy(dtype=np.float64, na_value=np.nan)[sort]
+    sums, counts = _cumsum(values)
+
+    hi = np.arange(len(df)) + (0 if shift else 1)
+    results = {}
+    for window in windows:
+        lo = np.maximum(hi - window, group_start)
+        for col, out in zip(cols, _window_mean(sums, counts, lo, np.maximum(hi, lo), min_periods).T):
+            results[name.format(col=col, window=window)] = out
+    if season_to_date:
+        lo = season_start
+        for col, out in zip(cols, _window_mean(sums, counts, lo, np.maximum(hi, lo), min_periods).T):
+            results[season_name.format(col=col)] = out
+    for span in ewm_spans:
+        for col, out in zip(cols, _ewm_mean(values, group_start, span, shift, min_periods).T):
+            results[ewm_name.format(col=col, span=span)] = out
+
+    unsorted = np.empty(len(df), dtype=np.int64)
+    unsorted[sort] = np.arange(len(df))
+    features = pd.DataFrame({k: v[unsorted] for k, v in results.items()}, index=df.index)
+    features.loc[missing[unsorted]] = np.nan
+    return features
+
+
+def add_rolling(df: pd.DataFrame, cols, **kwargs) -> pd.DataFrame:
+    """df with rolling_features(df, cols, **kwargs) added (or replaced) as columns."""
+    features = rolling_features(df, cols, **kwargs)
+    return pd.concat([df.drop(columns=features.columns, errors='ignore'), features], axis=1)
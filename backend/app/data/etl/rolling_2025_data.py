@@ -1,53 +1,100 @@
+import argparse
 import pandas as pd
 from sqlalchemy import create_engine
 from dotenv import load_dotenv
 import os
+from storage import read_stage, stage_path, write_stage
+from bulk_load import load_frame
+from incremental import changed_partitions, in_partitions, save_manifest, upsert_stage
+from rolling import add_rolling
+import instrument
+from rolling_state import RollingState
+from context_tensor import ContextTensor, attach, attach_rows
+
+parser = argparse.ArgumentParser(description="Build the 2025 model table with context and rolling features")
+parser.add_argument("--incremental", action="store_true",
+                    help="only recompute players whose weeks are new or changed since the last run")
+args = parser.parse_args()
 
 load_dotenv()
 DB_URI = os.getenv("DATABASE_URL")
 engine = create_engine(DB_URI)
 
-roster_files = [
-    "../2025/defense_tendencies_2025_2025.csv",
-    "../2025/offense_tendencies_2025_2025.csv",
-    "../2025/player_week_data.csv",
-    "../2025/games_context_2025_2025.csv",
-    "../2025/roster_2025_2025.csv"
+stages = [
+    "defense_tendencies_2025",
+    "offense_tendencies_2025",
+    "player_week_data_2025",
+    "games_context_2025",
 ]
 
+rolling_cols = [
+    "passing_yards", "pass_attempt", "complete_pass", "rush_plays",
+    "rushing_yards", "receiving_yards", "reception", "total_touches",
+    "rush_inside_10", "rush_inside_20", "target_inside_10", "target_inside_20",
+    "total_plays_off", "pass_plays_off", "rush_plays_off", "total_pass_plays",
+    "avg_yac_off", "avg_air_yards_off", "fantasy_points",
+    "pass_touchdown", "rush_touchdown", "receiving_touchdown",
+    "blitz_rate_def", "pressure_rate_def", "man_coverage_pct_def", "zone_coverage_pct_def",
+    "pass_pct_off", "rush_pct_off"
+]
+
+# Define rolling window size (example: 3 weeks)
+window_size = 3
+
 dfs = []
 
-for file in roster_files:
-    print(f"reading file:{file}")
-    df = pd.read_csv(file)
+for stage in stages:
+    print(f"reading stage:{stage}")
+    df = read_stage(stage)
     dfs.append(df)
 
-df_defense, df_offense, df_player_week, df_games, df_players = dfs
-
-df_players = df_players[['first_name', 'last_name', 'gsis_id']].drop_duplicates().reset_index(drop=True)
+df_defense, df_offense, df_player_week, df_games = dfs
+
+# Weeks that are new or changed in any input since the last run
+changed_weeks = set()
+input_hashes = {}
+for stage, df in zip(stages, dfs):
+    weeks, input_hashes[stage] = changed_partitions(df, f"rolling_2025.{stage}")
+    changed_weeks.update(weeks)
+
+state = RollingState.load("rolling_2025", rolling_cols, window_size) if args.incremental else None
+if args.incremental and state is None:
+    # Without every player's saved windows only a run over the full history gives a complete state
+    print("No saved rolling state, rebuilding the full 2025 table")
+incremental = state is not None
+append_only = False
+
+if incremental:
+    if not changed_weeks:
+        print("No new or changed weeks, 2025 final table is up to date")
+        raise SystemExit(0)
+    first_changed = min(changed_weeks)
+    changed_rows = in_partitions(df_player_week, sorted(changed_weeks))
+    append_only = state is not None and first_changed[0] * 100 + first_changed[1] > state.max_key
+    if append_only:
+        # Every changed week comes after the saved rolling state: only the new rows are needed
+        df_player_week = df_player_week[changed_rows]
+        print(f"Appending {len(df_player_week)} player-weeks from {first_changed[0]} week {first_changed[1]}")
+    else:
+        # Only players who play, or used to play, in a changed week can have different rows or rolling windows
+        touched = set(df_player_week.loc[changed_rows, 'player_id'].astype(str))
+        if stage_path("2025_final_data").exists():
+            previous = read_stage("2025_final_data", columns=['player_id', 'season', 'week'])
+            touched |= set(previous.loc[in_partitions(previous, sorted(changed_weeks)), 'player_id'].astype(str))
+        df_player_week = df_player_week[df_player_week['player_id'].astype(str).isin(touched)]
+        print(f"Recomputing {len(touched)} players from {first_changed[0]} week {first_changed[1]}")
+df_players = read_stage("roster_2025", columns=['first_name', 'last_name', 'gsis_id'])
+
+df_players = df_players.drop_duplicates().reset_index(drop=True)
 df_players['name'] = df_players['first_name'] + " " + df_players['last_name']
 
 df_players = df_players.rename(columns ={'gsis_id' : 'player_id'})
 df_players = df_players.drop(columns = ['first_name', 'last_name'])
 
-df_player_week = df_player_week.merge(
-    df_offense,
-    how='left',
-    on=['season', 'week', 'posteam']
-)
-
-df_player_week = df_player_week.merge(
-    df_defense,
-    how='left',
-    on=['season', 'week', 'defteam']
-)
-
-
-df_player_week = df_player_week.merge(
-    df_games,
-    how='left',
-    on=['season', 'week', 'game_id']
-)
+# Own-team offense and opponent defense by dense team-week gather, the game by its id
+df_player_week = attach(df_player_week, ContextTensor(df_offense, 'posteam'), 'posteam')
+df_player_week = attach(df_player_week, ContextTensor(df_defense, 'defteam'), 'defteam')
+df_player_week = attach_rows(df_player_week, df_games, ['season', 'week', 'game_id'])
 
 df_player_week = df_player_week.sort_values(['season', 'week', 'player_id']).reset_index(drop=True)
 
@@ -68,32 +115,18 @@ df_player_week = df_player_week.rename(columns={
     'zone_coverage_pct': 'zone_coverage_pct_def'
 })
 
-rolling_cols = [
-    "passing_yards", "pass_attempt", "complete_pass", "rush_plays",
-    "rushing_yards", "receiving_yards", "reception", "total_touches",
-    "rush_inside_10", "rush_inside_20", "target_inside_10", "target_inside_20",
-    "total_plays_off", "pass_plays_off", "rush_plays_off", "total_pass_plays",
-    "avg_yac_off", "avg_air_yards_off", "fantasy_points",
-    "pass_touchdown", "rush_touchdown", "receiving_touchdown",
-    "blitz_rate_def", "pressure_rate_def", "man_coverage_pct_def", "zone_coverage_pct_def",
-    "pass_pct_off", "rush_pct_off"
-]
-
-# Define rolling window size (example: 3 weeks)
-window_size = 3
-
 # Sort by player and week for proper rolling
 df_player_week = df_player_week.sort_values(['player_id','season','week'])
 
-# Compute rolling sums/means per player
-for col in rolling_cols:
-    # rolling mean
-    df_player_week[f'{col}_rolling_{window_size}'] = (
-        df_player_week.groupby('player_id')[col]
-        .rolling(window=window_size, min_periods=1)
-        .mean()
-        .reset_index(level=0, drop=True)
-    )
+if append_only:
+    # Roll the new weeks forward from each player's saved last values
+    df_player_week = pd.concat([df_player_week, state.update(df_player_week)], axis=1)
+else:
+    # Compute rolling means per player, all columns in one pass
+    with instrument.stage("rolling", rows_in=len(df_player_week)) as metrics:
+        df_player_week = add_rolling(df_player_week, rolling_cols, windows=(window_size,), name='{col}_rolling_{window}')
+        metrics.rows_out = len(df_player_week)
+    state = (state or RollingState(rolling_cols, window_size)).fit(df_player_week)
 
 
 df_player_week = df_player_week.merge(
@@ -102,6 +135,18 @@ df_player_week = df_player_week.merge(
     on=['player_id']
 )
 df_player_week = df_player_week[df_player_week['player_id'] != '0']
-df_player_week.to_csv("../2025/2025_final_data.csv", index=False)
+if incremental:
+    week_key = df_player_week['season'].astype(int) * 100 + df_player_week['week'].astype(int)
+    df_player_week = df_player_week[week_key >= first_changed[0] * 100 + first_changed[1]]
+    # Only the recomputed player-weeks are replaced, in the stage and in the database table
+    upsert_stage(df_player_week, "2025_final_data", export_csv=True, partitions=sorted(changed_weeks),
+                 engine=engine, table="final_data_2025")
+else:
+    write_stage(df_player_week, "2025_final_data", export_csv=True)
+    load_frame(df_player_week, "final_data_2025", engine)
+
+state.save("rolling_2025")
+for stage, hashes in input_hashes.items():
+    save_manifest(f"rolling_2025.{stage}", hashes)
 
 
@@ -0,0 +1,162 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from storage import CACHE_DIR
+
+STATE_DIR = CACHE_DIR / "rolling_state"
+
+
+def _week_key(df: pd.DataFrame) -> np.ndarray:
+    return df['season'].to_numpy(dtype=np.int64) * 100 + df['week'].to_numpy(dtype=np.int64)
+
+
+class RollingState:
+    """Last `window` values and running sums of each rolled column, per player.
+
+    Players are interned to dense slots, so all state lives in a few arrays:
+
+        buf      (players, window, cols)  ring buffer of the last values (NaN = empty)
+        sums     (players, cols)          running sum of the valid values in buf
+        valid    (players, cols)          number of valid values in buf
+        count    (players,)               rows applied so far (ring position = count % window)
+        last_key (players,)               season * 100 + week of the last applied row
+
+    Appending a week touches only the slots of the players in it, and gives
+    the same trailing means as rolling(window, min_periods=1).mean().
+    """
+
+    def __init__(self, cols, window: int = 3, key: str = 'player_id'):
+        self.cols = list(cols)
+        self.window = window
+        self.key = key
+        self.ids = np.array([], dtype=object)
+        self._slots = {}
+        k = len(self.cols)
+        self.buf = np.full((0, window, k), np.nan)
+        self.sums = np.zeros((0, k))
+        self.valid = np.zeros((0, k), dtype=np.int64)
+        self.count = np.zeros(0, dtype=np.int64)
+        self.last_key = np.full(0, -1, dtype=np.int64)
+
+    @property
+    def max_key(self) -> int:
+        """Latest season * 100 + week applied to any player (-1 when empty)."""
+        return int(self.last_key.max()) if len(self.last_key) else -1
+
+    def _intern(self, ids) -> np.ndarray:
+        """Slot of each id, appending new players to the arrays."""
+        ids = pd.Series(ids, dtype=object).astype(str).to_numpy()
+        new = [i for i in pd.unique(ids) if i not in self._slots]
+        if new:
+            start = len(self.ids)
+            self._slots.update({i: start + n for n, i in enumerate(new)})
+            self.ids = np.concatenate([self.ids, np.array(new, dtype=object)])
+            grow = len(new)
+            k = len(self.cols)
+            self.buf = np.concatenate([self.buf, np.full((grow, self.window, k), np.nan)])
+            self.sums = np.concatenate([self.sums, np.zeros((grow, k))])
+            self.valid = np.concatenate([self.valid, np.zeros((grow, k), dtype=np.int64)])
+            self.count = np.concatenate([self.count, np.zeros(grow, dtype=np.int64)])
+            self.last_key = np.concatenate([self.last_key, np.full(grow, -1, dtype=np.int64)])
+        return np.fromiter((self._slots[i] for i in ids), dtype=np.int64, count=len(ids))
+
+    def _order(self, df: pd.DataFrame):
+        """Slots, week keys, and (order, rank) so rank r holds each player's r-th row in week order."""
+        slots = self._intern(df[self.key].to_numpy())
+        keys = _week_key(df)
+        order = np.lexsort((keys, slots))
+        sorted_slots = slots[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = sorted_slots[1:] != sorted_slots[:-1]
+        pos = np.arange(len(order))
+        rank = pos - np.maximum.accumulate(np.where(first, pos, 0))
+        return slots, keys, order, rank
+
+    def update(self, df: pd.DataFrame, name: str = '{col}_rolling_{window}') -> pd.DataFrame:
+        """Apply new player-week rows and return their rolling means, aligned to df.index.
+
+        Rows for weeks a player already has in the state are skipped (their
+        features are NaN), so re-running the same week is harmless.
+        """
+        slots, keys, order, rank = self._order(df)
+        values = df[self.cols].to_numpy(dtype=np.float64, na_value=np.nan)
+        out = np.full(values.shape, np.nan)
+
+        skip = keys <= self.last_key[slots]
+        for r in range(int(rank.max()) + 1 if len(rank) else 0):
+            rows = order[rank == r]
+            rows = rows[~skip[rows]]
+            s = slots[rows]
+            ring = self.count[s] % self.window
+
+            old = self.buf[s, ring]
+            old_valid = ~np.isnan(old)
+            self.sums[s] -= np.where(old_valid, old, 0.0)
+            self.valid[s] -= old_valid
+
+            new = values[rows]
+            new_valid = ~np.isnan(new)
+            self.buf[s, ring] = new
+            self.sums[s] += np.where(new_valid, new, 0.0)
+            self.valid[s] += new_valid
+            self.count[s] += 1
+            self.last_key[s] = keys[rows]
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                out[rows] = np.where(self.valid[s] > 0, self.sums[s] / self.valid[s], np.nan)
+
+        return pd.DataFrame(out, index=df.index,
+                            columns=[name.format(col=col, window=self.window) for col in self.cols])
+
+    def fit(self, df: pd.DataFrame) -> 'RollingState':
+        """(Re)build the state of every player in df from their full history in df.
+
+        Players not in df keep their current state.
+        """
+        slots, keys, order, rank = self._order(df)
+        values = df[self.cols].to_numpy(dtype=np.float64, na_value=np.nan)
+        players = np.unique(slots)
+        self.buf[players] = np.nan
+
+        sorted_slots = slots[order]
+        total = np.bincount(sorted_slots, minlength=len(self.ids))
+        self.count[players] = total[players]
+        self.last_key[players] = -1
+        np.maximum.at(self.last_key, sorted_slots, keys[order])
+
+        # Only each player's last `window` rows stay in the ring
+        keep = rank >= total[sorted_slots] - self.window
+        rows = order[keep]
+        self.buf[slots[rows], rank[keep] % self.window] = values[rows]
+
+        kept = self.buf[players]
+        self.sums[players] = np.nansum(kept, axis=1)
+        self.valid[players] = (~np.isnan(kept)).sum(axis=1)
+        return self
+
+    def save(self, name: str) -> None:
+        STATE_DIR.mkdir(parents=True, exist_ok=True)
+        path = STATE_DIR / f"{name}.npz"
+        tmp = STATE_DIR / f"{name}.tmp.npz"
+        np.savez(tmp, cols=np.array(self.cols), window=self.window, key=self.key,
+                 ids=self.ids.astype(str), buf=self.buf, sums=self.sums, valid=self.valid,
+                 count=self.count, last_key=self.last_key)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, name: str, cols, window: int = 3, key: str = 'player_id'):
+        """Saved state for `name`, or None if there is none for these columns and window."""
+        path = STATE_DIR / f"{name}.npz"
+        if not path.exists():
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            if list(data['cols']) != list(cols) or int(data['window']) != window or str(data['key']) != key:
+                return None
+            state = cls(cols, window, key)
+            state.ids = data['ids'].astype(object)
+            state._slots = {i: n for n, i in enumerate(state.ids)}
+            for field in ['buf', 'sums', 'valid', 'count', 'last_key']:
+                setattr(state, field, data[field])
+        return state
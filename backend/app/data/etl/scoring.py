@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+# Stat columns every scoring config is expressed in. A config only lists the
+# stats it awards points for; anything missing is worth 0.
+STAT_COLUMNS = [
+    "passing_yards", "pass_touchdown", "interception",
+    "rushing_yards", "rush_touchdown",
+    "receiving_yards", "reception", "receiving_touchdown",
+    "return_touchdown", "fumble_lost",
+]
+
+PPR = {
+    "passing_yards": 0.04,
+    "pass_touchdown": 4,
+    "interception": -2,
+    "rushing_yards": 0.1,
+    "rush_touchdown": 6,
+    "receiving_yards": 0.1,
+    "reception": 1.0,
+    "receiving_touchdown": 6,
+    "return_touchdown": 6,
+    "fumble_lost": -2,
+}
+
+SCORING_CONFIGS = {
+    "ppr": PPR,
+    "half_ppr": {**PPR, "reception": 0.5},
+    "standard": {**PPR, "reception": 0.0},
+    "six_pt_pass_td": {**PPR, "pass_touchdown": 6},
+}
+
+DEFAULT_CONFIG = "ppr"
+
+
+def custom_config(base: str = DEFAULT_CONFIG, **points) -> dict:
+    """League rules as overrides on top of one of the built-in configs."""
+    unknown = set(points) - set(STAT_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown scoring stats: {sorted(unknown)}")
+    return {**SCORING_CONFIGS[base], **points}
+
+
+def scoring_matrix(configs=None):
+    """Return (config names, weight matrix of shape len(STAT_COLUMNS) x n_configs).
+
+    `configs` can be a config name, a list of names, or a dict of
+    name -> {stat: points} for custom league rules.
+    """
+    if configs is None:
+        configs = list(SCORING_CONFIGS)
+    if isinstance(configs, str):
+        configs = [configs]
+    if not isinstance(configs, dict):
+        configs = {name: SCORING_CONFIGS[name] for name in configs}
+
+    weights = np.zeros((len(STAT_COLUMNS), len(configs)))
+    for j, points in enumerate(configs.values()):
+        for stat, value in points.items():
+            weights[STAT_COLUMNS.index(stat), j] = value
+    return list(configs), weights
+
+
+def stat_matrix(df: pd.DataFrame) -> np.ndarray:
+    """Stack the scoring stats of `df` into a float matrix; absent columns and NaNs are 0."""
+    stats = np.zeros((len(df), len(STAT_COLUMNS)))
+    for i, col in enumerate(STAT_COLUMNS):
+        if col in df.columns:
+            stats[:, i] = df[col].fillna(0).to_numpy(dtype=float)
+    return stats
+
+
+def score(df: pd.DataFrame, configs=None, prefix: str = "fantasy_points", stats=None) -> pd.DataFrame:
+    """Add a `<prefix>_<config>` column per config, scored with one matrix multiply."""
+    names, weights = scoring_matrix(configs)
+    if stats is None:
+        stats = stat_matrix(df)
+    points = stats @ weights
+    for j, name in enumerate(names):
+        df[f"{prefix}_{name}"] = points[:, j]
+    return df
+
+
+def play_stats(plays: pd.DataFrame) -> pd.DataFrame:
+    """Scoring stats for raw pbp rows, each credited only when its player is on the play.
+
+    Passing stats need a passer, rushing stats a rusher and receiving stats a
+    receiver. A passing touchdown with a receiver also counts as a receiving
+    touchdown, and a lost fumble is only charged once per play.
+    """
+    has_passer = plays["passer_player_id"].notna().to_numpy()
+    has_rusher = plays["rusher_player_id"].notna().to_numpy()
+    has_receiver = plays["receiver_player_id"].notna().to_numpy()
+
+    def col(name):
+        return plays[name].fillna(0).to_numpy(dtype=float)
+
+    return pd.DataFrame({
+        "passing_yards": col("passing_yards") * has_passer,
+        "pass_touchdown": col("pass_touchdown") * has_passer,
+        "interception": col("interception") * has_passer,
+        "rushing_yards": col("rushing_yards") * has_rusher,
+        "rush_touchdown": col("rush_touchdown") * has_rusher,
+        "receiving_yards": col("receiving_yards") * has_receiver,
+        "reception": col("reception") * has_receiver,
+        "receiving_touchdown": col("pass_touchdown") * has_receiver,
+        "return_touchdown": col("return_touchdown"),
+        "fumble_lost": col("fumble_lost"),
+    }, index=plays.index)
+
+
+def score_plays(plays: pd.DataFrame, configs=None, prefix: str = "fantasy_points") -> pd.DataFrame:
+    """Play-level scoring: total fantasy points generated on each play, per config."""
+    return score(plays, configs, prefix, stats=stat_matrix(play_stats(plays)))
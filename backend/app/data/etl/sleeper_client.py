@@ -0,0 +1,187 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+SLEEPER_BASE_URL = os.getenv("SLEEPER_BASE_URL", "https://api.sleeper.app/v1")
+CALLS_PER_MINUTE = 1000
+
+# Statuses worth retrying: rate limited or a transient server-side failure
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class FetchFailure(Exception):
+    """A partition that could not be fetched after all retries."""
+
+    def __init__(self, partition, url, attempts, status=None, error=None):
+        self.partition = partition
+        self.url = url
+        self.attempts = attempts
+        self.status = status
+        self.error = error
+        super().__init__(f"{partition}: {url} failed after {attempts} attempt(s) "
+                         f"({status or error})")
+
+
+def _retry_after(response) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+
+class SleeperClient:
+    """Concurrent, rate-limited GETs against the Sleeper API.
+
+    Requests run on worker threads (one requests.Session each) behind a
+    token bucket sized to Sleeper's 1000 calls/min and a semaphore bounding
+    how many are in flight. 429s and 5xx/connection errors are retried with
+    exponential backoff (or the server's Retry-After); anything still failing
+    is returned as a FetchFailure instead of being printed and dropped.
+
+    With an HttpCache, pinned responses skip the network (and the limiter)
+    entirely and the rest are revalidated with conditional requests.
+    """
+
+    def __init__(self, base_url: str = SLEEPER_BASE_URL, calls_per_minute: float = CALLS_PER_MINUTE,
+                 concurrency: int = 8, retries: int = 4, backoff: float = 0.5, timeout: float = 30,
+                 cache=None):
+        self.base_url = base_url.rstrip("/")
+        self.calls_per_minute = calls_per_minute
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache = cache
+        self._local = threading.local()
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def _session(self) -> requests.Session:
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _get(self, url: str, headers=None) -> requests.Response:
+        return self._session().get(url, headers=headers, timeout=self.timeout)
+
+    def _result(self, url, response, parse, name, immutable):
+        if self.cache is None:
+            return parse(response.content)
+        if response is not None:
+            self.cache.store(url, response, immutable)
+        return self.cache.parsed(url, parse, name)
+
+    async def _fetch(self, partition, path, limiter, semaphore, parse, name, immutable):
+        url = self.url(path)
+        if self.cache is not None and self.cache.pinned(url, immutable):
+            return await asyncio.to_thread(self._result, url, None, parse, name, immutable)
+
+        status = error = None
+        for attempt in range(1, self.retries + 2):
+            headers = self.cache.validators(url) if self.cache is not None else None
+            async with semaphore:
+                await limiter.acquire()
+                try:
+                    response = await asyncio.to_thread(self._get, url, headers)
+                except requests.RequestException as e:
+                    response, status, error = None, None, repr(e)
+            if response is not None:
+                status = response.status_code
+                if status < 400:
+                    return await asyncio.to_thread(self._result, url, response, parse, name, immutable)
+                if status not in RETRY_STATUSES:
+                    break
+            if attempt > self.retries:
+                break
+            wait = _retry_after(response) if response is not None else None
+            if wait is None:
+                wait = self.backoff * 2 ** (attempt - 1) * (0.5 + random.random())
+            await asyncio.sleep(wait)
+        raise FetchFailure(partition, url, attempt, status, error)
+
+    async def fetch_all_async(self, paths: dict, parser=None, name: str = "json", immutable=None):
+        """Fetch {partition: path} concurrently; return ({partition: result}, [FetchFailure]).
+
+        Each result is parser(body, partition) (json.loads(body) by default).
+        With a cache, results are cached per content hash under `name`, and
+        partitions for which immutable(partition) is true are pinned.
+        """
+        limiter = TokenBucket(self.calls_per_minute / 60.0)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        partitions = list(paths)
+        outcomes = await asyncio.gather(
+            *(self._fetch(p, paths[p], limiter, semaphore,
+                          (lambda body, p=p: parser(body, p)) if parser else json.loads,
+                          name, bool(immutable and immutable(p)))
+              for p in partitions),
+            return_exceptions=True,
+        )
+        results, failures = {}, []
+        for partition, outcome in zip(partitions, outcomes):
+            if isinstance(outcome, FetchFailure):
+                failures.append(outcome)
+            elif isinstance(outcome, BaseException):
+                failures.append(FetchFailure(partition, self.url(paths[partition]), 1, error=repr(outcome)))
+            else:
+                results[partition] = outcome
+        return results, failures
+
+    def fetch_all(self, paths: dict, parser=None, name: str = "json", immutable=None):
+        return asyncio.run(self.fetch_all_async(paths, parser, name, immutable))
+
+    def get(self, path: str, parser=None, name: str = "json"):
+        """Single rate-limited, retried GET, parsed like fetch_all."""
+        results, failures = self.fetch_all({path: path}, parser, name)
+        if failures:
+            raise failures[0]
+        return results[path]
+
+
+def weekly_stats_paths(seasons, weeks=range(1, 19)) -> dict:
+    """{(season, week): path} for Sleeper's regular-season weekly stats."""
+    return {(season, week): f"stats/nfl/regular/{season}/{week}" for season in seasons for week in weeks}
+
+
+def failure_report(failures) -> str:
+    """One line per failed partition, sorted."""
+    lines = [f"{len(failures)} partition(s) failed:"]
+    for failure in sorted(failures, key=lambda f: str(f.partition)):
+        reason = f"HTTP {failure.status}" if failure.status else failure.error
+        lines.append(f"  {failure.partition}: {reason} after {failure.attempts} attempt(s) - {failure.url}")
+    return "\n".join(lines)
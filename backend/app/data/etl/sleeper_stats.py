@@ -0,0 +1,69 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+# Stat keys kept from the weekly payload; everything else is dropped while parsing
+WEEKLY_STAT_KEYS = ("off_snp",)
+
+PLAYER_COLS = ["full_name", "team", "position"]
+
+
+class _Stats(tuple):
+    """Selected stat values of one player, in key order."""
+
+
+def parse_weekly_stats(body: bytes, keys=WEEKLY_STAT_KEYS, season=None, week=None) -> pd.DataFrame:
+    """Columnar frame (sleeper_id, *keys[, season, week]) from a Sleeper weekly stats payload.
+
+    The payload is {sleeper_id: {stat: value, ...}} with hundreds of stats
+    per player. json's object_pairs_hook sees each player's object as soon
+    as it is parsed, keeps only the declared keys, and lets the rest go, so
+    the full dict-of-dicts (and its transposed object frame) never exists.
+    """
+    keys = tuple(keys)
+    wanted = {key: i for i, key in enumerate(keys)}
+    missing = (np.nan,) * len(keys)
+
+    def select(pairs):
+        if pairs and all(isinstance(value, _Stats) for _, value in pairs):
+            return pairs  # the top-level object: (sleeper_id, stats) pairs
+        values = list(missing)
+        for key, value in pairs:
+            i = wanted.get(key)
+            if i is not None and isinstance(value, (int, float)):
+                values[i] = value
+        return _Stats(values)
+
+    parsed = json.loads(body, object_pairs_hook=select)
+    pairs = parsed if isinstance(parsed, list) else []
+
+    columns = {"sleeper_id": np.array([pid for pid, _ in pairs], dtype=object)}
+    values = np.array([stats for _, stats in pairs], dtype=np.float64).reshape(len(pairs), len(keys))
+    for i, key in enumerate(keys):
+        columns[key] = values[:, i]
+    df = pd.DataFrame(columns)
+    if season is not None:
+        df["season"] = season
+    if week is not None:
+        df["week"] = week
+    return df
+
+
+def player_lookup(players_df: pd.DataFrame, key: str = "master_player_id") -> tuple:
+    """(index on player id, player columns) for repeated lookup_players calls."""
+    return pd.Index(players_df[key]), players_df[PLAYER_COLS].reset_index(drop=True)
+
+
+def lookup_players(ids, lookup) -> pd.DataFrame:
+    """Player columns for each id (NaN where unknown), like a left merge on a unique key."""
+    index, columns = lookup
+    positions = index.get_indexer(ids)
+    found = positions >= 0
+    out = {}
+    for col in columns.columns:
+        values = columns[col].to_numpy(dtype=object)
+        taken = np.full(len(positions), np.nan, dtype=object)
+        taken[found] = values[positions[found]]
+        out[col] = taken
+    return pd.DataFrame(out)
@@ -0,0 +1,122 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from instrument import record_read, record_write
+
+# ETL_DATA_DIR / ETL_CACHE_DIR point a run at another tree (e.g. synthetic benchmark data)
+DATA_DIR = Path(os.getenv("ETL_DATA_DIR", Path(__file__).resolve().parent.parent))
+CACHE_DIR = Path(os.getenv("ETL_CACHE_DIR", DATA_DIR / "cache"))
+
+# Stage name -> CSV path (relative to the data dir) it is exported to / was
+# historically read from. Stage-to-stage I/O goes through the typed Parquet
+# copy in CACHE_DIR; the CSV is only parsed when no Parquet copy exists yet.
+STAGES = {
+    "pbp_2021_2024": "play_by_play/pbp_2021_2024.csv",
+    "roster_2021_2024": "play_by_play/roster_2021_2024.csv",
+    "games_context_2021_2024": "play_by_play/games_context_2021_2024.csv",
+    "offense_tendencies_2021_2024": "play_by_play/offense_tendencies_2021_2024.csv",
+    "defense_tendencies_2021_2024": "play_by_play/defense_tendencies_2021_2024.csv",
+    "aggregated_player_week_redzone": "play_by_play/aggregated_player_week_redzone.csv",
+    "matchup_tendencies_2021_2024_clean": "play_by_play/matchup_tendencies_2021_2024_clean.csv",
+    "player_week_with_context": "play_by_play/player_week_with_context.csv",
+    "player_week_with_context_rolling": "play_by_play/player_week_with_context_rolling.csv",
+    "final_table_modeling": "play_by_play/final_table_modeling.csv",
+    "player_week_fixed_fantasy": "play_by_play/player_week_fixed_fantasy.csv",
+    "player_week_modeling_features": "play_by_play/player_week_modeling_features.csv",
+    "pbp_2025": "2025/pbp_2025_2025.csv",
+    "roster_2025": "2025/roster_2025_2025.csv",
+    "games_context_2025": "2025/games_context_2025_2025.csv",
+    "offense_tendencies_2025": "2025/offense_tendencies_2025_2025.csv",
+    "defense_tendencies_2025": "2025/defense_tendencies_2025_2025.csv",
+    "player_week_data_2025": "2025/player_week_data.csv",
+    "2025_final_data": "2025/2025_final_data.csv",
+}
+
+CATEGORICAL_COLS = {
+    "posteam", "defteam", "home_team", "away_team", "team", "position",
+    "play_type", "roof", "surface", "weekday",
+}
+
+FLAG_COLS = {
+    "rush_inside_10", "rush_inside_20", "target_inside_10", "target_inside_20",
+    "pass_attempt", "complete_pass", "reception", "interception", "fumble_lost",
+    "pass_touchdown", "rush_touchdown", "return_touchdown", "receiving_touchdown",
+    "starter_flag",
+}
+
+RATE_MARKERS = ("_pct", "_rate", "avg_")
+
+
+def stage_path(name: str) -> Path:
+    return CACHE_DIR / f"{name}.parquet"
+
+
+def csv_path(name: str) -> Path:
+    return DATA_DIR / STAGES[name]
+
+
+def apply_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Fixed storage dtypes: categorical teams, int8 flags, float32 rates."""
+    df = df.copy()
+    for col in df.columns:
+        values = df[col]
+        if col in CATEGORICAL_COLS and values.dtype == object:
+            df[col] = values.astype("category")
+        elif col in FLAG_COLS and pd.api.types.is_integer_dtype(values):
+            if values.min() >= -128 and values.max() <= 127:
+                df[col] = values.astype("int8")
+        elif pd.api.types.is_float_dtype(values) and any(m in col for m in RATE_MARKERS):
+            df[col] = values.astype("float32")
+    return df
+
+
+def write_stage(df: pd.DataFrame, name: str, export_csv: bool = False) -> Path:
+    """Write a stage as compressed, typed Parquet (and optionally its CSV export)."""
+    if export_csv:
+        df.to_csv(csv_path(name), index=False)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = stage_path(name)
+    table = pa.Table.from_pandas(apply_dtypes(df), preserve_index=False)
+    pq.write_table(table, path, compression="zstd")
+    record_write(f"stage:{name}", table.num_rows, path.stat().st_size)
+    return path
+
+
+def refresh_stage(name: str) -> Path:
+    """Parquet path of a stage, (re)built from its CSV if that is missing or newer."""
+    path = stage_path(name)
+    source = csv_path(name) if name in STAGES else None
+    if not path.exists() or (source is not None and source.exists()
+                             and source.stat().st_mtime > path.stat().st_mtime):
+        if source is None or not source.exists():
+            raise FileNotFoundError(f"No Parquet or CSV copy of stage '{name}'")
+        write_stage(pd.read_csv(source, low_memory=False), name)
+    return path
+
+
+def read_stage(name: str, columns=None, filters=None) -> pd.DataFrame:
+    """Load a stage, reading only `columns` (and rows matching pyarrow `filters`).
+
+    The Parquet file is memory-mapped so numeric columns convert to pandas
+    without an extra copy. If the stage only exists as CSV (or the CSV is
+    newer), it is parsed once and cached as Parquet for the next reader.
+    """
+    path = refresh_stage(name)
+    table = pq.read_table(path, columns=columns, filters=filters, memory_map=True)
+    record_read(f"stage:{name}", table.num_rows, table.nbytes)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def fill_na(df: pd.DataFrame, value=0) -> pd.DataFrame:
+    """DataFrame.fillna that also works on categorical columns (filled with str(value))."""
+    categorical = df.select_dtypes("category").columns
+    for col in categorical:
+        if df[col].isna().any():
+            if str(value) not in df[col].cat.categories:
+                df[col] = df[col].cat.add_categories([str(value)])
+            df[col] = df[col].fillna(str(value))
+    return df.fillna({col: value for col in df.columns if col not in categorical})
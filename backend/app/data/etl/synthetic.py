@@ -0,0 +1,331 @@
+"""Deterministic synthetic nflfastR-shaped tables for scale testing.
+
+Generates pbp, roster, games context and offense/defense tendency stages
+with the columns the ETL reads and distributions taken from the real
+2021-2025 data (play type mix, yardage, completion/TD/turnover rates,
+target and carry shares by depth slot); the tendency tables are computed
+from the synthetic pbp by tendencies.py itself. The same (plays, seasons, seed)
+always produces the same tables, and each season is generated from its
+own seed, so a season's plays do not depend on how many seasons are
+generated. pbp is written one season at a time, so 50M plays need about
+one season's worth of memory.
+
+    python synthetic.py --plays 1000000 --out /tmp/synthetic
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from storage import apply_dtypes
+from tendencies import split_sides, team_tendencies
+
+TEAMS = [
+    "ARI", "ATL", "BAL", "BUF", "CAR", "CHI", "CIN", "CLE", "DAL", "DEN", "DET", "GB",
+    "HOU", "IND", "JAX", "KC", "LA", "LAC", "LV", "MIA", "MIN", "NE", "NO", "NYG",
+    "NYJ", "PHI", "PIT", "SEA", "SF", "TB", "TEN", "WAS",
+]
+WEEKS = 17
+PLAYS_PER_SEASON = 46_000
+MAX_SEASONS = 25
+
+# Play type mix of real pbp (None = timeouts, end of quarter, ...)
+PLAY_TYPES = ["pass", "run", "no_play", "kickoff", "punt", None, "extra_point", "field_goal", "qb_kneel", "qb_spike"]
+PLAY_TYPE_P = [0.404, 0.296, 0.106, 0.060, 0.042, 0.030, 0.027, 0.024, 0.010, 0.001]
+
+# Depth slots per team-season, in order: QB1-3, RB1-4, WR1-6, TE1-3
+SLOTS = ["QB"] * 3 + ["RB"] * 4 + ["WR"] * 6 + ["TE"] * 3
+PASSER_SHARE = {0: 0.90, 1: 0.08, 2: 0.02}
+RUSH_SHARE = {3: 0.50, 4: 0.22, 5: 0.10, 6: 0.03, 0: 0.10, 7: 0.03, 8: 0.02}
+TARGET_SHARE = {7: 0.22, 8: 0.17, 9: 0.12, 10: 0.05, 11: 0.02, 12: 0.01,
+                13: 0.14, 14: 0.04, 15: 0.01, 3: 0.10, 4: 0.05, 5: 0.02, 6: 0.01}
+# Defender credits per pass attempt, giving the real blitz (~0.08), pressure (~0.15) and man (~0.11) rates
+SACK_P = 0.065
+DEFENDER_P = {"tackle_for_loss_1_player_id": 0.012, "tackle_for_loss_2_player_id": 0.001,
+              "qb_hit_1_player_id": 0.09, "qb_hit_2_player_id": 0.005,
+              "pass_defense_1_player_id": 0.11, "pass_defense_2_player_id": 0.008}
+TURNOVER = 0.25  # share of depth slots filled by a new player each season
+
+FIRST_NAMES = np.array(["James", "Josh", "Justin", "Lamar", "Patrick", "Joe", "Derrick", "Christian", "Tyreek",
+                        "Davante", "Travis", "George", "Cooper", "Amon", "Ja'Marr", "Saquon", "Jalen", "Bijan",
+                        "Dak", "Kyler", "Mike", "Chris", "DJ", "AJ", "Deebo", "Nick", "Tony", "Kenneth"], dtype=object)
+LAST_NAMES = np.array(["Allen", "Jackson", "Mahomes", "Burrow", "Henry", "McCaffrey", "Hill", "Adams", "Kelce",
+                       "Kittle", "Kupp", "St. Brown", "Chase", "Barkley", "Hurts", "Robinson", "Prescott", "Murray",
+                       "Evans", "Godwin", "Moore", "Brown", "Samuel", "Chubb", "Pollard", "Walker", "Smith",
+                       "Johnson", "Williams", "Davis"], dtype=object)
+
+
+def default_seasons(plays: int) -> int:
+    """About one real season per 46k plays, capped at 25; beyond that games just get more plays."""
+    return int(np.clip(round(plays / PLAYS_PER_SEASON), 1, MAX_SEASONS))
+
+
+def _choice(rng, shares: dict, size: int) -> np.ndarray:
+    keys = np.array(list(shares))
+    p = np.array(list(shares.values()), dtype=np.float64)
+    return keys[rng.choice(len(keys), size=size, p=p / p.sum())]
+
+
+def depth_charts(season_list, seed: int = 0) -> tuple:
+    """(slot player codes [season, team, slot], player table) with yearly turnover."""
+    rng = np.random.default_rng([seed, 0])
+    slots = np.empty((len(season_list), len(TEAMS), len(SLOTS)), dtype=np.int64)
+    next_id = 0
+    for i in range(len(season_list)):
+        if i == 0:
+            new = np.ones((len(TEAMS), len(SLOTS)), dtype=bool)
+        else:
+            slots[i] = slots[i - 1]
+            new = rng.random((len(TEAMS), len(SLOTS))) < TURNOVER
+        slots[i][new] = np.arange(next_id, next_id + new.sum())
+        next_id += new.sum()
+
+    n = next_id
+    first = FIRST_NAMES[rng.integers(len(FIRST_NAMES), size=n)]
+    last = LAST_NAMES[rng.integers(len(LAST_NAMES), size=n)]
+    birth = (np.datetime64("1990-01-01") + rng.integers(0, 365 * 12, size=n)).astype(str)
+    players = pd.DataFrame({
+        "gsis_id": np.char.add("00-", np.char.zfill((30_000 + np.arange(n)).astype(str), 7)).astype(object),
+        "first_name": first,
+        "last_name": last,
+        "full_name": first + " " + last,
+        "birth_date": birth.astype(object),
+        "sleeper_id": np.where(rng.random(n) < 0.7, 1_000 + np.arange(n), np.nan),
+        "height": rng.normal(73, 2.5, size=n).round(),
+        "weight": rng.normal(215, 20, size=n).round(),
+    })
+    return slots, players
+
+
+def roster(season_list, slots: np.ndarray, players: pd.DataFrame) -> pd.DataFrame:
+    s, t, k = np.meshgrid(np.arange(len(season_list)), np.arange(len(TEAMS)), np.arange(len(SLOTS)), indexing="ij")
+    codes = slots.ravel()
+    df = players.iloc[codes].reset_index(drop=True)
+    df.insert(0, "season", np.asarray(season_list)[s.ravel()])
+    df.insert(1, "team", np.asarray(TEAMS, dtype=object)[t.ravel()])
+    df.insert(2, "position", np.asarray(SLOTS, dtype=object)[k.ravel()])
+    df["depth_chart_position"] = df["position"]
+    df["status"] = "ACT"
+    df["week"] = 1
+    first_season = pd.Series(df["season"]).groupby(df["gsis_id"]).transform("min")
+    df["years_exp"] = (df["season"] - first_season).astype(np.int64)
+    return df
+
+
+def schedule(season: int, rng) -> pd.DataFrame:
+    """16 games a week: a random pairing of all 32 teams, first of each pair at home."""
+    pairs = np.stack([rng.permutation(len(TEAMS)).reshape(-1, 2) for _ in range(WEEKS)])
+    week = np.repeat(np.arange(1, WEEKS + 1), len(TEAMS) // 2)
+    home, away = pairs[..., 0].ravel(), pairs[..., 1].ravel()
+    teams = np.asarray(TEAMS, dtype=object)
+    n = len(week)
+
+    thursday = rng.random(n) < 0.06
+    gameday = np.datetime64(f"{season}-09-07") + (week - 1) * 7 - np.where(thursday, 3, 0)
+    spread = np.round(rng.normal(0, 6, size=n) * 2) / 2
+    total = np.round(rng.normal(45, 4, size=n) * 2) / 2
+    p_home = 1 / (1 + 10 ** (-spread / 13))
+
+    def moneyline(p):
+        return np.where(p >= 0.5, -100 * p / (1 - p), 100 * (1 - p) / p).round()
+
+    roof = rng.choice(["outdoors", "dome", "closed", "open"], size=n, p=[0.6, 0.25, 0.1, 0.05])
+    indoors = np.isin(roof, ["dome", "closed"])
+    games = pd.DataFrame({
+        "game_id": [f"{season}_{w:02d}_{teams[a]}_{teams[h]}" for w, a, h in zip(week, away, home)],
+        "season": season,
+        "week": week,
+        "gameday": gameday.astype(str).astype(object),
+        "weekday": np.where(thursday, "Thursday", "Sunday").astype(object),
+        "gametime": rng.choice(["13:00", "16:25", "20:20"], size=n, p=[0.6, 0.3, 0.1]).astype(object),
+        "home_team": teams[home],
+        "away_team": teams[away],
+        "home_score": np.maximum(rng.normal(total / 2 + spread / 2, 9), 0).round().astype(np.int64),
+        "away_score": np.maximum(rng.normal(total / 2 - spread / 2, 9), 0).round().astype(np.int64),
+        "home_rest": rng.choice([7, 6, 10, 14], size=n, p=[0.8, 0.08, 0.07, 0.05]),
+        "away_rest": rng.choice([7, 6, 10, 14], size=n, p=[0.8, 0.08, 0.07, 0.05]),
+        "spread_line": spread,
+        "total_line": total,
+        "over_odds": rng.choice([-105, -108, -110, -112], size=n),
+        "under_odds": rng.choice([-105, -108, -110, -112], size=n),
+        "home_moneyline": moneyline(p_home).astype(np.int64),
+        "away_moneyline": (-moneyline(p_home)).astype(np.int64),
+        "roof": roof.astype(object),
+        "surface": rng.choice(["grass", "fieldturf"], size=n).astype(object),
+        "temp": np.where(indoors, np.nan, rng.normal(60, 15, size=n).round()),
+        "wind": np.where(indoors, np.nan, np.abs(rng.normal(0, 9, size=n)).round()),
+        "stadium_id": np.char.add(teams[home].astype(str), "00").astype(object),
+    })
+    games["game_date"] = games["gameday"]
+    games["_home"] = home
+    games["_away"] = away
+    return games
+
+
+def plays(season: int, n: int, games: pd.DataFrame, slots: np.ndarray, players: pd.DataFrame, rng) -> pd.DataFrame:
+    """n plays spread over the season's games, one row per snap like nflfastR pbp."""
+    game = np.repeat(np.arange(len(games)), rng.multinomial(n, np.full(len(games), 1 / len(games))))
+    home_ball = rng.random(n) < 0.5
+    home, away = games["_home"].to_numpy()[game], games["_away"].to_numpy()[game]
+    pos, dfn = np.where(home_ball, home, away), np.where(home_ball, away, home)
+
+    ptype = rng.choice(len(PLAY_TYPES), size=n, p=np.array(PLAY_TYPE_P) / sum(PLAY_TYPE_P))
+    is_pass, is_run = ptype == 0, ptype == 1
+    scrimmage = is_pass | is_run
+    no_type = np.array([t is None for t in PLAY_TYPES])[ptype]
+
+    yardline = np.clip(rng.normal(47.3, 23.7, size=n).round(), 1, 99)
+    yardline[no_type] = np.nan
+    down = rng.choice([1.0, 2.0, 3.0, 4.0], size=n, p=[0.42, 0.32, 0.22, 0.04])
+    down[~(scrimmage | (ptype == 2) | (ptype == 4) | (ptype == 7))] = np.nan
+    ydstogo = np.clip(rng.normal(8.5, 4, size=n).round(), 1, 40).astype(np.int64)
+
+    codes = slots[pos]  # [play, slot] player codes of the offense
+    gsis = players["gsis_id"].to_numpy(dtype=object)
+    rows = np.arange(n)
+
+    def pick(mask, shares):
+        ids = np.full(n, None, dtype=object)
+        idx = rows[mask]
+        ids[idx] = gsis[codes[idx, _choice(rng, shares, len(idx))]]
+        return ids
+
+    # --- Passing ---
+    passer = pick(is_pass, PASSER_SHARE)
+    receiver = pick(is_pass, TARGET_SHARE)
+    no_target = is_pass & (rng.random(n) < 0.10)
+    receiver[no_target] = None
+    targeted = is_pass & ~no_target
+    complete = targeted & (rng.random(n) < 0.685)
+    air = np.where(targeted, np.clip(rng.normal(7.5, 10, size=n).round(), -10, 60), np.nan)
+    yac = np.where(complete, np.round(rng.exponential(5, size=n)) - 1, np.nan)
+    pass_td = complete & (rng.random(n) < np.where(yardline <= 10, 0.35, 0.05))
+    rec_yards = np.where(complete, np.minimum(air + yac, yardline), np.nan)
+    rec_yards[pass_td] = yardline[pass_td]
+    interception = targeted & ~complete & (rng.random(n) < 0.05)
+
+    # --- Rushing ---
+    rusher = pick(is_run, RUSH_SHARE)
+    rush_td = is_run & (rng.random(n) < np.where(yardline <= 5, 0.40, np.where(yardline <= 10, 0.15, 0.012)))
+    rush_yards = np.where(is_run, np.minimum(np.clip(rng.normal(4.3, 6.3, size=n).round(), -10, 99), yardline), np.nan)
+    rush_yards[rush_td] = yardline[rush_td]
+
+    # --- Defenders credited on pass plays (tendencies.py's blitz/pressure/coverage heuristics) ---
+    teams = np.asarray(TEAMS, dtype=object)
+    defender = np.char.add("00-D", teams.astype(str)).astype(object)[dfn]
+    sacked = is_pass & (rng.random(n) < SACK_P)
+
+    def credited(p):
+        # A sacked QB is not also hit, tackled for a loss or defended
+        return np.where(is_pass & ~sacked & (rng.random(n) < p), defender, None)
+
+    credits = {col: credited(p) for col, p in DEFENDER_P.items()}
+
+    df = pd.DataFrame({
+        "game_id": games["game_id"].to_numpy()[game],
+        "season": season,
+        "week": games["week"].to_numpy()[game],
+        "posteam": teams[pos],
+        "defteam": teams[dfn],
+        "play_type": np.asarray(PLAY_TYPES, dtype=object)[ptype],
+        "down": down,
+        "ydstogo": ydstogo,
+        "yardline_100": yardline,
+        "passer_player_id": passer,
+        "rusher_player_id": rusher,
+        "receiver_player_id": receiver,
+        "air_yards": air,
+        "yards_after_catch": yac,
+        "rushing_yards": rush_yards,
+        "pass_touchdown": pass_td.astype(np.float64),
+        "rush_touchdown": rush_td.astype(np.float64),
+        "return_touchdown": (np.isin(ptype, [3, 4]) & (rng.random(n) < 0.002)).astype(np.float64),
+        "interception": interception.astype(np.float64),
+        "fumble_lost": (scrimmage & (rng.random(n) < 0.0056)).astype(np.float64),
+        "pass_attempt": is_pass.astype(np.float64),
+        "rush_attempt": (is_run | (ptype == PLAY_TYPES.index("qb_kneel"))).astype(np.float64),
+        "complete_pass": complete.astype(np.float64),
+        "reception": complete.astype(np.float64),
+        "receiving_yards": rec_yards,
+        "sack_player_id": np.where(sacked, defender, None),
+        **credits,
+    })
+    return df
+
+
+def generate_season(season: int, n: int, slots: np.ndarray, players: pd.DataFrame, seed: int = 0) -> dict:
+    """{'pbp', 'games_context', 'offense_tendencies', 'defense_tendencies'} for one season."""
+    rng = np.random.default_rng([seed, season])
+    games = schedule(season, rng)
+    pbp = plays(season, n, games, slots, players, rng)
+    offense, defense = split_sides(team_tendencies(pbp))
+    return {
+        "pbp": pbp,
+        "games_context": games.drop(columns=["_home", "_away"]),
+        "offense_tendencies": offense,
+        "defense_tendencies": defense,
+    }
+
+
+def generate(plays: int = 100_000, seasons: int = None, seed: int = 0, first_season: int = None) -> dict:
+    """All synthetic tables in memory (for small scales; write_synthetic streams pbp to disk)."""
+    parts = {}
+    for name, frame in _seasons(plays, seasons, seed, first_season):
+        parts.setdefault(name, []).append(frame)
+    return {name: pd.concat(frames, ignore_index=True) for name, frames in parts.items()}
+
+
+def _seasons(plays, seasons, seed, first_season):
+    seasons = seasons or default_seasons(plays)
+    first_season = first_season or 2025 - seasons + 1
+    season_list = list(range(first_season, first_season + seasons))
+    slots, players = depth_charts(season_list, seed)
+    yield "roster", roster(season_list, slots, players)
+    quota = np.full(seasons, plays // seasons) + (np.arange(seasons) < plays % seasons)
+    for i, season in enumerate(season_list):
+        for name, frame in generate_season(season, int(quota[i]), slots[i], players, seed).items():
+            yield name, frame
+
+
+def write_synthetic(out_dir, plays: int = 100_000, seasons: int = None, seed: int = 0,
+                    suffix: str = "2021_2024") -> dict:
+    """Write the tables as Parquet stages ({table}_{suffix}.parquet) under out_dir.
+
+    Point the ETL at them with ETL_CACHE_DIR=out_dir (and ETL_DATA_DIR at a
+    directory without the real CSVs). Returns {stage name: rows}.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    writers, parts, rows = {}, {}, {}
+    for name, frame in _seasons(plays, seasons, seed, None):
+        stage = f"{name}_{suffix}"
+        rows[stage] = rows.get(stage, 0) + len(frame)
+        if name != "pbp":
+            parts.setdefault(stage, []).append(frame)
+            continue
+        table = pa.Table.from_pandas(apply_dtypes(frame), preserve_index=False)
+        if stage not in writers:
+            writers[stage] = pq.ParquetWriter(out_dir / f"{stage}.parquet", table.schema, compression="zstd")
+        writers[stage].write_table(table.cast(writers[stage].schema))
+    for writer in writers.values():
+        writer.close()
+    for stage, frames in parts.items():
+        table = pa.Table.from_pandas(apply_dtypes(pd.concat(frames, ignore_index=True)), preserve_index=False)
+        pq.write_table(table, out_dir / f"{stage}.parquet", compression="zstd")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic pbp/roster/context/tendency stages")
+    parser.add_argument("--plays", type=float, default=100_000, help="total plays (e.g. 1e6)")
+    parser.add_argument("--seasons", type=int, default=None, help="default: one per ~46k plays, at most 25")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--suffix", default="2021_2024", help="stage name suffix the ETL scripts read")
+    parser.add_argument("--out", required=True, help="directory to write the Parquet stages to")
+    args = parser.parse_args()
+
+    for stage, n in write_synthetic(args.out, int(args.plays), args.seasons, args.seed, args.suffix).items():
+        print(f"{stage}: {n:,} rows")
@@ -0,0 +1,213 @@
+"""Team offense/defense tendencies per (season, week, team), replacing offensive.R and fetch_def.R.
+
+Computes the same tables the R scripts wrote, with their NA semantics
+(e.g. deep_pass_pct is NA for a team-week with any pass attempt missing
+air_yards, as R's sum() without na.rm gives), from the pbp stage that is
+already loaded, as one bincount pass per team column. Older pbp fetches
+lack rush_attempt (derived from play_type, as nflfastR counts runs and
+kneels) and the defender id columns (their rates come out NA). With --incremental
+only (season, week) partitions of pbp that changed since the last run are
+recomputed and replaced in the saved stages.
+
+    python tendencies.py                      # pbp_2021_2024 -> *_tendencies_2021_2024
+    python tendencies.py --suffix 2025 --incremental
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+import instrument
+from incremental import changed_partitions, in_partitions, save_manifest, upsert_stage
+from partitioned import map_partitions
+from storage import read_stage, refresh_stage, stage_path, write_stage
+
+OFFENSE_COLS = ['pass_attempt', 'rush_attempt', 'yardline_100', 'air_yards', 'yards_after_catch']
+DEFENSE_FLAGS = {
+    # Blitz heuristic: TFL or sack
+    'blitz': ['tackle_for_loss_1_player_id', 'tackle_for_loss_2_player_id', 'sack_player_id'],
+    # Pressure heuristic: QB hit or sack
+    'pressure': ['qb_hit_1_player_id', 'qb_hit_2_player_id', 'sack_player_id'],
+    # Coverage heuristic: man if any defender is credited with a pass defended
+    'man_coverage': ['pass_defense_1_player_id', 'pass_defense_2_player_id'],
+}
+PBP_COLS = (['season', 'week', 'posteam', 'defteam'] + OFFENSE_COLS
+            + sorted({c for cols in DEFENSE_FLAGS.values() for c in cols}))
+WEEK_KEYS = ['season', 'week']
+# nflfastR's rush_attempt: designed runs and QB kneels
+RUSH_PLAY_TYPES = ['run', 'qb_kneel']
+
+
+def missing_columns(stage: str) -> list:
+    """PBP_COLS that the pbp stage lacks (older fetches did not select rush_attempt or the defender ids)."""
+    present = set(pq.read_schema(refresh_stage(stage)).names)
+    return [c for c in PBP_COLS if c not in present]
+
+
+def read_pbp(stage: str) -> pd.DataFrame:
+    """The PBP_COLS of a pbp stage, filling in what older fetches did not select.
+
+    rush_attempt is derived from play_type (NA where play_type is); a
+    missing defender id column is left out, and defense_tendencies reports
+    NA for the rates that need it.
+    """
+    missing = missing_columns(stage)
+    columns = [c for c in PBP_COLS if c not in missing]
+    if 'rush_attempt' in missing:
+        if 'play_type' not in pq.read_schema(refresh_stage(stage)).names:
+            raise SystemExit(f"{stage} has neither rush_attempt nor play_type; re-run the fetch step")
+        columns.append('play_type')
+    if missing:
+        print(f"⚠ {stage} has no {missing}; deriving rush_attempt from play_type, "
+              f"defender-based rates will be NA. Re-fetch pbp to fill them")
+    pbp = read_stage(stage, columns=columns)
+    if 'rush_attempt' in missing:
+        play_type = pbp.pop('play_type')
+        pbp['rush_attempt'] = play_type.isin(RUSH_PLAY_TYPES).astype(np.float64).where(play_type.notna())
+    return pbp
+
+
+def _groups(pbp: pd.DataFrame, team: str) -> tuple:
+    """Group code per row and the (season, week, team) frame of the groups, sorted like dplyr (NA team last)."""
+    keys = pbp[['season', 'week', team]].reset_index(drop=True)
+    codes = [pd.factorize(keys[c], sort=True, use_na_sentinel=False)[0] for c in keys.columns]
+    # factorize(sort=True, use_na_sentinel=False) puts NaN last, as dplyr sorts NA last
+    sizes = [c.max() + 1 if len(c) else 0 for c in codes]
+    flat = (codes[0] * sizes[1] + codes[1]) * sizes[2] + codes[2]
+    uniques, group = np.unique(flat, return_inverse=True)
+    first = np.zeros(len(uniques), dtype=np.int64)
+    first[group[::-1]] = np.arange(len(group))[::-1]
+    return group, keys.iloc[first].reset_index(drop=True)
+
+
+def _sum(group, n, values):
+    return np.bincount(group, weights=values, minlength=n)
+
+
+def _any(group, n, mask):
+    return np.bincount(group, weights=mask.astype(np.float64), minlength=n) > 0
+
+
+def offense_tendencies(pbp: pd.DataFrame) -> pd.DataFrame:
+    """offensive.R: pass/rush mix, red zone pass share, deep pass share, air yards and YAC per team-week."""
+    pass_att = pbp['pass_attempt'].to_numpy(dtype=np.float64)
+    rush_att = pbp['rush_attempt'].to_numpy(dtype=np.float64)
+    plays = pbp[(pass_att == 1) | (rush_att == 1)]
+    if plays.empty:
+        return pd.DataFrame(columns=['season', 'week', 'posteam', 'total_plays', 'pass_plays', 'rush_plays',
+                                     'pass_pct', 'rush_pct', 'red_zone_pass_pct', 'deep_pass_pct',
+                                     'avg_air_yards', 'avg_yards_after_catch'])
+    group, out = _groups(plays, 'posteam')
+    n = len(out)
+
+    pass_att = plays['pass_attempt'].to_numpy(dtype=np.float64)
+    is_pass = pass_att == 1
+    yardline = plays['yardline_100'].to_numpy(dtype=np.float64)
+    air = plays['air_yards'].to_numpy(dtype=np.float64)
+    yac = plays['yards_after_catch'].to_numpy(dtype=np.float64)
+
+    out['total_plays'] = np.bincount(group, minlength=n)
+    out['pass_plays'] = np.bincount(group, weights=is_pass, minlength=n).astype(np.int64)
+    out['rush_plays'] = out['total_plays'] - out['pass_plays']
+    out['pass_pct'] = out['pass_plays'] / out['total_plays']
+    out['rush_pct'] = out['rush_plays'] / out['total_plays']
+
+    # red_zone = yardline_100 <= 20 (NA when yardline is); sums without na.rm turn NA if any term is
+    red_zone = (yardline <= 20).astype(np.float64)
+    red_zone_na = np.isnan(yardline)
+    rz_pass_na = (np.isnan(pass_att) & (red_zone == 1)) | ((pass_att != 0) & red_zone_na)
+    rz_pass = _sum(group, n, np.where(rz_pass_na, 0, (pass_att != 0) & (red_zone == 1)))
+    rz = _sum(group, n, np.where(red_zone_na, 0, red_zone))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        red_zone_pct = rz_pass / rz
+    red_zone_pct[_any(group, n, rz_pass_na) | _any(group, n, red_zone_na)] = np.nan
+    out['red_zone_pass_pct'] = red_zone_pct
+
+    # deep_pass = pass_attempt == 1 & air_yards >= 20, NA where that is unknown
+    deep_na = (is_pass & np.isnan(air)) | (np.isnan(pass_att) & ~(air < 20))
+    deep = _sum(group, n, np.where(deep_na, 0, is_pass & (air >= 20)))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        deep_pct = deep / out['pass_plays'].to_numpy()
+    deep_pct[_any(group, n, deep_na)] = np.nan
+    out['deep_pass_pct'] = deep_pct
+
+    # mean(x[pass_attempt == 1], na.rm = TRUE)
+    for col, values in (('avg_air_yards', air), ('avg_yards_after_catch', yac)):
+        used = is_pass & ~np.isnan(values)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[col] = _sum(group, n, np.where(used, values, 0)) / _sum(group, n, used)
+    return out
+
+
+def defense_tendencies(pbp: pd.DataFrame) -> pd.DataFrame:
+    """fetch_def.R: blitz, pressure and coverage heuristics per defense-week over pass attempts."""
+    passes = pbp[pbp['pass_attempt'].to_numpy(dtype=np.float64) == 1]
+    group, out = _groups(passes, 'defteam')
+    n = len(out)
+    out['total_pass_plays'] = np.bincount(group, minlength=n)
+    total = out['total_pass_plays'].to_numpy()
+    # A heuristic whose defender columns were not fetched is unknown, not zero
+    flags = {name: passes[cols].notna().any(axis=1).to_numpy() if all(c in passes for c in cols) else None
+             for name, cols in DEFENSE_FLAGS.items()}
+    for name, rate in (('blitz', 'blitz_rate'), ('pressure', 'pressure_rate'), ('man_coverage', 'man_coverage_pct')):
+        out[rate] = _sum(group, n, flags[name]) / total if flags[name] is not None else np.nan
+    man = flags['man_coverage']
+    out['zone_coverage_pct'] = _sum(group, n, ~man) / total if man is not None else np.nan
+    return out
+
+
+def team_tendencies(pbp: pd.DataFrame) -> pd.DataFrame:
+    """Both tables for one pbp partition, stacked with a 'side' column (for map_partitions)."""
+    return pd.concat([offense_tendencies(pbp).assign(side='offense'),
+                      defense_tendencies(pbp).assign(side='defense')], ignore_index=True)
+
+
+def split_sides(stacked: pd.DataFrame) -> tuple:
+    offense = stacked[stacked['side'] == 'offense'].drop(columns=['side', 'defteam', 'total_pass_plays',
+                                                                   'blitz_rate', 'pressure_rate',
+                                                                   'man_coverage_pct', 'zone_coverage_pct'],
+                                                          errors='ignore')
+    defense = stacked[stacked['side'] == 'defense'][['season', 'week', 'defteam', 'total_pass_plays', 'blitz_rate',
+                                                      'pressure_rate', 'man_coverage_pct', 'zone_coverage_pct']]
+    offense = offense.astype({c: np.int64 for c in ['total_plays', 'pass_plays', 'rush_plays']})
+    defense = defense.astype({'total_pass_plays': np.int64})
+    return offense.reset_index(drop=True), defense.reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute offense/defense tendencies from a pbp stage")
+    parser.add_argument("--suffix", default="2021_2024", help="reads pbp_<suffix>, writes *_tendencies_<suffix>")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only recompute weeks whose pbp changed since the last run")
+    parser.add_argument("--processes", type=int, default=1, help="compute seasons in parallel")
+    args = parser.parse_args()
+
+    pbp_stage = f"pbp_{args.suffix}"
+    names = (f"offense_tendencies_{args.suffix}", f"defense_tendencies_{args.suffix}")
+
+    # === Step 1: Load only the columns the tendencies use ===
+    pbp = read_pbp(pbp_stage)
+    changed_weeks, hashes = changed_partitions(pbp, f"tendencies.{pbp_stage}", keys=WEEK_KEYS)
+    incremental = args.incremental and all(stage_path(name).exists() for name in names)
+    if incremental:
+        if not changed_weeks:
+            print("No new or changed weeks, tendencies are up to date")
+            raise SystemExit(0)
+        print(f"Recomputing tendencies for weeks: {changed_weeks}")
+        pbp = pbp[in_partitions(pbp, changed_weeks, WEEK_KEYS)]
+
+    # === Step 2: Aggregate (one task per season with --processes) ===
+    with instrument.stage("team_tendencies", rows_in=len(pbp)) as metrics:
+        offense, defense = split_sides(map_partitions(team_tendencies, pbp, keys=['season'],
+                                                      processes=args.processes))
+        metrics.rows_out = len(offense) + len(defense)
+
+    # === Step 3: Save (changed weeks replace their old rows) ===
+    for df, name in zip((offense, defense), names):
+        if incremental:
+            upsert_stage(df, name, keys=WEEK_KEYS, sort_by=['season', 'week', df.columns[2]], export_csv=True)
+        else:
+            write_stage(df, name, export_csv=True)
+    save_manifest(f"tendencies.{pbp_stage}", hashes)
+    print(f"✅ Saved {len(offense)} offense and {len(defense)} defense team-weeks")
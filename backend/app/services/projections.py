@@ -0,0 +1,58 @@
+"""Player projections from the trained LightGBM models.
+
+Features are built with the same registered transforms the trainers use
+(ml/features.py), from the same model specs (ml/train_all.py), so a
+served prediction sees exactly the inputs the model was trained on.
+"""
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ML_DIR = Path(__file__).resolve().parents[3] / "ml"
+sys.path.append(str(ML_DIR))
+from features import apply_features, required_inputs
+from train_all import MODEL_DIR, MODEL_SPECS, row_mask
+
+SPECS = {spec.name: spec for spec in MODEL_SPECS}
+KEYS = ["player_id", "season", "week"]
+
+
+def available_models() -> list:
+    return sorted(name for name, spec in SPECS.items() if (MODEL_DIR / spec.model_file).exists())
+
+
+@lru_cache(maxsize=None)
+def load_model(name: str):
+    import lightgbm as lgb
+    return lgb.Booster(model_file=str(MODEL_DIR / SPECS[name].model_file))
+
+
+def model_inputs(name: str) -> list:
+    """Raw final_modeling_data columns a caller must supply for `name`."""
+    spec = SPECS[name]
+    return list(dict.fromkeys(KEYS + required_inputs(spec.features) + [c for c, _, _ in spec.row_filter]))
+
+
+def project(rows: pd.DataFrame, name: str, season: int, week: int) -> pd.DataFrame:
+    """Predictions of model `name` for every player with a row in (season, week).
+
+    rows holds final_modeling_data-shaped rows (model_inputs(name)) for the
+    week being projected and the players' earlier weeks. Earlier weeks pass
+    through the model's row filter before rolling features are computed,
+    exactly as in training; the projected week itself is always kept.
+    """
+    spec = SPECS[name]
+    target = (rows["season"] == season) & (rows["week"] == week)
+    earlier = (rows["season"] < season) | ((rows["season"] == season) & (rows["week"] < week))
+    history = rows[earlier]
+    kept = row_mask(lambda col: history[col].to_numpy(dtype=np.float64, na_value=np.nan),
+                    spec.row_filter, len(history))
+    frame = pd.concat([history[kept], rows[target]], ignore_index=True)
+
+    frame = apply_features(frame, spec.features)
+    frame = frame[(frame["season"] == season) & (frame["week"] == week)]
+    predictions = load_model(name).predict(frame[spec.features].to_numpy(dtype=np.float64, na_value=np.nan))
+    return frame[KEYS].assign(**{f"predicted_{spec.target}": predictions}).reset_index(drop=True)
@@ -0,0 +1,123 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, inspect
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "app" / "data" / "etl"))
+from bulk_load import load_chunks, load_frame, upsert_frame
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'etl.db'}")
+
+
+def frame(n, offset=0):
+    return pd.DataFrame({"player_id": [f"p{i}" for i in range(offset, offset + n)],
+                         "week": [i % 18 + 1 for i in range(n)],
+                         "fantasy_points": [i / 4 for i in range(n)]})
+
+
+def read(engine, table, order="rowid"):
+    return pd.read_sql_query(f"SELECT * FROM {table} ORDER BY {order}", engine)
+
+
+def test_empty_frame_creates_empty_table(engine):
+    result = load_frame(frame(0), "player_week", engine)
+
+    assert result["rows"] == 0
+    assert list(read(engine, "player_week").columns) == ["player_id", "week", "fantasy_points"]
+    assert read(engine, "player_week").empty
+
+
+def test_multi_chunk_load_keeps_every_row_in_order(engine):
+    df = frame(1_050)
+
+    result = load_frame(df, "player_week", engine, chunksize=100)
+
+    assert result["rows"] == 1_050
+    pd.testing.assert_frame_equal(read(engine, "player_week"), df)
+    assert "player_week__staging" not in inspect(engine).get_table_names()
+
+
+def test_load_chunks_accepts_a_generator_of_chunks(engine):
+    chunks = (frame(10, offset) for offset in (0, 10, 20))
+
+    load_chunks(chunks, "player_week", engine)
+
+    assert read(engine, "player_week")["player_id"].tolist() == [f"p{i}" for i in range(30)]
+
+
+def test_no_chunks_is_an_error(engine):
+    with pytest.raises(ValueError, match="No chunks"):
+        load_chunks(iter([]), "player_week", engine)
+
+
+def test_reload_replaces_the_old_table(engine):
+    load_frame(frame(500), "player_week", engine, chunksize=100)
+    new = frame(3, offset=900).drop(columns="week")
+
+    load_frame(new, "player_week", engine)
+
+    pd.testing.assert_frame_equal(read(engine, "player_week"), new)
+
+
+def test_reload_recreates_dependent_views(engine):
+    load_frame(frame(40), "player_week", engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE VIEW week_one AS SELECT player_id FROM player_week WHERE week = 1")
+        conn.exec_driver_sql("CREATE VIEW week_one_count AS SELECT COUNT(*) AS n FROM week_one")
+
+    load_frame(frame(90, offset=100), "player_week", engine)
+
+    assert read(engine, "week_one", order="player_id")["player_id"].tolist() == ["p100", "p118", "p136", "p154", "p172"]
+    assert read(engine, "week_one_count", order="n")["n"].tolist() == [5]
+
+
+def test_upsert_replaces_matching_keys_and_keeps_the_rest(engine):
+    load_frame(frame(6), "player_week", engine)
+    changed = pd.DataFrame({"player_id": ["p1", "p4", "p9"], "week": [2, 5, 10], "fantasy_points": [-1.0, -4.0, -9.0]})
+
+    result = upsert_frame(changed, "player_week", engine, keys=["player_id", "week"])
+
+    assert (result["rows"], result["replaced"]) == (3, 2)
+    out = read(engine, "player_week", order="player_id").set_index("player_id")["fantasy_points"]
+    assert out.to_dict() == {"p0": 0.0, "p1": -1.0, "p2": 0.5, "p3": 0.75, "p4": -4.0, "p5": 1.25, "p9": -9.0}
+    assert "player_week__upsert" not in inspect(engine).get_table_names()
+
+
+def test_upsert_into_a_missing_table_creates_it(engine):
+    upsert_frame(frame(3), "player_week", engine, keys=["player_id", "week"])
+
+    pd.testing.assert_frame_equal(read(engine, "player_week"), frame(3))
+
+
+def test_schema_query_sets_the_staging_types(engine):
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE source (player_id TEXT, week INTEGER, air_yards REAL)")
+    # All null in the first chunk, so pandas alone could not tell air_yards is a float column
+    chunks = [pd.DataFrame({"player_id": ["p0"], "week": [1], "air_yards": [None]}),
+              pd.DataFrame({"player_id": ["p1"], "week": [2], "air_yards": [7.5]})]
+
+    load_chunks(iter(chunks), "player_week", engine, schema_query="SELECT * FROM source")
+
+    types = {col["name"]: str(col["type"]) for col in inspect(engine).get_columns("player_week")}
+    assert types == {"player_id": "TEXT", "week": "INTEGER", "air_yards": "REAL"}
+    assert read(engine, "player_week")["air_yards"].tolist()[1] == 7.5
+
+
+def test_upsert_replaces_changed_partitions_whole(engine):
+    load_frame(pd.DataFrame({"player_id": ["p1", "p2", "p1", "p2"], "season": 2025, "week": [1, 1, 2, 2],
+                             "fantasy_points": [1.0, 2.0, 3.0, 4.0]}), "player_week", engine)
+    # A stat correction in week 2 takes p2 off the week; only p1 is in the recomputed rows
+    week_two = pd.DataFrame({"player_id": ["p1"], "season": [2025], "week": [2], "fantasy_points": [3.5]})
+
+    result = upsert_frame(week_two, "player_week", engine, keys=["player_id", "season", "week"],
+                          partitions=[(2025, 2)])
+
+    assert result["replaced"] == 2
+    out = read(engine, "player_week", order="week, player_id")
+    assert out[["player_id", "week", "fantasy_points"]].values.tolist() == [["p1", 1, 1.0], ["p2", 1, 2.0],
+                                                                             ["p1", 2, 3.5]]
@@ -0,0 +1,46 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "app" / "data" / "etl"))
+import storage
+from incremental import changed_partitions, save_manifest, upsert_stage
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr("incremental.MANIFEST_DIR", tmp_path / "cache" / "manifests")
+
+
+def weeks(rows):
+    return pd.DataFrame(rows, columns=["player_id", "season", "week", "fantasy_points"])
+
+
+def test_changed_partitions_reports_edited_weeks_only():
+    df = weeks([("p1", 2025, 1, 10.0), ("p2", 2025, 1, 4.0), ("p1", 2025, 2, 7.0)])
+    changed, hashes = changed_partitions(df, "test")
+    assert changed == [(2025, 1), (2025, 2)]
+
+    save_manifest("test", hashes)
+    edited = df.assign(fantasy_points=[10.0, 4.0, 8.0])
+    assert changed_partitions(edited, "test")[0] == [(2025, 2)]
+
+
+def test_player_dropped_from_an_edited_week_disappears(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'etl.db'}")
+    full = weeks([("p1", 2025, 1, 10.0), ("p2", 2025, 1, 4.0), ("p1", 2025, 2, 7.0), ("p2", 2025, 2, 3.0)])
+    upsert_stage(full, "player_week", engine=engine, table="player_week")
+
+    # Week 2 is re-aggregated after a correction that takes p2 off every play
+    week_two = weeks([("p1", 2025, 2, 9.0)])
+    combined = upsert_stage(week_two, "player_week", partitions=[(2025, 2)], engine=engine, table="player_week")
+
+    rebuilt = weeks([("p1", 2025, 1, 10.0), ("p1", 2025, 2, 9.0), ("p2", 2025, 1, 4.0)])
+    pd.testing.assert_frame_equal(combined, rebuilt)
+    pd.testing.assert_frame_equal(storage.read_stage("player_week"), rebuilt, check_dtype=False)
+    in_db = pd.read_sql_query("SELECT * FROM player_week ORDER BY player_id, season, week", engine)
+    pd.testing.assert_frame_equal(in_db, rebuilt, check_dtype=False)
@@ -0,0 +1,66 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "app" / "data" / "etl"))
+from rolling import rolling_features
+
+COLS = ["yards", "touches"]
+
+
+@pytest.fixture
+def games():
+    """Three players over two seasons, shuffled, with missing stats."""
+    rng = np.random.default_rng(7)
+    rows = [(p, season, week) for p in ["a", "b", "c"] for season in (2023, 2024) for week in range(1, 7)
+            if not (p == "c" and season == 2023 and week < 4)]
+    df = pd.DataFrame(rows, columns=["player_id", "season", "week"])
+    df["yards"] = rng.integers(0, 120, len(df)).astype(float)
+    df["touches"] = rng.normal(12, 4, len(df))
+    df.loc[rng.random(len(df)) < 0.15, "yards"] = np.nan
+    return df.sample(frac=1, random_state=3)
+
+
+def expected(df, by, fn):
+    """pandas reference: fn(series) per group, in (season, week) order, aligned to df.index."""
+    ordered = df.sort_values(["season", "week"])
+    return ordered.groupby(by)[COLS].transform(fn).reindex(df.index)
+
+
+@pytest.mark.parametrize("shift", [False, True])
+@pytest.mark.parametrize("window", [1, 3, 5])
+def test_windows_match_groupby_rolling(games, window, shift):
+    got = rolling_features(games, COLS, windows=(window,), shift=shift, name="{col}_w")
+    want = expected(games, "player_id",
+                    lambda s: (s.shift() if shift else s).rolling(window, min_periods=1).mean())
+    pd.testing.assert_frame_equal(got, want.add_suffix("_w"))
+
+
+@pytest.mark.parametrize("shift", [False, True])
+def test_season_to_date_and_reset_per_season(games, shift):
+    got = rolling_features(games, COLS, windows=(2,), season_to_date=True, shift=shift,
+                           reset_per_season=True, name="{col}_w", season_name="{col}_std")
+    by = ["player_id", "season"]
+    want_window = expected(games, by, lambda s: (s.shift() if shift else s).rolling(2, min_periods=1).mean())
+    want_season = expected(games, by, lambda s: (s.shift() if shift else s).expanding().mean())
+    pd.testing.assert_frame_equal(got[["yards_w", "touches_w"]], want_window.add_suffix("_w"))
+    pd.testing.assert_frame_equal(got[["yards_std", "touches_std"]], want_season.add_suffix("_std"))
+
+
+@pytest.mark.parametrize("shift", [False, True])
+@pytest.mark.parametrize("span", [2, 4])
+def test_ewm_matches_groupby_ewm(games, span, shift):
+    got = rolling_features(games, COLS, windows=(), ewm_spans=(span,), shift=shift, ewm_name="{col}_e")
+    want = expected(games, "player_id",
+                    lambda s: (s.shift() if shift else s).ewm(span=span, adjust=True).mean())
+    pd.testing.assert_frame_equal(got, want.add_suffix("_e"))
+
+
+def test_missing_group_key_gets_nan(games):
+    games.loc[games.index[0], "player_id"] = None
+    got = rolling_features(games, COLS)
+    assert got.loc[games.index[0]].isna().all()
+    assert got.drop(index=games.index[0]).notna().any(axis=1).all()
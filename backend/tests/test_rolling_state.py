@@ -0,0 +1,81 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "app" / "data" / "etl"))
+import rolling_state
+from rolling_state import RollingState
+
+COLS = ["yards", "touches"]
+WINDOW = 3
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(rolling_state, "STATE_DIR", tmp_path / "rolling_state")
+
+
+@pytest.fixture
+def weeks():
+    """Player-weeks for 2025 weeks 1-5; player 'c' first plays in week 5."""
+    rng = np.random.default_rng(11)
+    rows = [(p, 2025, week) for week in range(1, 6) for p in ["a", "b", "c"]
+            if not (p == "c" and week < 5) and not (p == "b" and week == 2)]
+    df = pd.DataFrame(rows, columns=["player_id", "season", "week"])
+    df["yards"] = rng.integers(0, 120, len(df)).astype(float)
+    df["touches"] = rng.normal(12, 4, len(df))
+    df.loc[[1, 6], "yards"] = np.nan
+    return df
+
+
+def by_player(state):
+    """{player: (buf, sums, valid, count, last_key)}, independent of slot order."""
+    return {pid: (state.buf[i], state.sums[i], state.valid[i], state.count[i], state.last_key[i])
+            for i, pid in enumerate(state.ids)}
+
+
+def assert_same_state(got, want):
+    got, want = by_player(got), by_player(want)
+    assert got.keys() == want.keys()
+    for pid in want:
+        for a, b in zip(got[pid], want[pid]):
+            np.testing.assert_allclose(a, b, equal_nan=True)
+
+
+def test_fit_then_update_equals_fit_on_all_weeks(weeks):
+    new_week = weeks["week"] == 5
+    state = RollingState(COLS, WINDOW).fit(weeks[~new_week])
+    features = state.update(weeks[new_week])
+
+    assert_same_state(state, RollingState(COLS, WINDOW).fit(weeks))
+    want = (weeks.groupby("player_id")[COLS].transform(lambda s: s.rolling(WINDOW, min_periods=1).mean())
+            .add_suffix(f"_rolling_{WINDOW}"))
+    pd.testing.assert_frame_equal(features, want[new_week])
+
+
+def test_update_skips_weeks_already_applied(weeks):
+    state = RollingState(COLS, WINDOW).fit(weeks)
+    again = state.update(weeks[weeks["week"] == 5])
+    assert again.isna().all().all()
+    assert_same_state(state, RollingState(COLS, WINDOW).fit(weeks))
+
+
+def test_save_load_round_trip(weeks):
+    state = RollingState(COLS, WINDOW).fit(weeks)
+    state.save("test")
+    loaded = RollingState.load("test", COLS, WINDOW)
+
+    assert_same_state(loaded, state)
+    assert loaded.max_key == state.max_key == 202505
+    new_week = weeks[weeks["week"] == 5].assign(week=6)
+    pd.testing.assert_frame_equal(loaded.update(new_week), state.update(new_week))
+
+
+def test_load_rejects_other_columns_or_window(weeks):
+    RollingState(COLS, WINDOW).fit(weeks).save("test")
+    assert RollingState.load("test", COLS[:1], WINDOW) is None
+    assert RollingState.load("test", COLS, WINDOW + 1) is None
+    assert RollingState.load("missing", COLS, WINDOW) is None
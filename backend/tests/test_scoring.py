@@ -0,0 +1,58 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "app" / "data" / "etl"))
+from scoring import SCORING_CONFIGS, play_stats, score, score_plays
+
+PLAY_COLUMNS = ["passer_player_id", "rusher_player_id", "receiver_player_id",
+                "passing_yards", "pass_touchdown", "interception", "rushing_yards", "rush_touchdown",
+                "receiving_yards", "reception", "return_touchdown", "fumble_lost"]
+
+PLAYS = pd.DataFrame([
+    # 25-yard touchdown pass: also a receiving touchdown for the receiver
+    ("QB", None, "WR", 25, 1, 0, np.nan, 0, 25, 1, 0, 0),
+    # 8-yard run, fumble lost
+    (None, "RB", None, np.nan, 0, 0, 8, 0, np.nan, 0, 0, 1),
+    # 10-yard catch, fumble lost after it: charged once, not to the passer and the receiver
+    ("QB", None, "WR", 10, 0, 0, np.nan, 0, 10, 1, 0, 1),
+    # interception
+    ("QB", None, None, 0, 0, 1, np.nan, 0, np.nan, 0, 0, 0),
+    # stats on a play without the players they belong to are not credited
+    (None, None, None, 30, 1, 1, 12, 1, 30, 1, 0, 0),
+], columns=PLAY_COLUMNS)
+
+# Points per play, per config
+EXPECTED = {
+    "ppr": [14.5, -1.2, 0.4, -2.0, 0.0],
+    "half_ppr": [14.0, -1.2, -0.1, -2.0, 0.0],
+    "standard": [13.5, -1.2, -0.6, -2.0, 0.0],
+    "six_pt_pass_td": [16.5, -1.2, 0.4, -2.0, 0.0],
+}
+
+
+def test_play_stats_credits_players_on_the_play():
+    stats = play_stats(PLAYS)
+    assert stats["receiving_touchdown"].tolist() == [1, 0, 0, 0, 0]
+    assert stats["fumble_lost"].tolist() == [0, 1, 1, 0, 0]
+    assert stats.iloc[4].sum() == 0
+
+
+@pytest.mark.parametrize("config", list(SCORING_CONFIGS))
+def test_score_plays_per_config(config):
+    scored = score_plays(PLAYS.copy(), config)
+    assert scored[f"fantasy_points_{config}"].tolist() == pytest.approx(EXPECTED[config])
+
+
+def test_every_config_is_pinned():
+    assert set(EXPECTED) == set(SCORING_CONFIGS)
+
+
+def test_score_weekly_totals_match_the_plays():
+    weekly = play_stats(PLAYS).sum().to_frame().T
+    scored = score(weekly)
+    for config, points in EXPECTED.items():
+        assert scored[f"fantasy_points_{config}"].iloc[0] == pytest.approx(sum(points))
@@ -0,0 +1,117 @@
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "app" / "data" / "etl"))
+from sleeper_client import FetchFailure, SleeperClient, failure_report, weekly_stats_paths
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """Local stand-in for the Sleeper API; behaviour per path is set by the test."""
+
+    flaky = {}      # path -> [status, ...] served before a 200
+    delays = {}     # path -> seconds to wait before answering
+    hits = Counter()
+    stamps = []
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        with self.lock:
+            self.hits[self.path] += 1
+            hit = self.hits[self.path]
+            self.stamps.append(time.monotonic())
+        time.sleep(self.delays.get(self.path, 0.0))
+
+        statuses = self.flaky.get(self.path, [])
+        status = statuses[hit - 1] if hit <= len(statuses) else 200
+        body = json.dumps({"path": self.path}).encode() if status == 200 else b""
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    StandIn.flaky, StandIn.delays = {}, {}
+    StandIn.hits, StandIn.stamps = Counter(), []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/v1"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_results_keep_the_order_of_the_requested_partitions(server):
+    paths = weekly_stats_paths([2024], weeks=range(1, 7))
+    # Early weeks answer last, so completion order is the reverse of request order
+    StandIn.delays = {f"/v1/{path}": 0.05 * (7 - week) for (_, week), path in paths.items()}
+
+    results, failures = SleeperClient(server, calls_per_minute=60_000, concurrency=6).fetch_all(paths)
+
+    assert failures == []
+    assert list(results) == list(paths)
+    assert all(results[p] == {"path": f"/v1/{paths[p]}"} for p in paths)
+
+
+def test_calls_are_capped_at_the_configured_rate(server):
+    paths = {n: f"stats/nfl/regular/2024/{n}" for n in range(1, 13)}
+
+    SleeperClient(server, calls_per_minute=600, concurrency=8).fetch_all(paths)
+
+    # 10 calls/sec with a burst of one: 12 calls take at least 1.1s, and no half second sees
+    # more than 5 (+1 for the server threads' own scheduling jitter)
+    stamps = sorted(StandIn.stamps)
+    assert len(stamps) == 12
+    assert stamps[-1] - stamps[0] >= 1.1 * 0.95
+    assert max(sum(start <= t < start + 0.5 for t in stamps) for start in stamps) <= 6
+
+
+def test_transient_errors_are_retried(server):
+    StandIn.flaky = {"/v1/stats/nfl/regular/2024/1": [503, 502], "/v1/stats/nfl/regular/2024/2": [429]}
+    client = SleeperClient(server, calls_per_minute=60_000, retries=3, backoff=0.01)
+
+    results, failures = client.fetch_all(weekly_stats_paths([2024], weeks=[1, 2]))
+
+    assert failures == []
+    assert set(results) == {(2024, 1), (2024, 2)}
+    assert StandIn.hits["/v1/stats/nfl/regular/2024/1"] == 3
+    assert StandIn.hits["/v1/stats/nfl/regular/2024/2"] == 2
+
+
+def test_failures_are_reported_not_dropped(server):
+    StandIn.flaky = {"/v1/stats/nfl/regular/2024/3": [500] * 10, "/v1/stats/nfl/regular/2024/4": [404]}
+    client = SleeperClient(server, calls_per_minute=60_000, retries=2, backoff=0.01)
+
+    results, failures = client.fetch_all(weekly_stats_paths([2024], weeks=[2, 3, 4]))
+
+    assert list(results) == [(2024, 2)]
+    by_partition = {f.partition: f for f in failures}
+    assert set(by_partition) == {(2024, 3), (2024, 4)}
+    assert (by_partition[(2024, 3)].status, by_partition[(2024, 3)].attempts) == (500, 3)
+    # Client errors other than 429 are not retried
+    assert (by_partition[(2024, 4)].status, by_partition[(2024, 4)].attempts) == (404, 1)
+
+    report = failure_report(failures).splitlines()
+    assert report[0] == "2 partition(s) failed:"
+    assert report[1].startswith("  (2024, 3): HTTP 500 after 3 attempt(s) - http://127.0.0.1:")
+    assert report[2].startswith("  (2024, 4): HTTP 404 after 1 attempt(s)")
+
+
+def test_get_raises_the_fetch_failure(server):
+    StandIn.flaky = {"/v1/players/nfl": [500] * 10}
+
+    with pytest.raises(FetchFailure, match="players/nfl failed after 1 attempt"):
+        SleeperClient(server, retries=0).get("players/nfl")
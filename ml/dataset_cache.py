@@ -0,0 +1,95 @@
+"""Cache of constructed (binned) LightGBM training/validation Datasets.
+
+Constructing an lgb.Dataset bins every feature (quantile sampling,
+histogram bin mappers, feature bundling), which train_all.py would
+otherwise repeat on every run. The constructed train and validation sets
+are saved with Dataset.save_binary under a key made of the feature
+snapshot version, the model's rows and features, the dataset-level
+(binning) params and the LightGBM version. A rerun or a sweep over
+training-only params (learning_rate, num_leaves, bagging, ...) loads the
+binaries and skips binning entirely.
+
+    python dataset_cache.py              # list cached datasets
+    python dataset_cache.py --clear
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+from local_store import STORE_DIR
+
+DATASET_DIR = Path(os.getenv("ML_DATASET_CACHE_DIR", STORE_DIR.parent / "lgb_datasets"))
+
+# Parameters that change how a Dataset is built; anything else can vary and still reuse it
+BINNING_PARAMS = (
+    "max_bin", "max_bin_by_feature", "min_data_in_bin", "bin_construct_sample_cnt", "data_random_seed",
+    "feature_pre_filter", "min_data_in_leaf", "is_enable_sparse", "enable_bundle", "use_missing",
+    "zero_as_missing", "categorical_feature", "linear_tree", "forcedbins_filename",
+)
+
+
+def binning_params(params: dict) -> dict:
+    return {k: v for k, v in params.items() if k in BINNING_PARAMS}
+
+
+def dataset_key(parts, params: dict) -> str:
+    """Hash of what determines the constructed Datasets: `parts` (data identity) and the binning params."""
+    import lightgbm as lgb
+    payload = json.dumps([parts, binning_params(params), lgb.__version__], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def train_valid_datasets(key: str, build, params: dict):
+    """(train, valid) lgb.Datasets for `key`, loaded from their binaries or built and saved.
+
+    build() -> (X_train, y_train, X_test, y_test) is only called on a miss.
+    The validation set is constructed with reference=train, so it shares the
+    training bin mappers, and is cached alongside it.
+    """
+    import lightgbm as lgb
+
+    folder = DATASET_DIR / key
+    train_path, valid_path = folder / "train.bin", folder / "valid.bin"
+    dataset_params = binning_params(params)
+    if train_path.exists() and valid_path.exists():
+        train = lgb.Dataset(str(train_path), params=dataset_params)
+        valid = lgb.Dataset(str(valid_path), reference=train, params=dataset_params)
+        return train, valid
+
+    X_train, y_train, X_test, y_test = build()
+    train = lgb.Dataset(X_train, label=y_train, params=dataset_params, free_raw_data=False).construct()
+    valid = lgb.Dataset(X_test, label=y_test, reference=train, params=dataset_params,
+                        free_raw_data=False).construct()
+
+    tmp = folder.with_name(f".{key}.tmp{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    train.save_binary(str(tmp / "train.bin"))
+    valid.save_binary(str(tmp / "valid.bin"))
+    try:
+        os.replace(tmp, folder)
+    except OSError:
+        # Another worker saved the same key first
+        shutil.rmtree(tmp, ignore_errors=True)
+    return train, valid
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or clear the LightGBM Dataset cache")
+    parser.add_argument("--clear", action="store_true", help="delete every cached Dataset")
+    args = parser.parse_args()
+
+    if args.clear:
+        shutil.rmtree(DATASET_DIR, ignore_errors=True)
+        print(f"Cleared {DATASET_DIR}")
+    else:
+        entries = sorted(DATASET_DIR.glob("[!.]*")) if DATASET_DIR.exists() else []
+        total = 0
+        for folder in entries:
+            size = sum(f.stat().st_size for f in folder.iterdir())
+            total += size
+            print(f"{folder.name}  {size / 1e6:>8.1f} MB")
+        print(f"{len(entries)} cached datasets, {total / 1e6:.1f} MB")
@@ -0,0 +1,163 @@
+"""Versioned, memory-mapped float32 feature snapshots of a training table.
+
+A snapshot is a directory under cache/snapshots/<table>/<version>/ with
+
+    features.npy   every numeric column (plus derived ones) as one C-ordered
+                   float32 matrix, rows sorted by (season, week, player_id)
+    index.parquet  the row index (player_id, season, week) and the
+                   non-numeric columns (game_id, posteam, ...) for filtering
+    meta.json      column names, shape, per-season row ranges, source hash
+
+The version is a hash of the local store's partition fingerprints (see
+local_store.py), so an unchanged table reuses the existing snapshot.
+Readers np.load the matrix with mmap_mode="r": processes share the page
+cache instead of each holding a float64 DataFrame, and a season range is
+a zero-copy row slice.
+
+    python feature_snapshot.py                 # sync, then snapshot final_modeling_data
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+
+from features import TRANSFORMS_VERSION, apply_features, required_inputs
+from local_store import STORE_DIR, load, load_manifest, load_table
+
+SNAPSHOT_DIR = Path(os.getenv("ML_SNAPSHOT_DIR", STORE_DIR.parent / "snapshots"))
+INDEX_COLS = ["player_id", "season", "week"]
+FORMAT_VERSION = 1
+# Per-row derived features stored in the snapshot (see features.py)
+DERIVED = ["home_team", "player_moneyline"]
+
+
+def source_version(table: str) -> str:
+    manifest = load_manifest(table)
+    payload = json.dumps([FORMAT_VERSION, TRANSFORMS_VERSION, manifest["columns"], manifest["partitions"]],
+                         sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:12]
+
+
+def build_snapshot(table: str = "final_modeling_data", df: pd.DataFrame = None, version: str = None) -> Path:
+    """Write (or reuse) the snapshot of `table` as it is in the local store; returns its directory."""
+    version = version or source_version(table)
+    out = SNAPSHOT_DIR / table / version
+    if (out / "meta.json").exists():
+        return out
+
+    df = load(table) if df is None else df
+    if all(col in df.columns for col in required_inputs(DERIVED)):
+        df = apply_features(df, DERIVED)
+    df = df.sort_values(["season", "week", "player_id"], kind="stable").reset_index(drop=True)
+
+    numeric = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c]) or pd.api.types.is_bool_dtype(df[c])]
+    labels = INDEX_COLS + [c for c in df.columns if c not in numeric and c not in INDEX_COLS]
+
+    tmp = out.with_name(f".{version}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    # Filled one column at a time, so no float64 copy of the whole table is ever built
+    matrix = np.lib.format.open_memmap(tmp / "features.npy", mode="w+", dtype=np.float32,
+                                       shape=(len(df), len(numeric)))
+    for j, col in enumerate(numeric):
+        matrix[:, j] = df[col].to_numpy(dtype=np.float32, na_value=np.nan)
+    matrix.flush()
+    del matrix
+    df[labels].to_parquet(tmp / "index.parquet", index=False)
+
+    seasons = df["season"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, seasons[1:] != seasons[:-1]])
+    stops = np.r_[starts[1:], len(df)]
+    meta = {
+        "table": table, "version": version, "format": FORMAT_VERSION, "created": time.time(),
+        "shape": [len(df), len(numeric)], "columns": numeric, "labels": labels,
+        "seasons": {str(int(seasons[a])): [int(a), int(b)] for a, b in zip(starts, stops)},
+    }
+    (tmp / "meta.json").write_text(json.dumps(meta, indent=1))
+    os.replace(tmp, out)
+    (SNAPSHOT_DIR / table / "LATEST").write_text(version)
+    return out
+
+
+class FeatureSnapshot:
+    """Read-only view of a snapshot; matrices are memory-mapped, not loaded."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / "meta.json").read_text())
+        self.columns = self.meta["columns"]
+        self.version = self.meta["version"]
+        self._position = {c: j for j, c in enumerate(self.columns)}
+        self.X = np.load(self.path / "features.npy", mmap_mode="r")
+        self._index = None
+
+    @classmethod
+    def open(cls, table: str = "final_modeling_data", version: str = None) -> "FeatureSnapshot":
+        version = version or (SNAPSHOT_DIR / table / "LATEST").read_text().strip()
+        return cls(SNAPSHOT_DIR / table / version)
+
+    @property
+    def index(self) -> pd.DataFrame:
+        """player_id, season, week and the label columns, aligned with the matrix rows."""
+        if self._index is None:
+            self._index = pd.read_parquet(self.path / "index.parquet")
+        return self._index
+
+    def rows(self, seasons=None):
+        """Row selector for `seasons`: a slice (zero-copy) when they are consecutive, else an index array."""
+        if seasons is None:
+            return slice(0, len(self.X))
+        ranges = sorted(tuple(self.meta["seasons"][str(int(s))]) for s in seasons if str(int(s)) in self.meta["seasons"])
+        if not ranges:
+            return slice(0, 0)
+        if all(a[1] == b[0] for a, b in zip(ranges, ranges[1:])):
+            return slice(ranges[0][0], ranges[-1][1])
+        return np.concatenate([np.arange(a, b) for a, b in ranges])
+
+    def column(self, name: str, rows=slice(None)) -> np.ndarray:
+        """One column as a (strided, zero-copy for slices) float32 view."""
+        return self.X[rows, self._position[name]]
+
+    def matrix(self, columns=None, rows=slice(None)) -> np.ndarray:
+        """float32 matrix of `columns` for `rows`: a view of the map when columns is None and rows a slice,
+        otherwise a float32 copy of just that block."""
+        if columns is None:
+            return self.X[rows]
+        return self.X[rows][:, [self._position[c] for c in columns]]
+
+    def frame(self, columns=None, rows=slice(None)) -> pd.DataFrame:
+        """DataFrame of `columns` (float32) with the player_id/season/week index, for code that wants pandas."""
+        columns = columns or self.columns
+        index = pd.MultiIndex.from_frame(self.index.iloc[rows][INDEX_COLS])
+        return pd.DataFrame(self.matrix(columns, rows), columns=columns, index=index)
+
+    def table(self, rows=slice(None), columns=None) -> pd.DataFrame:
+        """Flat DataFrame shaped like the source table: the index and label columns, then `columns` (float32)."""
+        labels = self.index.iloc[rows].reset_index(drop=True)
+        columns = [c for c in columns or self.columns if c not in labels.columns]
+        return pd.concat([labels, pd.DataFrame(self.matrix(columns, rows), columns=columns)], axis=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a float32 feature snapshot from the local store")
+    parser.add_argument("--table", default="final_modeling_data")
+    parser.add_argument("--no-sync", action="store_true", help="snapshot the local store as it is")
+    args = parser.parse_args()
+
+    if not args.no_sync:
+        load_dotenv()
+        engine = create_engine(os.getenv("DATABASE_URL"))
+        load_table(args.table, engine, columns=["season"])
+    start = time.perf_counter()
+    snapshot = FeatureSnapshot(build_snapshot(args.table))
+    rows, cols = snapshot.meta["shape"]
+    print(f"✅ Snapshot {args.table}@{snapshot.version}: {rows:,} rows x {cols} float32 columns "
+          f"({snapshot.X.nbytes / 1e6:.1f} MB) in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,138 @@
+"""Derived model features, registered by name, shared by training (ml/) and serving (backend projections).
+
+Each transform declares the columns it reads and computes its column for
+the whole frame with vectorized string/array ops. apply_features(df, names)
+resolves the registered names (and the derived inputs they depend on) and
+passes every other name through, so trainers and the projection service
+build features with exactly the same code.
+
+Rolling means are leak-safe: each row only sees the same player's (or the
+same defense's) earlier games, never another player's rows.
+"""
+import hashlib
+import sys
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ETL_DIR = Path(__file__).resolve().parent.parent / "backend" / "app" / "data" / "etl"
+sys.path.append(str(ETL_DIR))
+from rolling import rolling_features
+
+# Changes whenever a transform does, so caches keyed on it (snapshots, Datasets) are rebuilt
+TRANSFORMS_VERSION = hashlib.sha256(
+    Path(__file__).read_bytes() + (ETL_DIR / "rolling.py").read_bytes()).hexdigest()[:12]
+
+ORDER_COLS = ["season", "week"]
+
+
+class Transform:
+    """A derived column `name`, computed by fn(df) from the `inputs` columns."""
+
+    def __init__(self, name, inputs, fn):
+        self.name = name
+        self.inputs = list(inputs)
+        self.fn = fn
+
+
+TRANSFORMS = {}
+
+
+def register(name, inputs):
+    """Decorator registering fn(df) -> array-like as the transform for column `name`."""
+    def decorator(fn):
+        TRANSFORMS[name] = Transform(name, inputs, fn)
+        return fn
+    return decorator
+
+
+@register("home_team", inputs=["game_id"])
+def home_team(df: pd.DataFrame) -> pd.Series:
+    """Home team abbreviation, the last part of game_id (e.g. 2024_01_BAL_KC -> KC)."""
+    return df["game_id"].astype(str).str.rsplit("_", n=1).str[-1]
+
+
+@register("player_moneyline", inputs=["posteam", "home_team", "home_moneyline", "away_moneyline"])
+def player_moneyline(df: pd.DataFrame) -> np.ndarray:
+    """Moneyline of the player's own team."""
+    is_home = df["posteam"].astype(str).to_numpy() == df["home_team"].astype(str).to_numpy()
+    return np.where(is_home, df["home_moneyline"].to_numpy(dtype=np.float64, na_value=np.nan),
+                    df["away_moneyline"].to_numpy(dtype=np.float64, na_value=np.nan))
+
+
+def rolling_mean(df: pd.DataFrame, source: str, window: int, by: str) -> np.ndarray:
+    """Mean of `source` over the previous `window` games of the same `by` (NaN until there are that many).
+
+    Grouped by a team column, the frame is first reduced to one row per
+    team-week, so the window is that team's previous games rather than
+    other players' rows from the same game.
+    """
+    if by == "player_id":
+        rolled = rolling_features(df, [source], windows=(window,), group=by, order=ORDER_COLS,
+                                  shift=True, min_periods=window, name="rolled")
+        return rolled["rolled"].to_numpy()
+
+    keys = [by] + ORDER_COLS
+    games = df[keys + [source]].drop_duplicates(keys).reset_index(drop=True)
+    rolled = rolling_features(games, [source], windows=(window,), group=by, order=ORDER_COLS,
+                              shift=True, min_periods=window, name="rolled")["rolled"].to_numpy()
+    position = pd.MultiIndex.from_frame(games[keys]).get_indexer(pd.MultiIndex.from_frame(df[keys]))
+    return np.where(position >= 0, rolled[position], np.nan)
+
+
+def register_rolling(source: str, window: int = 3, by: str = "player_id", name: str = None) -> str:
+    """Register the leak-safe rolling mean of `source` (default name '<source>_rolling<window>')."""
+    name = name or f"{source}_rolling{window}"
+    TRANSFORMS[name] = Transform(name, [by, *ORDER_COLS, source],
+                                 partial(rolling_mean, source=source, window=window, by=by))
+    return name
+
+
+# Per-player recent usage (passing model, random forests)
+register_rolling("pass_attempt", name="pass_attempts_rolling3")
+register_rolling("complete_pass", name="completions_rolling3")
+for _col in ["pass_attempt", "complete_pass", "total_touches", "pass_pct_off", "rush_pct_off",
+             "avg_yac_off", "avg_air_yards_off", "zone_coverage_pct_def"]:
+    register_rolling(_col)
+# Opposing defense's recent games
+for _col in ["blitz_rate_def", "pressure_rate_def", "man_coverage_pct_def"]:
+    register_rolling(_col, by="defteam_x")
+
+
+def resolve(names) -> list:
+    """Registered transforms needed for `names`, dependencies first."""
+    ordered, seen = [], set()
+
+    def visit(name):
+        if name in seen or name not in TRANSFORMS:
+            return
+        seen.add(name)
+        for dependency in TRANSFORMS[name].inputs:
+            visit(dependency)
+        ordered.append(name)
+
+    for name in names:
+        visit(name)
+    return ordered
+
+
+def required_inputs(names) -> list:
+    """Raw (non-derived) columns a frame needs for apply_features(df, names)."""
+    needed = [name for name in names if name not in TRANSFORMS]
+    for name in resolve(names):
+        needed += [col for col in TRANSFORMS[name].inputs if col not in TRANSFORMS]
+    return list(dict.fromkeys(needed))
+
+
+def apply_features(df: pd.DataFrame, names) -> pd.DataFrame:
+    """Copy of df with every registered transform among `names` (and their derived inputs) computed."""
+    transforms = resolve(names)
+    missing = [col for col in required_inputs(names) if col not in df.columns]
+    if missing:
+        raise KeyError(f"Columns needed for these features are missing: {missing}")
+    df = df.copy()
+    for name in transforms:
+        df[name] = TRANSFORMS[name].fn(df)
+    return df
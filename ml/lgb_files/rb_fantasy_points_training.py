@@ -4,15 +4,20 @@ from sklearn.metrics import root_mean_squared_error # type: ignore
 from sqlalchemy import create_engine
 from dotenv import load_dotenv
 import os
+import sys
 from typing import List, Callable, Any
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from features import apply_features
+from local_store import load_table
+
 
 load_dotenv()
 DB_URI = os.getenv("DATABASE_URL")
 engine = create_engine(DB_URI)
 
 
-df = pd.read_sql_table("final_modeling_data", engine)
+df = load_table("final_modeling_data", engine, filters=[("rushing_yards", ">", 0)])
 
 
 df = df[(df["player_id"].astype(str) != "0") & (df["rushing_yards"] > 0)]
@@ -20,14 +25,8 @@ df = df[(df["player_id"].astype(str) != "0") & (df["rushing_yards"] > 0)]
 
 df = df.sort_values(by=["player_id", "season", "week"])
 
-# Extract home team from game_id
-df["home_team"] = df["game_id"].apply(lambda x: x.split("_")[-1])
-
-# Determine if player’s team is home or away, and assign moneyline
-df["player_moneyline"] = df.apply(
-    lambda row: row["home_moneyline"] if row["posteam"] == row["home_team"] else row["away_moneyline"],
-    axis=1
-)
+# Derived features (home_team, player_moneyline, ...) from the shared transforms in features.py
+df = apply_features(df, ["player_moneyline"])
 
 
 features = [
@@ -0,0 +1,232 @@
+"""Local columnar mirror of database tables for training reads.
+
+Tables are copied from the database into season-partitioned Parquet
+(cache/store/<table>/season=<s>/part-0.parquet) and kept in sync
+incrementally: a per-(season, week) content fingerprint is computed (inside
+the database on PostgreSQL), and only the weeks whose fingerprint changed
+are pulled again.
+Reads then come from local disk and push the column projection, season
+selection and row predicates down into the Parquet scan, so a trainer
+only decodes the features and rows it uses.
+
+    python local_store.py                      # sync final_modeling_data and pbp_full_context
+    python local_store.py final_modeling_data --full
+    python local_store.py --bench              # cold-load timings, database vs local store
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+from sqlalchemy import bindparam, create_engine, inspect, text
+from sqlalchemy import types as sqltypes
+from sqlalchemy.exc import OperationalError
+
+STORE_DIR = Path(os.getenv("ML_STORE_DIR", Path(__file__).resolve().parent / "cache" / "store"))
+TABLES = ["final_modeling_data", "pbp_full_context"]
+ROW_GROUP_SIZE = 64_000
+
+SEASON_PARTITIONING = ds.partitioning(pa.schema([("season", pa.int64())]), flavor="hive")
+
+
+def table_dir(table: str) -> Path:
+    return STORE_DIR / table
+
+
+def _manifest_path(table: str) -> Path:
+    return table_dir(table) / "_manifest.json"
+
+
+def load_manifest(table: str) -> dict:
+    path = _manifest_path(table)
+    return json.loads(path.read_text()) if path.exists() else {"columns": [], "partitions": {}}
+
+
+def arrow_schema(engine, table: str) -> pa.Schema:
+    """Arrow schema for a database table, so every season file is written with the same types."""
+    fields = []
+    for col in inspect(engine).get_columns(table):
+        kind = col["type"]
+        if isinstance(kind, sqltypes.Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(kind, sqltypes.Integer):
+            arrow_type = pa.int64()
+        elif isinstance(kind, (sqltypes.Float, sqltypes.Numeric)):
+            arrow_type = pa.float64()
+        elif isinstance(kind, sqltypes.DateTime):
+            arrow_type = pa.timestamp("us")
+        elif isinstance(kind, sqltypes.Date):
+            arrow_type = pa.date32()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(col["name"], arrow_type))
+    return pa.schema(fields)
+
+
+def partition_fingerprints(conn, table: str) -> dict:
+    """{'[season, week]': row count and an order-independent checksum of the week's rows}.
+
+    On PostgreSQL the checksum (an md5 over the rows' md5s) is computed in
+    the database, so only this summary crosses the network. Other databases
+    have no such aggregate, so each week is read and its rows hashed here:
+    a full read per sync, but in-place edits are still detected.
+    """
+    quote = conn.dialect.identifier_preparer.quote
+    if conn.dialect.name == "postgresql":
+        rows = conn.execute(text(f"SELECT season, week, COUNT(*), md5(string_agg(md5(t::text), '' ORDER BY md5(t::text))) "
+                                 f"FROM {quote(table)} t GROUP BY season, week"))
+        return {json.dumps([int(season), int(week)]): f"{count}:{digest}" for season, week, count, digest in rows}
+
+    weeks = conn.execute(text(f"SELECT season, week, COUNT(*) FROM {quote(table)} GROUP BY season, week")).all()
+    query = text(f"SELECT * FROM {quote(table)} WHERE season = :season AND week = :week")
+    fingerprints = {}
+    for season, week, count in weeks:
+        df = pd.read_sql_query(query, conn, params={"season": season, "week": week})
+        # Row hashes summed (mod 2**64), so the order rows come back in does not matter
+        digest = int(pd.util.hash_pandas_object(df, index=False).sum())
+        fingerprints[json.dumps([int(season), int(week)])] = f"{count}:{digest:016x}"
+    return fingerprints
+
+
+def _read_weeks(conn, table: str, season: int, weeks: list, schema: pa.Schema) -> pa.Table:
+    quote = conn.dialect.identifier_preparer.quote
+    query = text(f"SELECT * FROM {quote(table)} WHERE season = :season AND week IN :weeks") \
+        .bindparams(bindparam("weeks", expanding=True))
+    df = pd.read_sql_query(query, conn, params={"season": season, "weeks": weeks})
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+def _rewrite_season(table: str, season: int, weeks: list, fresh) -> int:
+    """Replace `weeks` of one season file with `fresh` rows (or drop them if fresh is None); returns rows kept."""
+    path = table_dir(table) / f"season={season}" / "part-0.parquet"
+    parts = []
+    if path.exists():
+        old = pq.read_table(path)
+        parts.append(old.filter(pc.invert(pc.is_in(old["week"], value_set=pa.array(weeks, old["week"].type)))))
+    if fresh is not None:
+        parts.append(fresh.drop(["season"]))
+    combined = pa.concat_tables(parts) if parts else None
+    if combined is None or combined.num_rows == 0:
+        shutil.rmtree(path.parent, ignore_errors=True)
+        return 0
+
+    # Sorted by week so the row-group min/max statistics let week predicates skip whole groups
+    combined = combined.sort_by([("week", "ascending")])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    pq.write_table(combined, tmp, compression="zstd", row_group_size=ROW_GROUP_SIZE)
+    os.replace(tmp, path)
+    return combined.num_rows
+
+
+def sync(table: str, engine, full: bool = False) -> list:
+    """Bring the local copy of `table` up to date; returns the (season, week) partitions rewritten."""
+    manifest = {"columns": [], "partitions": {}} if full else load_manifest(table)
+    if full:
+        shutil.rmtree(table_dir(table), ignore_errors=True)
+    schema = arrow_schema(engine, table)
+
+    with engine.connect() as conn:
+        current = partition_fingerprints(conn, table)
+        previous = manifest["partitions"]
+        changed = {tuple(json.loads(k)) for k, v in current.items() if previous.get(k) != v}
+        removed = {tuple(json.loads(k)) for k in previous if k not in current}
+
+        by_season = {}
+        for season, week in changed | removed:
+            by_season.setdefault(season, []).append(week)
+        for season, weeks in sorted(by_season.items()):
+            fresh_weeks = sorted(w for w in weeks if (season, w) in changed)
+            fresh = _read_weeks(conn, table, season, fresh_weeks, schema) if fresh_weeks else None
+            _rewrite_season(table, season, sorted(weeks), fresh)
+
+    table_dir(table).mkdir(parents=True, exist_ok=True)
+    _manifest_path(table).write_text(json.dumps({"columns": schema.names, "partitions": current}, indent=1))
+    return sorted(changed | removed)
+
+
+def load(table: str, columns=None, seasons=None, filters=None) -> pd.DataFrame:
+    """Read a synced table from the local store.
+
+    columns: only these columns are decoded.
+    seasons: only these season directories are opened.
+    filters: pyarrow-style row predicates, e.g. [("rushing_yards", ">", 0)]
+             or [[...], [...]] for OR-ed groups; Parquet row groups whose
+             statistics rule them out are skipped.
+    """
+    if not table_dir(table).exists():
+        raise FileNotFoundError(f"'{table}' is not in the local store yet; run: python local_store.py {table}")
+    dataset = ds.dataset(table_dir(table), format="parquet", partitioning=SEASON_PARTITIONING)
+    expression = pq.filters_to_expression(filters) if filters else None
+    if seasons is not None:
+        in_seasons = ds.field("season").isin([int(s) for s in seasons])
+        expression = in_seasons if expression is None else expression & in_seasons
+    result = dataset.to_table(columns=columns, filter=expression)
+
+    # The season partition column comes last from the scan; restore the database column order
+    order = columns or [c for c in load_manifest(table)["columns"] if c in result.column_names]
+    return result.select(order).to_pandas()
+
+
+def load_table(table: str, engine=None, **kwargs) -> pd.DataFrame:
+    """sync (when an engine is given and reachable) then load; works offline from the last sync."""
+    if engine is not None:
+        try:
+            changed = sync(table, engine)
+            if changed:
+                print(f"Synced {len(changed)} changed weeks of {table}")
+        except OperationalError as exc:
+            if not table_dir(table).exists():
+                raise
+            print(f"⚠ Could not reach the database ({exc.orig}); using the local copy of {table}")
+    return load(table, **kwargs)
+
+
+def bench(engine, table: str = "final_modeling_data", columns=None, filters=None) -> None:
+    """Cold-load timings: full read from the database vs the local store (full and pushed-down reads)."""
+    def timed(label, fn):
+        start = time.perf_counter()
+        df = fn()
+        elapsed = time.perf_counter() - start
+        print(f"{label:<38} {elapsed:>8.2f}s {len(df):>10,} rows {df.shape[1]:>5} cols "
+              f"{df.memory_usage(deep=True).sum() / 1e6:>9.1f} MB")
+        return df
+
+    full = timed("read_sql_table (database)", lambda: pd.read_sql_table(table, engine))
+    timed("sync (full copy)", lambda: (sync(table, engine, full=True), full)[1])
+    timed("sync (no changes)", lambda: (sync(table, engine), full)[1])
+    timed("local store, all columns", lambda: load(table))
+    columns = columns or [c for c in full.select_dtypes("number").columns[:25]]
+    columns = list(dict.fromkeys(["player_id", "season", "week"] + columns))
+    seasons = sorted(full["season"].unique())[-2:]
+    timed(f"local store, {len(columns)} cols, seasons {seasons[0]}+",
+          lambda: load(table, columns=columns, seasons=seasons, filters=filters))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync database tables into the local training store")
+    parser.add_argument("tables", nargs="*", default=TABLES)
+    parser.add_argument("--full", action="store_true", help="drop the local copy and pull everything again")
+    parser.add_argument("--bench", action="store_true", help="time cold loads from the database vs the store")
+    args = parser.parse_args()
+
+    load_dotenv()
+    DB_URI = os.getenv("DATABASE_URL")
+    engine = create_engine(DB_URI)
+
+    if args.bench:
+        for table in args.tables:
+            bench(engine, table)
+    else:
+        for table in args.tables:
+            start = time.perf_counter()
+            changed = sync(table, engine, full=args.full)
+            print(f"✅ {table}: {len(changed)} weeks updated in {time.perf_counter() - start:.1f}s")
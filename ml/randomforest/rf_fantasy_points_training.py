@@ -1,18 +1,30 @@
+import numpy as np
 import pandas as pd
 from sqlalchemy import create_engine
 from dotenv import load_dotenv
 import os
+import sys
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, r2_score
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from features import apply_features
+from feature_snapshot import DERIVED, FeatureSnapshot, build_snapshot
+from local_store import load_table
+from train_all import row_mask
+
 
 load_dotenv()
 DB_URI = os.getenv("DATABASE_URL")
 engine = create_engine(DB_URI) # type: ignore
 
 
-df = pd.read_sql_table("final_modeling_data", engine)
+# Sync the local store, then read the shared memory-mapped snapshot (feature_snapshot.py)
+load_table("final_modeling_data", engine, columns=["season"])
+snapshot = FeatureSnapshot(build_snapshot("final_modeling_data"))
+rows = np.flatnonzero(row_mask(snapshot.column, [("rushing_yards", ">", 0)], len(snapshot.X)))
+df = snapshot.table(rows).drop(columns=DERIVED, errors="ignore")
 df = df.sort_values(["player_id", "season", "week"])
 df = df[df["rushing_yards"].notna() & (df["rushing_yards"] > 0)]
 
@@ -34,14 +46,9 @@ rolling_features = [
 # Rolling window size
 window = 3
 
-# Apply rolling mean grouped by player (or team for defensive stats)
-for col in rolling_features:
-    if col in ["blitz_rate_def", "pressure_rate_def", "man_coverage_pct_def"]:
-        # For defensive stats, group by team on defense
-        df[col + f"_rolling{window}"] = df.groupby("defteam_x")[col].shift(1).rolling(window).mean()
-    else:
-        # For offensive stats, group by player
-        df[col + f"_rolling{window}"] = df.groupby("player_id")[col].shift(1).rolling(window).mean()
+# Leak-safe rolling means from features.py: each row only sees the player's own earlier games
+# (the opposing defense's earlier games for blitz/pressure/man coverage)
+df = apply_features(df, [f"{col}_rolling{window}" for col in rolling_features])
 target = "fantasy_points"
 
 leak_cols = [
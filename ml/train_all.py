@@ -0,0 +1,289 @@
+"""Train every LightGBM model in one run, from one loaded dataset.
+
+Each model in MODEL_SPECS is declared by its target, row filter, features
+and params (the same ones the scripts in lgb_files/ hard-code). The table
+is synced and snapshotted once (local_store.py, feature_snapshot.py);
+worker processes memory-map that snapshot instead of each reading the
+database, and the machine's cores are split between the concurrent
+LightGBM jobs. Binned Datasets are cached between runs (dataset_cache.py).
+Model and prediction files keep their existing names.
+
+    python train_all.py                        # all models
+    python train_all.py passing_yards rushing_yards --jobs 2
+    python train_all.py --set learning_rate=0.05 --set num_leaves=63
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+
+from dataset_cache import dataset_key, train_valid_datasets
+from feature_snapshot import FeatureSnapshot, build_snapshot
+from features import TRANSFORMS, TRANSFORMS_VERSION, apply_features, required_inputs
+from local_store import load_table
+
+ML_DIR = Path(__file__).resolve().parent
+MODEL_DIR = ML_DIR / "model_files"
+PREDICTION_DIR = ML_DIR / "prediction_files"
+
+TRAIN_SEASONS = [2021, 2022, 2023]
+TEST_SEASON = 2024
+
+BASE_PARAMS = {
+    "objective": "regression",
+    "metric": "rmse",
+    "boosting_type": "gbdt",
+    "learning_rate": 0.01,
+    "num_leaves": 31,
+    "feature_fraction": 0.8,
+    "bagging_fraction": 0.8,
+    "bagging_freq": 5,
+    "verbose": -1,
+}
+
+# Row filters use the local_store/pyarrow (column, op, value) form; nulls never match
+OPS = {">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal,
+       "==": np.equal, "!=": np.not_equal}
+
+
+class ModelSpec:
+    """One model: rows where `row_filter` holds, `features` -> `target`, trained with `params`.
+
+    Features registered in features.py and not stored in the snapshot (the
+    rolling means) are computed over the filtered rows. label: the column
+    suffix used in the prediction CSV (several scripts write
+    'receiving_yards' there).
+    """
+
+    def __init__(self, name, target, features, row_filter, model_file, prediction_file,
+                 params=None, num_boost_round=1500, label=None):
+        self.name = name
+        self.target = target
+        self.features = list(features)
+        self.row_filter = list(row_filter)
+        self.model_file = model_file
+        self.prediction_file = prediction_file
+        self.params = {**BASE_PARAMS, **(params or {})}
+        self.num_boost_round = num_boost_round
+        self.label = label or target
+
+
+MODEL_SPECS = [
+    ModelSpec(
+        "passing_yards", "passing_yards",
+        ["week", "pass_attempts_rolling3", "completions_rolling3", "total_pass_plays", "pass_plays_off",
+         "pass_pct_off", "red_zone_pass_pct_off", "deep_pass_pct_off", "avg_air_yards_off", "avg_yac_off",
+         "blitz_rate_def", "pressure_rate_def", "man_coverage_pct_def", "zone_coverage_pct_def",
+         "spread_line", "total_line", "over_odds", "under_odds", "player_moneyline",
+         "fantasy_points_rolling3", "passing_yards_rolling3", "pass_touchdown_rolling3"],
+        row_filter=[("passing_yards", ">", 0)], num_boost_round=1000,
+        model_file="lgb_passing_yards.txt", prediction_file="predicted_passing_yards_2024.csv"),
+    ModelSpec(
+        "qb_fantasy_points", "fantasy_points",
+        ["week", "total_touches", "rushing_yards", "rush_touchdown", "pass_touchdown", "total_pass_plays",
+         "pass_plays_off", "pass_pct_off", "red_zone_pass_pct_off", "deep_pass_pct_off", "avg_air_yards_off",
+         "avg_yac_off", "man_coverage_pct_def", "zone_coverage_pct_def", "blitz_rate_def",
+         "pressure_rate_def", "spread_line", "total_line", "over_odds", "under_odds", "fumble_lost",
+         "rush_inside_10", "rush_inside_20", "player_moneyline", "fantasy_points_rolling3",
+         "receiving_yards_rolling3", "reception_rolling3", "rush_touchdown_rolling3", "passing_yards",
+         "passing_yards_rolling3", "pass_touchdown_rolling3"],
+        row_filter=[("rushing_yards", ">", 0)], label="receiving_yards",
+        model_file="lgb_qb_fantay_points.txt", prediction_file="predicted_qb_fantay_points_2024.csv"),
+    ModelSpec(
+        "rb_fantasy_points", "fantasy_points",
+        ["week", "total_touches", "rushing_yards", "rush_touchdown", "pass_touchdown", "total_pass_plays",
+         "pass_plays_off", "pass_pct_off", "reception", "receiving_touchdown", "red_zone_pass_pct_off",
+         "deep_pass_pct_off", "avg_air_yards_off", "avg_yac_off", "man_coverage_pct_def",
+         "zone_coverage_pct_def", "blitz_rate_def", "pressure_rate_def", "spread_line", "total_line",
+         "over_odds", "under_odds", "fumble_lost", "rush_inside_10", "rush_inside_20", "player_moneyline",
+         "fantasy_points_rolling3", "target_inside_10", "target_inside_20", "receiving_yards_rolling3",
+         "reception_rolling3", "receiving_touchdown_rolling3", "rush_touchdown_rolling3"],
+        row_filter=[("rushing_yards", ">", 0)], label="receiving_yards",
+        model_file="lgb_rb_fantay_points.txt", prediction_file="predicted_rb_fantay_points_2024.csv"),
+    ModelSpec(
+        "wr_fantasy_points", "fantasy_points",
+        ["week", "total_touches", "total_pass_plays", "pass_plays_off", "pass_pct_off",
+         "red_zone_pass_pct_off", "deep_pass_pct_off", "avg_air_yards_off", "avg_yac_off",
+         "man_coverage_pct_def", "zone_coverage_pct_def", "blitz_rate_def", "pressure_rate_def",
+         "spread_line", "total_line", "over_odds", "under_odds", "fumble_lost", "rush_inside_10",
+         "rush_inside_20", "player_moneyline", "fantasy_points_rolling3", "target_inside_10",
+         "target_inside_20", "receiving_yards_rolling3", "reception_rolling3",
+         "receiving_touchdown_rolling3", "rush_touchdown_rolling3"],
+        row_filter=[("receiving_yards", ">", 0)], label="receiving_yards",
+        model_file="lgb_wr_fantay_points.txt", prediction_file="predicted_wr_fantay_points_2024.csv"),
+    ModelSpec(
+        "receiving_yards", "receiving_yards",
+        ["week", "total_touches", "total_pass_plays", "pass_plays_off", "pass_pct_off",
+         "red_zone_pass_pct_off", "deep_pass_pct_off", "avg_air_yards_off", "avg_yac_off",
+         "man_coverage_pct_def", "zone_coverage_pct_def", "blitz_rate_def", "pressure_rate_def",
+         "spread_line", "total_line", "over_odds", "under_odds", "player_moneyline",
+         "fantasy_points_rolling3", "receiving_yards_rolling3", "reception_rolling3",
+         "receiving_touchdown_rolling3"],
+        row_filter=[("receiving_yards", ">", 0)],
+        model_file="lgb_receiving_yards.txt", prediction_file="predicted_receiving_yards_2024.csv"),
+    ModelSpec(
+        "reception", "reception",
+        ["week", "pass_attempt", "complete_pass", "total_touches", "total_pass_plays", "pass_plays_off",
+         "pass_pct_off", "receiving_yards", "receiving_touchdown", "red_zone_pass_pct_off",
+         "deep_pass_pct_off", "avg_air_yards_off", "avg_yac_off", "man_coverage_pct_def",
+         "zone_coverage_pct_def", "blitz_rate_def", "pressure_rate_def", "spread_line", "total_line",
+         "over_odds", "under_odds", "player_moneyline", "fantasy_points", "fantasy_points_rolling3",
+         "receiving_yards_rolling3", "reception_rolling3", "receiving_touchdown_rolling3"],
+        row_filter=[("reception", ">", 0)], label="receiving_yards",
+        model_file="lgb_reception_yards.txt", prediction_file="predicted_reception_yards_2024.csv"),
+    ModelSpec(
+        "rushing_yards", "rushing_yards",
+        ["week", "rush_plays_off", "rush_pct_off", "rush_plays", "rush_touchdown", "total_touches",
+         "man_coverage_pct_def", "zone_coverage_pct_def", "blitz_rate_def", "pressure_rate_def",
+         "spread_line", "total_line", "reception", "receiving_yards", "player_moneyline", "fantasy_points",
+         "fantasy_points_rolling3", "rushing_yards_rolling3", "rush_touchdown_rolling3"],
+        row_filter=[("rushing_yards", ">", 0)],
+        model_file="lgb_rushing_yards.txt", prediction_file="predicted_rushing_yards_2024.csv"),
+]
+
+
+def row_mask(column, row_filter, n: int) -> np.ndarray:
+    """Rows where every (column, op, value) in row_filter holds; column(name) returns float values."""
+    mask = np.ones(n, dtype=bool)
+    for col, op, value in row_filter:
+        values = column(col)
+        mask &= OPS[op](values, value) & ~np.isnan(values)
+    return mask
+
+
+def prepare(snapshot: FeatureSnapshot, spec: ModelSpec) -> pd.DataFrame:
+    """Modeling rows for `spec` (features, target, player_id, season), as the lgb_files scripts build them."""
+    index = snapshot.index
+    mask = row_mask(snapshot.column, spec.row_filter, len(index))
+    rows = np.flatnonzero(mask & (index["player_id"].astype(str).to_numpy() != "0"))
+
+    keys = ["player_id", "season", "week"]
+    wanted = spec.features + [spec.target]
+    derived = [name for name in wanted if name in TRANSFORMS and name not in snapshot.columns]
+    needed = [c for c in dict.fromkeys([c for c in wanted if c not in derived] + required_inputs(derived))
+              if c not in keys]
+    labels = [c for c in needed if c not in snapshot.columns]
+    numeric = [c for c in needed if c in snapshot.columns]
+    df = pd.DataFrame(snapshot.matrix(numeric, rows), columns=numeric)
+    for col in keys + labels:
+        df[col] = index[col].to_numpy()[rows]
+    df = apply_features(df, derived).sort_values(by=keys)
+    return df[spec.features + [spec.target, "player_id", "season"]].dropna()
+
+
+_snapshot = None
+
+
+def _open_snapshot(path):
+    global _snapshot
+    _snapshot = FeatureSnapshot(path)
+
+
+def train_model(spec: ModelSpec, num_threads: int) -> dict:
+    """Train, evaluate and save one model in a worker; returns its summary."""
+    # Imported in the workers only; the parent just schedules
+    import lightgbm as lgb
+    from sklearn.metrics import root_mean_squared_error
+
+    start = time.perf_counter()
+    df_model = prepare(_snapshot, spec)
+    train_df = df_model[df_model["season"].isin(TRAIN_SEASONS)]
+    test_df = df_model[df_model["season"] == TEST_SEASON]
+    X_train, y_train = train_df[spec.features], train_df[spec.target]
+    X_test, y_test = test_df[spec.features], test_df[spec.target]
+
+    # Binned Datasets are reused across runs while the data, features and binning params are unchanged
+    key = dataset_key([_snapshot.version, TRANSFORMS_VERSION, spec.name, spec.target, spec.features,
+                       spec.row_filter, TRAIN_SEASONS, TEST_SEASON], spec.params)
+    train_data, valid_data = train_valid_datasets(key, lambda: (X_train, y_train, X_test, y_test), spec.params)
+    model = lgb.train(
+        params={**spec.params, "num_threads": num_threads},
+        train_set=train_data,
+        num_boost_round=spec.num_boost_round,
+        valid_sets=[train_data, valid_data],
+        valid_names=["train", "valid"],
+        callbacks=[lgb.early_stopping(stopping_rounds=50, verbose=False)],
+    )
+
+    y_pred = model.predict(X_test, num_iteration=model.best_iteration)
+    model.save_model(str(MODEL_DIR / spec.model_file))
+    pd.DataFrame({
+        "player_id": test_df["player_id"],
+        f"actual_{spec.label}": y_test,
+        f"predicted_{spec.label}": y_pred,
+    }).to_csv(PREDICTION_DIR / spec.prediction_file, index=False)
+    return {"name": spec.name, "rows": len(train_df), "best_iteration": model.best_iteration,
+            "rmse": root_mean_squared_error(y_test, y_pred), "wall_s": time.perf_counter() - start}
+
+
+def train_all(specs, snapshot_path, jobs: int = None) -> list:
+    """Train `specs` concurrently, `jobs` at a time, splitting the cores between them."""
+    cpus = os.cpu_count() or 1
+    jobs = max(1, min(jobs or cpus, len(specs)))
+    num_threads = max(1, cpus // jobs)
+    # Biggest training sets first, so the longest job does not start last; the row
+    # filter count ranks them without building each model's frame in the parent
+    _open_snapshot(snapshot_path)
+    n = len(_snapshot.X)
+    sizes = {spec.name: row_mask(_snapshot.column, spec.row_filter, n).sum() for spec in specs}
+    ordered = sorted(specs, key=lambda spec: -sizes[spec.name])
+
+    if jobs == 1:
+        return [train_model(spec, num_threads) for spec in ordered]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_open_snapshot, initargs=(snapshot_path,)) as pool:
+        futures = [pool.submit(train_model, spec, num_threads) for spec in ordered]
+        return [future.result() for future in futures]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train all LightGBM models from one snapshot")
+    parser.add_argument("models", nargs="*", help="model names (default: all)")
+    parser.add_argument("--jobs", type=int, default=None, help="concurrent models (default: one per core)")
+    parser.add_argument("--no-sync", action="store_true", help="train from the local store as it is")
+    parser.add_argument("--list", action="store_true", help="list the model specs and exit")
+    parser.add_argument("--set", action="append", default=[], metavar="PARAM=VALUE",
+                        help="override a LightGBM param for every model, e.g. --set learning_rate=0.05")
+    args = parser.parse_args()
+
+    specs = [spec for spec in MODEL_SPECS if not args.models or spec.name in args.models]
+    unknown = set(args.models) - {spec.name for spec in MODEL_SPECS}
+    if unknown:
+        raise SystemExit(f"Unknown models: {sorted(unknown)}; see --list")
+    overrides = {}
+    for item in args.set:
+        key, value = item.split("=", 1)
+        try:
+            overrides[key] = json.loads(value)
+        except ValueError:
+            overrides[key] = value
+    for spec in specs:
+        spec.params.update(overrides)
+    if args.list:
+        for spec in MODEL_SPECS:
+            print(f"{spec.name:<20} target={spec.target:<16} {len(spec.features):>2} features  "
+                  f"filter={spec.row_filter}")
+        raise SystemExit(0)
+
+    # === Step 1: Sync and snapshot the data once ===
+    if not args.no_sync:
+        load_dotenv()
+        engine = create_engine(os.getenv("DATABASE_URL"))
+        load_table("final_modeling_data", engine, columns=["season"])
+    snapshot_path = build_snapshot("final_modeling_data")
+
+    # === Step 2: Train every model ===
+    start = time.perf_counter()
+    results = train_all(specs, snapshot_path, args.jobs)
+
+    # === Step 3: Summary ===
+    for r in sorted(results, key=lambda r: r["name"]):
+        print(f"{r['name']:<20} {r['rows']:>8,} rows  best_iter {r['best_iteration']:>5}  "
+              f"RMSE {r['rmse']:>8.2f}  {r['wall_s']:>6.1f}s")
+    print(f"✅ Trained {len(results)} models in {time.perf_counter() - start:.1f}s")